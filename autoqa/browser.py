@@ -0,0 +1,80 @@
+"""Capture and restore browser state so agents can start from a snapshot."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+# Seeds localStorage once per tab; later navigations keep the page's own changes
+_LOCAL_STORAGE_SCRIPT = """(() => {
+  const origins = %s;
+  const entries = origins[window.location.origin];
+  if (!entries || window.sessionStorage.getItem("__autoqa_restored")) return;
+  for (const [name, value] of Object.entries(entries)) {
+    window.localStorage.setItem(name, value);
+  }
+  window.sessionStorage.setItem("__autoqa_restored", "1");
+})();"""
+
+
+class BrowserSnapshot:
+    """URL, cookies and localStorage of a browser context at a point in time."""
+
+    def __init__(
+        self,
+        url: Optional[str],
+        cookies: List[Dict[str, Any]],
+        local_storage: Dict[str, Dict[str, str]],
+    ):
+        self.url = url
+        self.cookies = cookies
+        self.local_storage = local_storage  # origin -> {name: value}
+
+    @classmethod
+    def from_storage_state(
+        cls, url: Optional[str], storage_state: Dict[str, Any]
+    ) -> "BrowserSnapshot":
+        """Build a snapshot from a Playwright ``storage_state()`` dictionary."""
+        local_storage = {
+            origin["origin"]: {
+                item["name"]: item["value"] for item in origin.get("localStorage", [])
+            }
+            for origin in storage_state.get("origins", [])
+        }
+        return cls(url, storage_state.get("cookies", []), local_storage)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the snapshot to a dictionary."""
+        return {
+            "url": self.url,
+            "cookies": self.cookies,
+            "local_storage": self.local_storage,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BrowserSnapshot":
+        """Create a snapshot from ``to_dict`` output."""
+        return cls(
+            data.get("url"), data.get("cookies", []), data.get("local_storage", {})
+        )
+
+
+async def capture_state(context) -> BrowserSnapshot:
+    """Snapshot the current page URL, cookies and localStorage of a browser context."""
+    session = await context.get_session()
+    page = await context.get_current_page()
+    storage_state = await session.context.storage_state()
+    return BrowserSnapshot.from_storage_state(page.url, storage_state)
+
+
+async def restore_state(context, snapshot: BrowserSnapshot, navigate: bool = True):
+    """Load a snapshot into a fresh browser context and open its URL."""
+    session = await context.get_session()
+    if snapshot.cookies:
+        await session.context.add_cookies(snapshot.cookies)
+    if snapshot.local_storage:
+        await session.context.add_init_script(
+            _LOCAL_STORAGE_SCRIPT % json.dumps(snapshot.local_storage)
+        )
+    if navigate and snapshot.url:
+        page = await context.get_current_page()
+        await page.goto(snapshot.url)
+        await page.wait_for_load_state()
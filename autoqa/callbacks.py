@@ -0,0 +1,119 @@
+"""LangChain callback handlers that feed AutoQA tracing and usage accounting."""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from autoqa.tracing import Span, current_span
+from autoqa.usage import UsageTracker, current_scope
+
+
+def extract_token_usage(response: LLMResult) -> Dict[str, int]:
+    """Pull input/output token counts out of an LLM response."""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return {
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                }
+
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "input_tokens": token_usage.get("prompt_tokens", 0),
+        "output_tokens": token_usage.get("completion_tokens", 0),
+    }
+
+
+class _PendingCall:
+    """State kept between the start and end callbacks of one LLM call."""
+
+    def __init__(
+        self,
+        model: Optional[str],
+        span: Optional[Span],
+        usage: Optional[Tuple[UsageTracker, str]],
+    ):
+        self.model = model
+        self.span = span
+        self.usage = usage
+        self.start = time.perf_counter()
+
+
+class LLMTraceHandler(BaseCallbackHandler):
+    """Record every chat model call as an ``llm_call`` span and in the usage tracker."""
+
+    def __init__(self):
+        self._calls: Dict[UUID, _PendingCall] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs
+    ):
+        self._start(run_id, serialized)
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs
+    ):
+        self._start(run_id, serialized)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        tokens = extract_token_usage(response)
+        if call.span is not None:
+            call.span.set_attributes(**tokens)
+            call.span.finish()
+        if call.usage is not None:
+            tracker, scope = call.usage
+            tracker.record(
+                scope,
+                call.model,
+                tokens["input_tokens"],
+                tokens["output_tokens"],
+                time.perf_counter() - call.start,
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        if call.span is not None:
+            call.span.error = f"{type(error).__name__}: {error}"
+            call.span.finish()
+        if call.usage is not None:
+            tracker, scope = call.usage
+            tracker.record(scope, call.model, 0, 0, time.perf_counter() - call.start)
+
+    def _start(self, run_id: UUID, serialized: Optional[Dict[str, Any]]):
+        parent = current_span()
+        usage = current_scope()
+        if parent is None and usage is None:
+            return
+        model = (serialized or {}).get("kwargs", {}).get("model")
+        span = None
+        if parent is not None:
+            span = parent.tracer.start_span(
+                "llm_call", parent=parent, start=time.time(), model=model
+            )
+        self._calls[run_id] = _PendingCall(model, span, usage)
+
+
+TRACE_HANDLER = LLMTraceHandler()
+
+
+def attach_trace_handler(llm: Any):
+    """Register the shared trace handler on ``llm`` once."""
+    callbacks = list(getattr(llm, "callbacks", None) or [])
+    if TRACE_HANDLER not in callbacks:
+        callbacks.append(TRACE_HANDLER)
+        try:
+            llm.callbacks = callbacks
+        except (AttributeError, ValueError):
+            # Models that do not accept callbacks simply go untraced
+            pass
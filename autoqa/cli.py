@@ -5,26 +5,53 @@ import json
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 from autoqa.core import AutoQA
+from autoqa.durations import DurationModel
+from autoqa.planning import areas_from_env
+from autoqa.replay import ReplayStore
 from autoqa.report import generate_markdown_report
+from autoqa.routing import RoutingPolicy
+from autoqa.sessions import DEFAULT_TTL_SECONDS, SessionCache
+from autoqa.usage import UsageTracker
 
 
 async def main():
     """Main entry point for the AutoQA CLI."""
+    # Imports the LangChain stack, so it is only loaded once a run starts
+    from autoqa.decisions import DecisionCache
+
     # Load environment variables
     load_dotenv()
     
-    # Initialize the Gemini Flash LLM
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-04-17")
+    # Optionally run execution on a fast Gemini model, escalating uncertain cases
+    routing = RoutingPolicy.from_env()
     
     # Get user input
     url = input("Enter the URL to test: ")
     scenario = input("Enter the test scenario: ")
     
-    # Create and run the AutoQA system
-    auto_qa = AutoQA(url, scenario, llm=llm)
+    # Optional per-run token budget
+    token_budget = os.getenv("AUTOQA_TOKEN_BUDGET")
+    usage = UsageTracker(int(token_budget) if token_budget else None)
+    
+    # Reuse signed-in sessions across runs against the same site
+    session_cache = SessionCache(
+        ttl_seconds=int(os.getenv("AUTOQA_SESSION_TTL", DEFAULT_TTL_SECONDS))
+    )
+    
+    # Create and run the AutoQA system; passing cases are compiled for replay
+    auto_qa = AutoQA(
+        url,
+        scenario,
+        usage=usage,
+        session_cache=session_cache,
+        replay_store=ReplayStore(key=session_cache.key),
+        decision_cache=DecisionCache(key=session_cache.key),
+        routing=routing,
+        planning_areas=areas_from_env(),
+        duration_model=DurationModel("data/durations.json"),
+    )
     
     print("\n--- PHASE 1: Creating Test Plan ---")
     test_plan = await auto_qa.create_test_plan()
@@ -45,6 +72,11 @@ async def main():
     with open(json_report_path, 'w') as f:
         f.write(report)
     print(f"\nJSON report saved to {json_report_path}")
+
+    # Save the span trace next to the report
+    trace_path = f'data/test_result_{timestamp}.trace.json'
+    auto_qa.tracer.export(trace_path)
+    print(f"Trace saved to {trace_path}")
     
     # Generate and save the markdown report
     md_report_path = f'data/test_result_{timestamp}.md'
@@ -1,38 +1,411 @@
 """Core functionality for the AutoQA system."""
 
+import asyncio
+import contextlib
+import importlib
 import json
 import re
-import time
-from typing import List, Dict, Any
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 from datetime import datetime
+from urllib.parse import urlparse
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from browser_use import Agent
+from autoqa.browser import BrowserSnapshot, capture_state, restore_state
+from autoqa.durations import DurationModel
+from autoqa.dedup import DEFAULT_THRESHOLD, find_duplicates
+from autoqa.models import ExecutionLimits, TestCase, TestPlan
+from autoqa.planning import MIN_AREA_STEPS, PlanningArea, merge_test_cases
+from autoqa.prefix import PrefixNode, build_prefix_tree
+from autoqa.replay import (
+    VERDICT_PAGE_TEXT_CHARS,
+    ReplayScript,
+    ReplayStepFailed,
+    ReplayStore,
+    compile_history,
+    run_script,
+)
+from autoqa.routing import STRONG_MODEL, RoutingPolicy, parse_confidence
+from autoqa.sessions import (
+    LOGIN_URL,
+    SessionCache,
+    login_setup_steps,
+    login_step_count,
+)
+from autoqa.tracing import Span, Tracer
+from autoqa.usage import TokenBudgetExceeded, UsageTracker
 
-from autoqa.models import TestCase, TestPlan
+if TYPE_CHECKING:
+    from autoqa.decisions import DecisionCache
+
+# The LLM and browser stacks take seconds to import, so they are loaded when
+# a run first needs them instead of with this module
+_LAZY_IMPORTS = {
+    "ChatGoogleGenerativeAI": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "Agent": ("browser_use", "Agent"),
+    "Browser": ("browser_use", "Browser"),
+    "attach_trace_handler": ("autoqa.callbacks", "attach_trace_handler"),
+    "attach_decision_cache": ("autoqa.decisions", "attach_decision_cache"),
+}
+
+
+# Model for every agent when no routing policy is given
+DEFAULT_MODEL = STRONG_MODEL
+
+
+def _lazy(name: str) -> Any:
+    """A heavy dependency, imported on first use and kept as a module global."""
+    if name not in globals():
+        module, attribute = _LAZY_IMPORTS[name]
+        globals()[name] = getattr(importlib.import_module(module), attribute)
+    return globals()[name]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        return _lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _timing_entry(span: Optional[Span]) -> Dict[str, Any]:
+    """Render a span in the legacy start/end/duration timing format."""
+    if span is None:
+        return {"start": None, "end": None, "duration": None}
+    return {
+        "start": datetime.fromtimestamp(span.start).isoformat(),
+        "end": datetime.fromtimestamp(span.end).isoformat() if span.end else None,
+        "duration": round(span.duration, 2) if span.end else None,
+    }
+
+
+class AgentTimeout(Exception):
+    """Raised when an agent exhausts its step or wall-clock budget."""
 
 
 class AutoQA:
     """Main class for automated web testing."""
 
-    def __init__(self, url: str, scenario: str, llm=None):
+    def __init__(
+        self,
+        url: str,
+        scenario: str,
+        llm=None,
+        tracer: Tracer = None,
+        usage: UsageTracker = None,
+        limits: ExecutionLimits = None,
+        dedup_threshold: Optional[float] = DEFAULT_THRESHOLD,
+        share_prefixes: bool = True,
+        session_cache: Optional[SessionCache] = None,
+        session_owner: str = "",
+        replay_store: Optional[ReplayStore] = None,
+        decision_cache: Optional["DecisionCache"] = None,
+        routing: Optional[RoutingPolicy] = None,
+        planning_areas: Optional[List[PlanningArea]] = None,
+        duration_model: Optional[DurationModel] = None,
+        admission: Optional[
+            Callable[[str, Optional[TestCase]], AsyncContextManager[Any]]
+        ] = None,
+    ):
         self.url = url
         self.scenario = scenario
         self.test_plan = TestPlan(url, scenario)
         self.results = []
-        self.llm = llm or ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-04-17")
-        self.timing = {
-            "planning": {"start": None, "end": None, "duration": None},
-            "execution": {"start": None, "end": None, "duration": None, "tests": {}},
-            "total": {"start": None, "end": None, "duration": None},
+        self.tracer = tracer or Tracer()
+        self.usage = usage or UsageTracker()
+        self.limits = limits or ExecutionLimits()
+        self.dedup_threshold = dedup_threshold
+        self.share_prefixes = share_prefixes
+        self.session_cache = session_cache
+        self.session_owner = session_owner
+        self.replay_store = replay_store
+        self.routing = routing
+        self.planning_areas = planning_areas
+        self.duration_model = duration_model
+        self.decision_cache = decision_cache
+        # Called as admission(label, test_case) around every browser started
+        self.admission = admission
+        self._tier_llms: Dict[str, Any] = {}
+        self._llm = None
+        if llm is not None:
+            self._llm = self._instrument(llm)
+
+    def _instrument(self, llm: Any) -> Any:
+        """Record the model's calls as spans and answer them from the cache."""
+        _lazy("attach_trace_handler")(llm)
+        if self.decision_cache is not None:
+            _lazy("attach_decision_cache")(llm, self.decision_cache)
+        return llm
+
+    @property
+    def llm(self) -> Any:
+        """
+        The model used without a routing policy, created on first use so a
+        policy that picks every model itself never builds it.
+        """
+        if self._llm is None:
+            self._llm = self._instrument(
+                _lazy("ChatGoogleGenerativeAI")(model=DEFAULT_MODEL)
+            )
+        return self._llm
+
+    def _tiers(self, phase: str) -> List[Tuple[str, Any]]:
+        """(model name, LLM) pairs to try for a phase, cheapest first."""
+        if self.routing is None:
+            return [(getattr(self.llm, "model", "default"), self.llm)]
+        tiers = []
+        for model in self.routing.models(phase):
+            if model not in self._tier_llms:
+                self._tier_llms[model] = self._instrument(
+                    _lazy("ChatGoogleGenerativeAI")(model=model)
+                )
+            tiers.append((model, self._tier_llms[model]))
+        return tiers
+
+    def _browser_slot(
+        self, label: str, test_case: Optional[TestCase] = None
+    ) -> AsyncContextManager[Any]:
+        """Hold an admission slot while a browser runs, if admission is enforced."""
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission(label, test_case)
+
+    @property
+    def timing(self) -> Dict[str, Any]:
+        """Phase and per-test timing derived from the recorded spans."""
+        planning = next(iter(self.tracer.spans("plan")), None)
+        execution = next(iter(self.tracer.spans("execution")), None)
+
+        tests = {}
+        for span in self.tracer.spans("test_case"):
+            tests[span.attributes["test_id"]] = {
+                **_timing_entry(span),
+                "predicted": span.attributes.get("predicted_seconds"),
+            }
+
+        phases = [span for span in (planning, execution) if span is not None]
+        total = {"start": None, "end": None, "duration": None}
+        if phases:
+            ends = [span.end for span in phases if span.end]
+            total = {
+                "start": datetime.fromtimestamp(phases[0].start).isoformat(),
+                "end": datetime.fromtimestamp(max(ends)).isoformat() if ends else None,
+                "duration": round(sum(span.duration or 0 for span in phases), 2),
+            }
+
+        return {
+            "planning": _timing_entry(planning),
+            "execution": {**_timing_entry(execution), "tests": tests},
+            "total": total,
+            "decision_cache": self.usage.cache_summary(),
         }
 
+    async def _run_agent(
+        self,
+        task: str,
+        max_steps: int,
+        timeout_seconds: float,
+        snapshot: Optional[BrowserSnapshot] = None,
+        capture: bool = False,
+        llm: Any = None,
+        label: str = "agent",
+        test_case: Optional[TestCase] = None,
+    ) -> Tuple[Any, Optional[BrowserSnapshot]]:
+        """
+        Run a browser agent within its budgets and record its steps as spans.
+        Raises ``AgentTimeout`` when it runs out of steps or time and
+        ``TokenBudgetExceeded`` when the run's token budget is used up.
+
+        The agent gets its own browser, which is always closed afterwards so a
+        timed out or cancelled agent cannot keep holding it. When ``snapshot``
+        is given the browser starts from that state, and with ``capture`` the
+        final browser state is returned alongside the agent history. ``llm``
+        overrides the default model. The browser only starts once
+        ``admission`` grants a slot for ``label`` and ``test_case``.
+        """
+        with self.tracer.span(
+            "agent", max_steps=max_steps, timeout_seconds=timeout_seconds
+        ) as agent_span:
+            captured = None
+            async with self._browser_slot(label, test_case):
+                browser = _lazy("Browser")()
+                context = None
+                try:
+                    if snapshot is not None or capture:
+                        context = await browser.new_context()
+                    if snapshot is not None:
+                        with self.tracer.span("restore_state", url=snapshot.url):
+                            await restore_state(context, snapshot)
+                    agent = _lazy("Agent")(
+                        task=task,
+                        llm=llm or self.llm,
+                        browser=browser,
+                        browser_context=context,
+                    )
+                    result = await asyncio.wait_for(
+                        self.usage.enforce(agent.run(max_steps=max_steps)),
+                        timeout_seconds,
+                    )
+                    if capture:
+                        with self.tracer.span("capture_state"):
+                            captured = await capture_state(context)
+                except asyncio.TimeoutError:
+                    agent_span.set_attribute("timed_out", True)
+                    raise AgentTimeout(
+                        f"Agent did not finish within {timeout_seconds} seconds"
+                    ) from None
+                except TokenBudgetExceeded:
+                    agent_span.set_attribute("budget_exceeded", True)
+                    raise
+                finally:
+                    if context is not None:
+                        await context.close()
+                    await browser.close()
+
+            for item in result.history:
+                metadata = getattr(item, "metadata", None)
+                if metadata is None:
+                    continue
+                actions = item.model_output.action if item.model_output else []
+                self.tracer.record(
+                    "agent_step",
+                    metadata.step_start_time,
+                    metadata.step_end_time,
+                    parent=agent_span,
+                    step=metadata.step_number,
+                    input_tokens=metadata.input_tokens,
+                    actions=len(actions),
+                    url=item.state.url if item.state else None,
+                )
+            agent_span.set_attributes(
+                steps=result.number_of_steps(),
+                input_tokens=result.total_input_tokens(),
+            )
+
+            if not result.is_done() and result.number_of_steps() >= max_steps:
+                agent_span.set_attribute("timed_out", True)
+                raise AgentTimeout(f"Agent did not finish within {max_steps} steps")
+        return result, captured
+
     async def create_test_plan(self):
-        """Generate a test plan by exploring the website."""
-        # Start timing for planning phase
-        self.timing["planning"]["start"] = datetime.now().isoformat()
-        self.timing["total"]["start"] = self.timing["planning"]["start"]
-        start_time = time.time()
+        """
+        Generate a test plan by exploring the website.
+
+        With ``planning_areas`` each area is explored by its own agent
+        concurrently and the partial plans are merged.
+        """
+        with (
+            self.tracer.span(
+                "plan", url=self.url, areas=len(self.planning_areas or [])
+            ) as span,
+            self.usage.scope("planning"),
+        ):
+            if self.planning_areas:
+                test_plan, tier = await self._explore_areas(self.planning_areas)
+            else:
+                test_plan, tier = await self._plan_with_tiers(self.test_plan)
+            span.set_attribute("tier", tier)
+            if test_plan and self.dedup_threshold is not None:
+                self.prune_duplicates(self.dedup_threshold)
+            span.set_attributes(
+                test_cases=len(self.test_plan.test_cases),
+                pruned=len(self.test_plan.pruned),
+                total_tokens=self.usage.total["total_tokens"],
+            )
+            return test_plan
+
+    async def _plan_with_tiers(
+        self,
+        test_plan: TestPlan,
+        area: Optional[PlanningArea] = None,
+        max_steps: Optional[int] = None,
+    ) -> Tuple[Optional[TestPlan], str]:
+        """Plan on each planning model in turn until one yields a parsable plan."""
+        tiers = self._tiers("planning")
+        for i, (tier, llm) in enumerate(tiers):
+            result = await self._create_test_plan(llm, test_plan, area, max_steps)
+            if result or i == len(tiers) - 1 or self.usage.budget_exceeded:
+                break
+            # Escalate: discard anything the failed attempt parsed
+            test_plan.test_cases = []
+        return result, tier
+
+    async def _explore_areas(
+        self, areas: List[PlanningArea]
+    ) -> Tuple[Optional[TestPlan], str]:
+        """
+        Explore the planning areas concurrently and merge their test cases
+        into ``self.test_plan``. The planning step budget is split between
+        the areas while each keeps the full wall-clock budget, so the phase
+        takes as long as the slowest area.
+        """
+        max_steps = max(self.limits.planning_max_steps // len(areas), MIN_AREA_STEPS)
+
+        async def explore(area):
+            partial = TestPlan(self.url, self.scenario)
+            with self.tracer.span(
+                "plan_area", area=area.name, max_steps=max_steps
+            ) as span:
+                result, tier = await self._plan_with_tiers(partial, area, max_steps)
+                span.set_attributes(
+                    tier=tier, test_cases=len(partial.test_cases) if result else 0
+                )
+            return result, tier
+
+        explored = await asyncio.gather(*(explore(area) for area in areas))
+        partials = [plan.test_cases for plan, _ in explored if plan]
+        tier = ", ".join(sorted({tier for _, tier in explored}))
+        if not partials:
+            return None, tier
+        for test_case in merge_test_cases(partials):
+            self.test_plan.add_test_case(test_case)
+        return self.test_plan, tier
+
+    def prune_duplicates(self, threshold: float = DEFAULT_THRESHOLD):
+        """Drop near-duplicate test cases from the plan, recording them as pruned."""
+        with self.tracer.span("dedup", threshold=threshold) as span:
+            kept, pruned = find_duplicates(self.test_plan.test_cases, threshold)
+            self.test_plan.test_cases = kept
+            self.test_plan.pruned.extend(pruned)
+            span.set_attribute("pruned", len(pruned))
+        return pruned
+
+    def estimated_seconds_saved(self) -> float:
+        """Browser time saved by pruning, based on the mean executed case duration."""
+        durations = [
+            span.duration
+            for span in self.tracer.spans("test_case")
+            if span.end and span.attributes.get("status") != "SKIPPED"
+        ]
+        if not durations or not self.test_plan.pruned:
+            return 0.0
+        return len(self.test_plan.pruned) * sum(durations) / len(durations)
+
+    async def _create_test_plan(
+        self,
+        llm: Any = None,
+        test_plan: Optional[TestPlan] = None,
+        area: Optional[PlanningArea] = None,
+        max_steps: Optional[int] = None,
+    ):
+        test_plan = test_plan or self.test_plan
+        focus = ""
+        coverage = """Include at least 4-6 test cases, covering:
+- Basic functionality (normal usage)
+- Edge cases (invalid inputs, boundary conditions)
+- Error handling (how the system responds to incorrect usage)"""
+        if area is not None:
+            focus = f"""Focus: {area.focus}
+Other testers cover the rest of the scenario, so only explore and write test cases for this focus.
+"""
+            coverage = "Include 2-4 test cases for your focus."
 
         planning_prompt = f"""You are an expert web QA engineer with access to a browser. 
         
@@ -40,7 +413,7 @@ Your task is to explore a website and create a structured test plan for a specif
 
 Website: {self.url}
 Scenario: {self.scenario}
-
+{focus}
 First, explore the website to understand how the feature works:
 1. Visit the website and navigate to where the feature is used
 2. Observe the UI elements and interactions related to the feature
@@ -65,21 +438,24 @@ Then, create a structured test plan with the following format:
 }}
 ```
 
-Include at least 4-6 test cases, covering:
-- Basic functionality (normal usage)
-- Edge cases (invalid inputs, boundary conditions)
-- Error handling (how the system responds to incorrect usage)
+{coverage}
 
 IMPORTANT: You must output ONLY the JSON test plan in the exact format shown above. No additional text or explanations.
 """
 
         # Use standard JSON output
-        agent = Agent(task=planning_prompt, llm=self.llm)
-        result = await agent.run()
-
-        # End timing for planning phase
-        self.timing["planning"]["end"] = datetime.now().isoformat()
-        self.timing["planning"]["duration"] = round(time.time() - start_time, 2)
+        try:
+            result, _ = await self._run_agent(
+                planning_prompt,
+                max_steps or self.limits.planning_max_steps,
+                self.limits.planning_timeout_seconds,
+                llm=llm,
+                label=f"plan/{area.name}" if area else "plan",
+            )
+        except (AgentTimeout, TokenBudgetExceeded) as e:
+            print("Error: Planning agent exceeded its budget")
+            print(e)
+            return None
 
         # Parse the JSON result
         try:
@@ -87,91 +463,296 @@ IMPORTANT: You must output ONLY the JSON test plan in the exact format shown abo
             result_str = result.final_result()
 
             # Save the raw output for debugging
-            with open("autoqa/test_plan.json", "w") as f:
+            suffix = f"_{area.name}" if area is not None else ""
+            with open(f"autoqa/test_plan{suffix}.json", "w") as f:
                 f.write(result_str)
 
-            # Try to parse as JSON
-            try:
-                # First try parsing directly
-                test_plan_data = json.loads(result_str)
+            with self.tracer.span("parse"):
+                return self._parse_test_plan(result_str, test_plan)
+        except Exception as e:
+            print("Error: Could not parse test plan JSON")
+            print(e)
+            return None
+
+    def _parse_test_plan(self, result_str: str, test_plan: Optional[TestPlan] = None):
+        """Populate a test plan (``self.test_plan`` by default) from the agent output."""
+        test_plan = test_plan or self.test_plan
+        try:
+            # First try parsing directly
+            test_plan_data = json.loads(result_str)
+
+            # Check if test_cases is a top-level key
+            if "test_cases" in test_plan_data:
+                test_cases = test_plan_data["test_cases"]
+            # Check if it's in a nested structure (browser-use sometimes wraps output)
+            elif isinstance(test_plan_data, list) and len(test_plan_data) > 0:
+                for item in test_plan_data:
+                    if isinstance(item, dict) and "test_cases" in item:
+                        test_cases = item["test_cases"]
+                        break
+                    elif (
+                        isinstance(item, dict)
+                        and "done" in item
+                        and "data" in item["done"]
+                        and "test_cases" in item["done"]["data"]
+                    ):
+                        test_cases = item["done"]["data"]["test_cases"]
+                        break
+            else:
+                # Fallback - try to find any list that looks like test cases
+                for key, value in test_plan_data.items():
+                    if (
+                        isinstance(value, list)
+                        and len(value) > 0
+                        and isinstance(value[0], dict)
+                        and "id" in value[0]
+                    ):
+                        test_cases = value
+                        break
+                else:
+                    raise ValueError("Could not find test_cases in the output")
 
-                # Check if test_cases is a top-level key
+            # Process the test cases
+            for tc_data in test_cases:
+                test_case = TestCase(
+                    id=tc_data.get("id", ""),
+                    description=tc_data.get("description", ""),
+                    steps=tc_data.get("steps", []),
+                    expected_result=tc_data.get("expected_result", ""),
+                )
+                test_plan.add_test_case(test_case)
+
+            return test_plan
+        except json.JSONDecodeError:
+            # If direct JSON parsing fails, try to extract JSON from the text
+            import re
+
+            json_match = re.search(r"\{[\s\S]*\}", result_str)
+            if json_match:
+                test_plan_data = json.loads(json_match.group(0))
                 if "test_cases" in test_plan_data:
                     test_cases = test_plan_data["test_cases"]
-                # Check if it's in a nested structure (browser-use sometimes wraps output)
-                elif isinstance(test_plan_data, list) and len(test_plan_data) > 0:
-                    for item in test_plan_data:
-                        if isinstance(item, dict) and "test_cases" in item:
-                            test_cases = item["test_cases"]
-                            break
-                        elif (
-                            isinstance(item, dict)
-                            and "done" in item
-                            and "data" in item["done"]
-                            and "test_cases" in item["done"]["data"]
-                        ):
-                            test_cases = item["done"]["data"]["test_cases"]
-                            break
-                else:
-                    # Fallback - try to find any list that looks like test cases
-                    for key, value in test_plan_data.items():
-                        if (
-                            isinstance(value, list)
-                            and len(value) > 0
-                            and isinstance(value[0], dict)
-                            and "id" in value[0]
-                        ):
-                            test_cases = value
-                            break
-                    else:
-                        raise ValueError("Could not find test_cases in the output")
-
-                # Process the test cases
-                for tc_data in test_cases:
-                    test_case = TestCase(
-                        id=tc_data.get("id", ""),
-                        description=tc_data.get("description", ""),
-                        steps=tc_data.get("steps", []),
-                        expected_result=tc_data.get("expected_result", ""),
+                    for tc_data in test_cases:
+                        test_case = TestCase(
+                            id=tc_data.get("id", ""),
+                            description=tc_data.get("description", ""),
+                            steps=tc_data.get("steps", []),
+                            expected_result=tc_data.get("expected_result", ""),
+                        )
+                        test_plan.add_test_case(test_case)
+                    return test_plan
+
+            raise ValueError("Could not extract valid JSON from the output")
+
+    async def execute_test_case(
+        self,
+        test_case: TestCase,
+        snapshot: Optional[BrowserSnapshot] = None,
+        completed_steps: int = 0,
+    ):
+        """
+        Execute a single test case and record the results.
+
+        With a ``snapshot`` the agent starts from that browser state and only
+        performs the steps after the first ``completed_steps``. Under a routing
+        policy the case runs on the cheapest execution model first and is re-run
+        on the next one while the outcome is uncertain.
+        """
+        with (
+            self.tracer.span(
+                "test_case", test_id=test_case.id, forked_steps=completed_steps
+            ) as span,
+            self.usage.scope(test_case.id),
+        ):
+            # Without a snapshot every step runs, whatever completed_steps says
+            test_case.forked_steps = completed_steps if snapshot is not None else 0
+            predicted = None
+            if self.duration_model is not None:
+                predicted = self.duration_model.predict(
+                    self.url, test_case, test_case.forked_steps
+                )
+                span.set_attribute("predicted_seconds", round(predicted, 2))
+            tiers = self._tiers("execution")
+            escalated = []
+            for i, (tier, llm) in enumerate(tiers):
+                updated_test_case = await self._execute_test_case(
+                    test_case, snapshot, completed_steps, llm, tier
+                )
+                if (
+                    self.routing is None
+                    or i == len(tiers) - 1
+                    or self.usage.budget_exceeded
+                    or not self.routing.should_escalate(
+                        updated_test_case.status, updated_test_case.confidence
                     )
-                    self.test_plan.add_test_case(test_case)
+                ):
+                    break
+                escalated.append(f"{tier}: {updated_test_case.status}")
+                test_case.actual_result = test_case.status = test_case.notes = None
+                test_case.confidence = None
 
-                return self.test_plan
-            except json.JSONDecodeError:
-                # If direct JSON parsing fails, try to extract JSON from the text
-                import re
-
-                json_match = re.search(r"\{[\s\S]*\}", result_str)
-                if json_match:
-                    test_plan_data = json.loads(json_match.group(0))
-                    if "test_cases" in test_plan_data:
-                        test_cases = test_plan_data["test_cases"]
-                        for tc_data in test_cases:
-                            test_case = TestCase(
-                                id=tc_data.get("id", ""),
-                                description=tc_data.get("description", ""),
-                                steps=tc_data.get("steps", []),
-                                expected_result=tc_data.get("expected_result", ""),
-                            )
-                            self.test_plan.add_test_case(test_case)
-                        return self.test_plan
-
-                raise ValueError("Could not extract valid JSON from the output")
-        except Exception as e:
-            print("Error: Could not parse test plan JSON")
-            print(e)
+            if escalated:
+                updated_test_case.notes = (
+                    f"{updated_test_case.notes or ''} (escalated from "
+                    f"{', '.join(escalated)})"
+                ).strip()
+            tokens = self.usage.scopes.get(test_case.id, {}).get("total_tokens", 0)
+            span.set_attributes(
+                status=updated_test_case.status,
+                total_tokens=tokens,
+                tier=updated_test_case.model_tier,
+                escalations=len(escalated),
+            )
+
+        test_case.duration_seconds = span.duration
+        test_case.predicted_seconds = predicted
+        if self.duration_model is not None:
+            self.duration_model.observe(
+                self.url, test_case, span.duration, predicted, test_case.forked_steps
+            )
+        return updated_test_case
+
+    def schedule(self, test_cases: List[TestCase]) -> List[TestCase]:
+        """
+        Order test cases longest predicted first so a slow case does not start
+        last. This only shortens runs that execute cases concurrently.
+        """
+        if self.duration_model is None:
+            return list(test_cases)
+        return sorted(
+            test_cases,
+            key=lambda tc: self.duration_model.predict(self.url, tc),
+            reverse=True,
+        )
+
+    def skip_test_case(self, test_case: TestCase, reason: str) -> TestCase:
+        """Mark a test case as skipped without executing it."""
+        test_case.status = "SKIPPED"
+        test_case.notes = reason
+        return test_case
+
+    def _steps_prompt(self, test_case: TestCase, completed_steps: int) -> str:
+        """Describe the steps to execute, noting any already performed."""
+        if not completed_steps:
+            return f"""Steps to execute:
+{chr(10).join(f"- {step}" for step in test_case.steps)}"""
+
+        done = test_case.steps[:completed_steps]
+        remaining = test_case.steps[completed_steps:] or [
+            "No further actions, only verify the expected result"
+        ]
+        signed_in = ""
+        if login_step_count(done):
+            signed_in = "\nIf the site shows that you are not signed in, perform the sign-in steps above yourself before continuing.\n"
+        return f"""These steps have already been performed and the browser is on the resulting page:
+{chr(10).join(f"- {step}" for step in done)}
+{signed_in}
+Remaining steps to execute:
+{chr(10).join(f"- {step}" for step in remaining)}"""
+
+    async def replay(
+        self,
+        script: ReplayScript,
+        test_case: TestCase,
+        snapshot: Optional[BrowserSnapshot] = None,
+    ) -> Optional[str]:
+        """
+        Run a compiled script in a fresh browser. Returns None if it reached
+        the recorded end state and the page shows the expected result,
+        otherwise why it did not.
+        """
+        with self.tracer.span("replay", actions=len(script.actions)) as span:
+            async with self._browser_slot(test_case.id, test_case):
+                browser = _lazy("Browser")()
+                try:
+                    context = await browser.new_context()
+                    try:
+                        if snapshot is not None:
+                            await restore_state(context, snapshot)
+                        page = await context.get_current_page()
+                        page_text = await asyncio.wait_for(
+                            run_script(page, script), self.limits.timeout_seconds
+                        )
+                    finally:
+                        await context.close()
+                except ReplayStepFailed as e:
+                    span.set_attributes(passed=False, error=str(e))
+                    return str(e)
+                except asyncio.TimeoutError:
+                    span.set_attributes(passed=False, error="timed out")
+                    return f"Replay did not finish within {self.limits.timeout_seconds} seconds"
+                finally:
+                    await browser.close()
+
+            if not script.expected_texts:
+                # Nothing to assert on the page text, let the cheapest model judge
+                error = await self._replay_verdict(test_case, page_text)
+                span.set_attribute("verdict", "llm")
+                if error is not None:
+                    span.set_attributes(passed=False, error=error)
+                    return error
+            span.set_attribute("passed", True)
             return None
 
-    async def execute_test_case(self, test_case: TestCase):
-        """Execute a single test case and record the results."""
-        # Start timing for this test case
-        test_id = test_case.id
-        self.timing["execution"]["tests"][test_id] = {
-            "start": datetime.now().isoformat(),
-            "end": None,
-            "duration": None,
-        }
-        start_time = time.time()
+    async def _replay_verdict(
+        self, test_case: TestCase, page_text: str
+    ) -> Optional[str]:
+        """
+        Ask the cheapest execution model whether the page a replay ended on
+        shows the expected result. Returns None if it does, otherwise why not.
+        """
+        _, llm = self._tiers("execution")[0]
+        prompt = f"""A scripted browser run of a test case ended on a page with this text:
+
+{page_text[:VERDICT_PAGE_TEXT_CHARS]}
+
+Test Case: {test_case.description}
+Expected Result: {test_case.expected_result}
+
+Does the page show that the expected result holds? Answer ONLY with JSON:
+{{"status": "PASS/FAIL", "reason": "one sentence"}}"""
+        message = await llm.ainvoke(prompt)
+        answer = str(getattr(message, "content", message))
+        match = re.search(r'"status"\s*:\s*"(\w+)"', answer)
+        if match and match.group(1).upper() == "PASS":
+            return None
+        reason = re.search(r'"reason"\s*:\s*"([^"]*)"', answer)
+        return (
+            f"Expected result not confirmed on the final page: {reason.group(1)}"
+            if reason
+            else "Expected result not confirmed on the final page"
+        )
+
+    async def _execute_test_case(
+        self,
+        test_case: TestCase,
+        snapshot: Optional[BrowserSnapshot] = None,
+        completed_steps: int = 0,
+        llm: Any = None,
+        tier: Optional[str] = None,
+    ):
+        if snapshot is None:
+            completed_steps = 0
+        test_case.model_tier = tier
+
+        # Replay a compiled script of an earlier passing run without the LLM
+        fingerprint = None
+        replay_error = None
+        if self.replay_store is not None:
+            fingerprint = ReplayStore.fingerprint(self.url, test_case, completed_steps)
+            script = self.replay_store.load(fingerprint)
+            if script is not None:
+                replay_error = await self.replay(script, test_case, snapshot)
+                if replay_error is None:
+                    test_case.status = "PASS"
+                    test_case.actual_result = (
+                        f"Replayed {len(script.actions)} recorded actions, "
+                        f"reached {script.final_url} and found the expected result"
+                    )
+                    test_case.notes = "Replayed compiled script without the LLM"
+                    test_case.model_tier = "replay"
+                    return test_case
+                self.replay_store.invalidate(fingerprint)
 
         execution_prompt = f"""You are an expert web QA tester with access to a browser.
 
@@ -181,8 +762,7 @@ Website: {self.url}
 Test Case ID: {test_case.id}
 Description: {test_case.description}
 
-Steps to execute:
-{chr(10).join(f"- {step}" for step in test_case.steps)}
+{self._steps_prompt(test_case, completed_steps)}
 
 Expected Result: {test_case.expected_result}
 
@@ -191,6 +771,7 @@ Execute these steps precisely and report the outcome in this format:
 {{
   "actual_result": "Detailed description of what actually happened",
   "status": "PASS/FAIL/ERROR",
+  "confidence": 0.0-1.0 (how certain you are that the status is correct),
   "notes": "Any additional observations or notes about the execution"
 }}
 ```
@@ -199,19 +780,26 @@ IMPORTANT: You must output ONLY the JSON result in the exact format shown above.
 """
 
         # Use standard JSON output
-        agent = Agent(task=execution_prompt, llm=self.llm)
-        result = await agent.run()
-
-        # Parse the result
         try:
-            # End timing for this test case
-            self.timing["execution"]["tests"][test_id][
-                "end"
-            ] = datetime.now().isoformat()
-            self.timing["execution"]["tests"][test_id]["duration"] = round(
-                time.time() - start_time, 2
+            result, _ = await self._run_agent(
+                execution_prompt,
+                self.limits.max_steps,
+                self.limits.timeout_seconds,
+                snapshot=snapshot,
+                llm=llm,
+                label=test_case.id,
+                test_case=test_case,
             )
+        except AgentTimeout as e:
+            test_case.status = "TIMEOUT"
+            test_case.notes = str(e)
+            return test_case
+        except TokenBudgetExceeded as e:
+            # Not a timeout: the run as a whole has no tokens left
+            return self.skip_test_case(test_case, f"Stopped: {e}")
 
+        # Parse the result
+        try:
             # Get the final result as a string
             result_str = result.final_result()
 
@@ -219,145 +807,366 @@ IMPORTANT: You must output ONLY the JSON result in the exact format shown above.
             with open(f"autoqa/test_result_{test_case.id}.json", "w") as f:
                 f.write(result_str)
 
-            # Try to parse as JSON
-            try:
-                # First try parsing directly
-                execution_data = json.loads(result_str)
+            with self.tracer.span("parse"):
+                self._parse_execution_result(result_str, test_case)
+                test_case.confidence = parse_confidence(result_str)
 
-                # Handle different possible structures
-                if (
-                    isinstance(execution_data, dict)
-                    and "actual_result" in execution_data
-                    and "status" in execution_data
-                ):
-                    # Direct format
-                    test_case.actual_result = execution_data.get("actual_result", "")
-                    test_case.status = execution_data.get("status", "ERROR")
-                    test_case.notes = execution_data.get("notes", "")
-                elif isinstance(execution_data, list) and len(execution_data) > 0:
-                    # Nested format
-                    for item in execution_data:
+            if replay_error:
+                test_case.notes = (
+                    f"{test_case.notes or ''} (replay fell back to the agent: "
+                    f"{replay_error})"
+                ).strip()
+            if fingerprint and test_case.status == "PASS":
+                script = compile_history(test_case, result, completed_steps)
+                if script is not None:
+                    self.replay_store.save(fingerprint, script)
+
+            return test_case
+        except Exception as e:
+            print(
+                f"Error: Could not process execution result for test case {test_case.id}"
+            )
+            print(e)
+            test_case.status = "ERROR"
+            test_case.notes = f"Error processing execution result: {str(e)}"
+            return test_case
+
+    def _parse_execution_result(self, result_str: str, test_case: TestCase):
+        """Fill in the test case outcome from the execution agent's raw output."""
+        try:
+            # First try parsing directly
+            execution_data = json.loads(result_str)
+
+            # Handle different possible structures
+            if (
+                isinstance(execution_data, dict)
+                and "actual_result" in execution_data
+                and "status" in execution_data
+            ):
+                # Direct format
+                test_case.actual_result = execution_data.get("actual_result", "")
+                test_case.status = execution_data.get("status", "ERROR")
+                test_case.notes = execution_data.get("notes", "")
+            elif isinstance(execution_data, list) and len(execution_data) > 0:
+                # Nested format
+                for item in execution_data:
+                    if (
+                        isinstance(item, dict)
+                        and "done" in item
+                        and "data" in item["done"]
+                    ):
+                        data = item["done"]["data"]
                         if (
-                            isinstance(item, dict)
-                            and "done" in item
-                            and "data" in item["done"]
-                        ):
-                            data = item["done"]["data"]
-                            if (
-                                isinstance(data, dict)
-                                and "actual_result" in data
-                                and "status" in data
-                            ):
-                                test_case.actual_result = data.get("actual_result", "")
-                                test_case.status = data.get("status", "ERROR")
-                                test_case.notes = data.get("notes", "")
-                                break
-                        elif (
-                            isinstance(item, dict)
-                            and "actual_result" in item
-                            and "status" in item
+                            isinstance(data, dict)
+                            and "actual_result" in data
+                            and "status" in data
                         ):
-                            test_case.actual_result = item.get("actual_result", "")
-                            test_case.status = item.get("status", "ERROR")
-                            test_case.notes = item.get("notes", "")
+                            test_case.actual_result = data.get("actual_result", "")
+                            test_case.status = data.get("status", "ERROR")
+                            test_case.notes = data.get("notes", "")
                             break
+                    elif (
+                        isinstance(item, dict)
+                        and "actual_result" in item
+                        and "status" in item
+                    ):
+                        test_case.actual_result = item.get("actual_result", "")
+                        test_case.status = item.get("status", "ERROR")
+                        test_case.notes = item.get("notes", "")
+                        break
+            else:
+                # Try to find relevant keys at any level
+                def extract_result(data):
+                    if isinstance(data, dict):
+                        if "actual_result" in data and "status" in data:
+                            return data
+                        for key, value in data.items():
+                            result = extract_result(value)
+                            if result:
+                                return result
+                    elif isinstance(data, list):
+                        for item in data:
+                            result = extract_result(item)
+                            if result:
+                                return result
+                    return None
+
+                result_data = extract_result(execution_data)
+                if result_data:
+                    test_case.actual_result = result_data.get("actual_result", "")
+                    test_case.status = result_data.get("status", "ERROR")
+                    test_case.notes = result_data.get("notes", "")
                 else:
-                    # Try to find relevant keys at any level
-                    def extract_result(data):
-                        if isinstance(data, dict):
-                            if "actual_result" in data and "status" in data:
-                                return data
-                            for key, value in data.items():
-                                result = extract_result(value)
-                                if result:
-                                    return result
-                        elif isinstance(data, list):
-                            for item in data:
-                                result = extract_result(item)
-                                if result:
-                                    return result
-                        return None
-
-                    result_data = extract_result(execution_data)
-                    if result_data:
-                        test_case.actual_result = result_data.get("actual_result", "")
-                        test_case.status = result_data.get("status", "ERROR")
-                        test_case.notes = result_data.get("notes", "")
+                    raise ValueError(
+                        "Could not find execution result data in the output"
+                    )
+
+        except json.JSONDecodeError:
+            # If direct JSON parsing fails, try to extract JSON from the text
+            import re
+
+            json_match = re.search(r"\{[\s\S]*\}", result_str)
+            if json_match:
+                try:
+                    execution_data = json.loads(json_match.group(0))
+                    if "actual_result" in execution_data and "status" in execution_data:
+                        test_case.actual_result = execution_data.get(
+                            "actual_result", ""
+                        )
+                        test_case.status = execution_data.get("status", "ERROR")
+                        test_case.notes = execution_data.get("notes", "")
                     else:
                         raise ValueError(
-                            "Could not find execution result data in the output"
+                            "Could not find execution result data in the extracted JSON"
                         )
+                except json.JSONDecodeError:
+                    raise ValueError("Could not parse the extracted JSON")
+            else:
+                raise ValueError("Could not extract JSON from the output")
+
+    async def run_prefix(
+        self, node: PrefixNode, snapshot: Optional[BrowserSnapshot] = None
+    ) -> Optional[BrowserSnapshot]:
+        """
+        Perform the steps of a shared prefix once and snapshot the browser.
+
+        Returns None if the steps could not be completed, in which case the
+        cases below the prefix have to run without it.
+        """
+        prefix_prompt = f"""You are an expert web QA tester with access to a browser.
+
+Website: {self.url}
 
+Perform these setup steps precisely, in order:
+{chr(10).join(f"- {step}" for step in node.steps)}
+
+Do not perform any other actions once the steps are done. Report the outcome in this format:
+```json
+{{
+  "status": "DONE/FAILED",
+  "notes": "Why the steps could not be completed, if they failed"
+}}
+```
+
+IMPORTANT: You must output ONLY the JSON result in the exact format shown above. No additional text or explanations.
+"""
+        with (
+            self.tracer.span(
+                "prefix",
+                steps=len(node.steps),
+                completed_steps=node.end,
+                test_cases=len(node.all_test_cases()),
+            ) as span,
+            self.usage.scope("prefix"),
+        ):
+            try:
+                result, captured = await self._run_agent(
+                    prefix_prompt,
+                    self.limits.max_steps,
+                    self.limits.timeout_seconds,
+                    snapshot=snapshot,
+                    capture=True,
+                    llm=self._tiers("execution")[0][1],
+                    label="prefix",
+                )
+            except (AgentTimeout, TokenBudgetExceeded) as e:
+                span.set_attribute("error", str(e))
+                return None
+
+            result_str = result.final_result() or ""
+            match = re.search(r"\{[\s\S]*\}", result_str)
+            try:
+                status = json.loads(match.group(0)).get("status", "") if match else ""
             except json.JSONDecodeError:
-                # If direct JSON parsing fails, try to extract JSON from the text
-                import re
+                status = ""
+            if not result.is_done() or status.upper() == "FAILED":
+                span.set_attribute("failed", True)
+                return None
+            return captured
 
-                json_match = re.search(r"\{[\s\S]*\}", result_str)
-                if json_match:
+    async def validate_session(self, snapshot: BrowserSnapshot) -> bool:
+        """
+        Cheaply check a cached session without the LLM: restore it into a
+        browser and make sure the site does not bounce to a sign-in page.
+        """
+        with self.tracer.span("validate_session", url=snapshot.url) as span:
+            async with self._browser_slot("session"):
+                browser = _lazy("Browser")()
+                try:
+                    context = await browser.new_context()
                     try:
-                        execution_data = json.loads(json_match.group(0))
-                        if (
-                            "actual_result" in execution_data
-                            and "status" in execution_data
-                        ):
-                            test_case.actual_result = execution_data.get(
-                                "actual_result", ""
-                            )
-                            test_case.status = execution_data.get("status", "ERROR")
-                            test_case.notes = execution_data.get("notes", "")
-                        else:
-                            raise ValueError(
-                                "Could not find execution result data in the extracted JSON"
-                            )
-                    except json.JSONDecodeError:
-                        raise ValueError("Could not parse the extracted JSON")
-                else:
-                    raise ValueError("Could not extract JSON from the output")
+                        await restore_state(context, snapshot)
+                        page = await context.get_current_page()
+                        landed = page.url
+                    finally:
+                        await context.close()
+                except Exception as e:
+                    span.set_attribute("error", str(e))
+                    return False
+                finally:
+                    await browser.close()
 
-            return test_case
-        except Exception as e:
-            print(
-                f"Error: Could not process execution result for test case {test_case.id}"
+            rejected = bool(LOGIN_URL.search(urlparse(landed).path)) and not (
+                LOGIN_URL.search(urlparse(snapshot.url or "").path)
             )
-            print(e)
-            test_case.status = "ERROR"
-            test_case.notes = f"Error processing execution result: {str(e)}"
-            return test_case
+            span.set_attributes(landed=landed, rejected=rejected)
+            return not rejected
+
+    async def _cached_session(
+        self, login_steps: List[str]
+    ) -> Optional[BrowserSnapshot]:
+        """The cached session of a sign-in flow, if there is one and it still works."""
+        if self.session_cache is None:
+            return None
+        snapshot = self.session_cache.load(self.url, login_steps, self.session_owner)
+        if snapshot is None:
+            return None
+        if not await self.validate_session(snapshot):
+            self.session_cache.invalidate(self.url, login_steps, self.session_owner)
+            return None
+        return snapshot
+
+    def _remember_session(self, node: PrefixNode, snapshot: BrowserSnapshot):
+        """Cache the browser state after a shared prefix that signed in."""
+        if self.session_cache is None:
+            return
+        # Only a prefix that completes the whole sign-in flow of every case
+        # below it leaves the browser signed in
+        test_cases = node.all_test_cases()
+        count = login_step_count(test_cases[0].steps)
+        if 0 < count <= node.end and all(
+            login_step_count(tc.steps) == count for tc in test_cases
+        ):
+            self.session_cache.save(
+                self.url,
+                test_cases[0].steps[:count],
+                BrowserSnapshot(self.url, snapshot.cookies, snapshot.local_storage),
+                self.session_owner,
+            )
+
+    async def execute_shared_prefixes(
+        self,
+        test_cases: List[TestCase],
+        execute: Optional[Callable[..., Awaitable[TestCase]]] = None,
+        concurrency: int = 1,
+    ) -> List[TestCase]:
+        """
+        Execute test cases, running steps shared by several cases only once.
+
+        Each shared prefix is performed by one agent whose final browser state
+        is snapshotted; the cases below it start from that snapshot. Cases that
+        only sign in as setup start from the cached session of the site when
+        one is available. ``execute`` is called as
+        ``execute(test_case, snapshot=..., completed_steps=...)`` and defaults
+        to ``execute_test_case``.
+        """
+        execute = execute or self.execute_test_case
+        semaphore = asyncio.Semaphore(concurrency)
+        results: List[TestCase] = []
+        ordered = self.schedule(test_cases)
+
+        # Cases that sign in with the same steps share that flow's session
+        flows: Dict[Tuple[str, ...], List[TestCase]] = {}
+        for test_case in ordered:
+            count = login_setup_steps(test_case)
+            if count:
+                login = tuple(str(step) for step in test_case.steps[:count])
+                flows.setdefault(login, []).append(test_case)
+
+        offsets: Dict[str, int] = {}
+        sessions: List[Tuple[BrowserSnapshot, List[TestCase]]] = []
+        for login, flow_cases in flows.items():
+            session = await self._cached_session(list(login))
+            if session is not None:
+                sessions.append((session, flow_cases))
+                for test_case in flow_cases:
+                    offsets[test_case.id] = len(login)
+        anonymous = [tc for tc in ordered if tc.id not in offsets]
+
+        async def run_case(test_case, snapshot, completed_steps):
+            if snapshot is not None:
+                completed_steps += offsets.get(test_case.id, 0)
+            async with semaphore:
+                results.append(
+                    await execute(
+                        test_case, snapshot=snapshot, completed_steps=completed_steps
+                    )
+                )
+
+        async def run_node(node, snapshot, completed_steps):
+            tasks = [run_case(tc, snapshot, completed_steps) for tc in node.test_cases]
+            for child in node.children:
+                shared = child.all_test_cases()
+                if len(shared) < 2 or self.usage.budget_exceeded:
+                    tasks.extend(
+                        run_case(tc, snapshot, completed_steps) for tc in shared
+                    )
+                    continue
+                tasks.append(run_child(child, snapshot, completed_steps))
+            await asyncio.gather(*tasks)
+
+        async def run_child(child, snapshot, completed_steps):
+            async with semaphore:
+                child_snapshot = await self.run_prefix(child, snapshot)
+            if child_snapshot is None:
+                # Fall back to running the cases from the last good state
+                await asyncio.gather(
+                    *(
+                        run_case(tc, snapshot, completed_steps)
+                        for tc in child.all_test_cases()
+                    )
+                )
+                return
+            if snapshot is None:
+                self._remember_session(child, child_snapshot)
+            await run_node(child, child_snapshot, child.end)
+
+        await asyncio.gather(
+            *(
+                run_node(build_prefix_tree(flow_cases, offsets), session, 0)
+                for session, flow_cases in sessions
+            ),
+            run_node(build_prefix_tree(anonymous), None, 0),
+        )
+        results.sort(key=test_cases.index)
+        return results
 
     async def execute_all_tests(self):
         """Execute all test cases in the test plan."""
-        # Start timing for execution phase
-        self.timing["execution"]["start"] = datetime.now().isoformat()
-        start_time = time.time()
 
-        for test_case in self.test_plan.test_cases:
-            updated_test_case = await self.execute_test_case(test_case)
-            self.results.append(updated_test_case)
+        async def execute(test_case, **fork):
+            if self.usage.budget_exceeded:
+                return self.skip_test_case(test_case, "Skipped: token budget exceeded")
+            return await self.execute_test_case(test_case, **fork)
 
-        # End timing for execution phase
-        self.timing["execution"]["end"] = datetime.now().isoformat()
-        self.timing["execution"]["duration"] = round(time.time() - start_time, 2)
+        with self.tracer.span("execution", share_prefixes=self.share_prefixes):
+            if self.share_prefixes:
+                self.results.extend(
+                    await self.execute_shared_prefixes(
+                        self.test_plan.test_cases, execute
+                    )
+                )
+            else:
+                for test_case in self.test_plan.test_cases:
+                    self.results.append(await execute(test_case))
 
         return self.results
 
     def generate_report(self):
         """Generate a summary report of all test results."""
-        # End timing for total execution
-        self.timing["total"]["end"] = datetime.now().isoformat()
-        self.timing["total"]["duration"] = round(
-            sum(
-                [
-                    self.timing["planning"]["duration"] or 0,
-                    self.timing["execution"]["duration"] or 0,
-                ]
-            ),
-            2,
-        )
+        timing = self.timing
 
         total_tests = len(self.results)
         passed = sum(1 for tc in self.results if tc.status == "PASS")
         failed = sum(1 for tc in self.results if tc.status == "FAIL")
         errors = sum(1 for tc in self.results if tc.status == "ERROR")
+        timeouts = sum(1 for tc in self.results if tc.status == "TIMEOUT")
+        skipped = sum(1 for tc in self.results if tc.status == "SKIPPED")
+        usage = self.usage.summary()
+        decided_by: Dict[str, int] = {}
+        for tc in self.results:
+            if tc.model_tier:
+                decided_by[tc.model_tier] = decided_by.get(tc.model_tier, 0) + 1
 
         report = {
             "summary": {
@@ -367,17 +1176,63 @@ IMPORTANT: You must output ONLY the JSON result in the exact format shown above.
                 "passed": passed,
                 "failed": failed,
                 "errors": errors,
+                "timeouts": timeouts,
+                "skipped": skipped,
                 "pass_rate": (
                     f"{(passed/total_tests)*100:.2f}%" if total_tests > 0 else "0%"
                 ),
                 "timing": {
-                    "planning_seconds": self.timing["planning"]["duration"],
-                    "execution_seconds": self.timing["execution"]["duration"],
-                    "total_seconds": self.timing["total"]["duration"],
+                    "planning_seconds": timing["planning"]["duration"],
+                    "execution_seconds": timing["execution"]["duration"],
+                    "total_seconds": timing["total"]["duration"],
+                    "decision_cache_hit_rate": timing["decision_cache"]["total"][
+                        "hit_rate"
+                    ],
+                },
+                "tokens": {
+                    "llm_calls": usage["total"]["calls"],
+                    "input_tokens": usage["total"]["input_tokens"],
+                    "output_tokens": usage["total"]["output_tokens"],
+                    "total_tokens": usage["total"]["total_tokens"],
+                    "cost_usd": usage["total"]["cost_usd"],
+                    "budget_exceeded": usage["budget_exceeded"],
+                },
+                "routing": {
+                    "planning_tier": next(
+                        (
+                            span.attributes.get("tier")
+                            for span in self.tracer.spans("plan")
+                        ),
+                        None,
+                    ),
+                    "decided_by": decided_by,
+                    "escalated": sum(
+                        1
+                        for span in self.tracer.spans("test_case")
+                        if span.attributes.get("escalations")
+                    ),
+                },
+                "replayed": sum(
+                    1
+                    for span in self.tracer.spans("replay")
+                    if span.attributes.get("passed")
+                ),
+                "duration_model": (
+                    self.duration_model.stats()
+                    if self.duration_model is not None
+                    else None
+                ),
+                "dedup": {
+                    "pruned": len(self.test_plan.pruned),
+                    "estimated_browser_minutes_saved": round(
+                        self.estimated_seconds_saved() / 60, 2
+                    ),
                 },
             },
             "test_results": [tc.to_dict() for tc in self.results],
-            "timing": self.timing,
+            "pruned_test_cases": self.test_plan.pruned,
+            "timing": timing,
+            "usage": usage,
         }
 
         return json.dumps(report, indent=2)
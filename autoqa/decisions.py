@@ -0,0 +1,258 @@
+"""Cache of agent LLM decisions keyed by page state and task."""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from cryptography.fernet import Fernet, InvalidToken
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import (
+    ChatGeneration,
+    ChatGenerationChunk,
+    Generation,
+    GenerationChunk,
+)
+
+from autoqa.sessions import encryption_key
+from autoqa.usage import current_scope
+
+# The only classes a cached entry may deserialize into
+ALLOWED_OBJECTS = [
+    Generation,
+    GenerationChunk,
+    ChatGeneration,
+    ChatGenerationChunk,
+    AIMessage,
+    AIMessageChunk,
+]
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_DISK_ENTRIES = 20000
+DEFAULT_DISK_TTL_SECONDS = 7 * 24 * 3600
+# Writes between two scans of the disk tier for entries to prune
+PRUNE_EVERY = 100
+
+_TASK = re.compile(r'ultimate task is: """([\s\S]*?)"""')
+_STATE_MARKER = "[Current state starts here]"
+# Parts of the browser-use state message that change on every step or minute
+_VOLATILE = re.compile(r"Current step: \d+/\d+|Current date and time: [\d\- :]+")
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("kwargs", {}).get("content", "")
+    if isinstance(content, list):
+        return "\n".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return str(content)
+
+
+def decision_key(prompt: str, llm_string: str) -> Optional[str]:
+    """
+    Hash of the model settings, the agent's task and the pruned page state
+    (URL, tabs, interactive elements and last action results) of a
+    browser-use step prompt. Returns None for prompts that are not agent steps.
+    """
+    try:
+        messages = json.loads(prompt)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(messages, list):
+        return None
+
+    texts = [_message_text(m) for m in messages if isinstance(m, dict)]
+    tasks = [match.group(1) for text in texts for match in _TASK.finditer(text)]
+    states = [text for text in texts if _STATE_MARKER in text]
+    if not tasks or not states:
+        return None
+
+    state = _VOLATILE.sub("", states[-1].split(_STATE_MARKER, 1)[1])
+    state = re.sub(r"\s+", " ", state).strip()
+    content = json.dumps([llm_string, tasks[-1].strip(), state])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _load(item: str) -> Generation:
+    """Deserialize a cached generation, refusing any other class."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", LangChainBetaWarning)
+        return loads(item, allowed_objects=ALLOWED_OBJECTS)
+
+
+def _without_usage(generations: Sequence[Generation]) -> List[Generation]:
+    """Copies of cached generations that do not report token usage again."""
+    copies = []
+    for generation in generations:
+        generation = generation.model_copy(deep=True)
+        message = getattr(generation, "message", None)
+        if message is not None and getattr(message, "usage_metadata", None):
+            message.usage_metadata = None
+        copies.append(generation)
+    return copies
+
+
+class DecisionCache(BaseCache):
+    """
+    LangChain cache for browser agent steps: an in-memory LRU in front of an
+    optional on-disk tier. Prompts that are not agent steps are never cached.
+
+    Disk entries hold the agent's actions, typed passwords included, so they
+    are Fernet-encrypted like cached sessions; pass the session cache's key to
+    share it, otherwise ``encryption_key`` picks one for ``directory``. They
+    expire ``disk_ttl_seconds`` after they were last used, and the least
+    recently used ones are removed once there are more than
+    ``max_disk_entries``; both are enforced every ``PRUNE_EVERY`` writes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = "data/decisions",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        disk_ttl_seconds: int = DEFAULT_DISK_TTL_SECONDS,
+        key: Optional[bytes] = None,
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self._entries: "OrderedDict[str, List[Generation]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._fernet: Optional[Fernet] = None
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            self._fernet = Fernet(key or encryption_key(directory))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.decision")
+
+    def _remember(self, key: str, generations: List[Generation]):
+        with self._lock:
+            self._entries[key] = generations
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def prune(self):
+        """Remove expired disk entries, then the least recently used overflow."""
+        if not self.directory:
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".json"):
+                    # Plaintext entry written before the disk tier was encrypted
+                    os.remove(entry.path)
+                elif entry.name.endswith(".decision"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        cutoff = time.time() - self.disk_ttl_seconds
+        expired = sum(1 for mtime, _ in entries if mtime < cutoff)
+        overflow = len(entries) - self.max_disk_entries
+        for _, path in entries[: max(expired, overflow)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+        scope = current_scope()
+        if scope is not None:
+            tracker, name = scope
+            tracker.record_cache(name, outcome)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        key = decision_key(prompt, llm_string)
+        if key is None:
+            return None
+
+        with self._lock:
+            generations = self._entries.get(key)
+            if generations is not None:
+                self._entries.move_to_end(key)
+        if generations is not None:
+            self._count("memory_hits")
+            return _without_usage(generations)
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                if os.path.getmtime(path) < time.time() - self.disk_ttl_seconds:
+                    generations = None
+                else:
+                    with open(path, "rb") as f:
+                        items = json.loads(self._fernet.decrypt(f.read()))
+                    generations = [_load(item) for item in items]
+                    # The modification time doubles as the last use for prune
+                    os.utime(path)
+            except (FileNotFoundError, InvalidToken, ValueError):
+                # Missing, written with another key, corrupted or not a generation
+                generations = None
+            if generations:
+                self._remember(key, generations)
+                self._count("disk_hits")
+                return _without_usage(generations)
+
+        self._count("misses")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        key = decision_key(prompt, llm_string)
+        if key is None:
+            return
+        generations = list(return_val)
+        self._remember(key, generations)
+        if self.directory:
+            path = self._path(key)
+            items = json.dumps([dumps(generation) for generation in generations])
+            token = self._fernet.encrypt(items.encode())
+            fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(f"{path}.tmp", path)
+            with self._lock:
+                self._writes += 1
+                due = self._writes % PRUNE_EVERY == 1
+            if due:
+                self.prune()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ):
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any):
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith((".decision", ".json")):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def attach_decision_cache(llm: Any, cache: DecisionCache):
+    """Make ``llm`` consult ``cache`` before calling the model."""
+    try:
+        llm.cache = cache
+    except (AttributeError, ValueError):
+        # Models without LangChain caching support simply always call the model
+        pass
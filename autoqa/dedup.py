@@ -0,0 +1,134 @@
+"""Near-duplicate detection for generated test cases."""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from autoqa.models import TestCase
+
+DEFAULT_THRESHOLD = 0.9
+NGRAM_SIZE = 3
+
+# Words that turn a flow into its negative variant ("log in with an invalid
+# password"); a case using one is never merged with a case that does not
+NEGATIVE_WORDS = frozenset(
+    {
+        "invalid",
+        "incorrect",
+        "wrong",
+        "empty",
+        "blank",
+        "missing",
+        "without",
+        "not",
+        "no",
+        "fail",
+        "fails",
+        "error",
+        "unauthorized",
+        "expired",
+        "denied",
+        "rejected",
+    }
+)
+
+Vector = Dict[str, float]
+
+
+def _normalise(parts: Sequence[object]) -> str:
+    return re.sub(r"\s+", " ", " ".join(str(part) for part in parts)).strip().lower()
+
+
+def _steps_text(test_case: TestCase) -> str:
+    """What a test case does; the description only restates it."""
+    return _normalise(test_case.steps)
+
+
+def _expected_text(test_case: TestCase) -> str:
+    """What a test case checks."""
+    return _normalise([test_case.expected_result])
+
+
+def _polarity(test_case: TestCase) -> frozenset:
+    """The negative words used by a test case's steps and expected result."""
+    words = re.findall(r"\w+", f"{_steps_text(test_case)} {_expected_text(test_case)}")
+    return NEGATIVE_WORDS.intersection(words)
+
+
+def _char_ngrams(text: str, n: int = NGRAM_SIZE) -> Counter:
+    """Count character n-grams of every word, padded so short words still count."""
+    grams: Counter = Counter()
+    for word in re.findall(r"\w+", text):
+        padded = f" {word} "
+        for i in range(max(len(padded) - n + 1, 1)):
+            grams[padded[i : i + n]] += 1
+    return grams
+
+
+def tfidf_vectors(texts: Sequence[str], n: int = NGRAM_SIZE) -> List[Vector]:
+    """Return L2-normalised sparse TF-IDF vectors of character n-grams."""
+    counts = [_char_ngrams(text, n) for text in texts]
+    document_frequency: Counter = Counter()
+    for grams in counts:
+        document_frequency.update(grams.keys())
+
+    total = len(texts)
+    vectors = []
+    for grams in counts:
+        vector = {
+            gram: (1 + math.log(count))
+            * (math.log((1 + total) / (1 + document_frequency[gram])) + 1)
+            for gram, count in grams.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({gram: weight / norm for gram, weight in vector.items()})
+    return vectors
+
+
+def cosine_similarity(a: Vector, b: Vector) -> float:
+    """Cosine similarity of two normalised sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(gram, 0.0) for gram, weight in a.items())
+
+
+def find_duplicates(
+    test_cases: Sequence[TestCase], threshold: float = DEFAULT_THRESHOLD
+) -> Tuple[List[TestCase], List[Dict[str, object]]]:
+    """
+    Cluster test cases whose steps and expected results are both at least
+    ``threshold`` similar.
+
+    Cases that differ in their negative words (a valid and an invalid login,
+    say) are never clustered. The first case of every cluster (in plan order)
+    is kept; the others are returned as pruned entries naming the case they
+    duplicate.
+    """
+    steps = tfidf_vectors([_steps_text(tc) for tc in test_cases])
+    expected = tfidf_vectors([_expected_text(tc) for tc in test_cases])
+    polarity = [_polarity(tc) for tc in test_cases]
+    kept: List[int] = []
+    pruned: List[Dict[str, object]] = []
+    for i, test_case in enumerate(test_cases):
+        best, best_similarity = None, 0.0
+        for j in kept:
+            if polarity[i] != polarity[j]:
+                continue
+            similarity = min(
+                cosine_similarity(steps[i], steps[j]),
+                cosine_similarity(expected[i], expected[j]),
+            )
+            if similarity > best_similarity:
+                best, best_similarity = j, similarity
+        if best is not None and best_similarity >= threshold:
+            pruned.append(
+                {
+                    **test_case.to_dict(),
+                    "duplicate_of": test_cases[best].id,
+                    "similarity": round(best_similarity, 3),
+                }
+            )
+        else:
+            kept.append(i)
+    return [test_cases[i] for i in kept], pruned
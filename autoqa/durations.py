@@ -0,0 +1,125 @@
+"""Predict test case durations from earlier runs to schedule long cases first."""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from autoqa.models import TestCase
+from autoqa.prefix import normalize_step
+from autoqa.sessions import site_key
+
+DEFAULT_SECONDS = 120.0
+# Weight of the newest observation in the running averages
+SMOOTHING = 0.3
+
+
+def _average(previous: Optional[float], value: float) -> float:
+    if previous is None:
+        return value
+    return SMOOTHING * value + (1 - SMOOTHING) * previous
+
+
+class DurationModel:
+    """
+    Running averages of case durations keyed by site, normalised description
+    and step count, with per-step averages for the site and overall as
+    fallbacks for cases that have not run before. With a ``path`` the
+    observations are kept on disk between runs.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, default_seconds: float = DEFAULT_SECONDS
+    ):
+        self.path = path
+        self.default_seconds = default_seconds
+        self.cases: Dict[str, float] = {}
+        self.sites: Dict[str, float] = {}  # site -> seconds per step
+        self.per_step: Optional[float] = None
+        self.errors: List[float] = []  # predicted minus actual, recent runs
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(url: str, test_case: TestCase, completed_steps: int = 0) -> str:
+        return json.dumps(
+            [
+                site_key(url),
+                normalize_step(test_case.description),
+                len(test_case.steps) - completed_steps,
+            ]
+        )
+
+    def predict(self, url: str, test_case: TestCase, completed_steps: int = 0) -> float:
+        """
+        Expected seconds for a test case when its first ``completed_steps``
+        were already performed, falling back to per-step averages.
+        """
+        steps = max(len(test_case.steps) - completed_steps, 1)
+        with self._lock:
+            seconds = self.cases.get(self.key(url, test_case, completed_steps))
+            if seconds is not None:
+                return seconds
+            per_step = self.sites.get(site_key(url), self.per_step)
+        if per_step is None:
+            return self.default_seconds
+        return per_step * steps
+
+    def observe(
+        self,
+        url: str,
+        test_case: TestCase,
+        seconds: float,
+        predicted: Optional[float] = None,
+        completed_steps: int = 0,
+    ):
+        """Fold a measured duration into the averages, oldest observations first."""
+        steps = max(len(test_case.steps) - completed_steps, 1)
+        key = self.key(url, test_case, completed_steps)
+        site = site_key(url)
+        with self._lock:
+            self.cases[key] = _average(self.cases.get(key), seconds)
+            self.sites[site] = _average(self.sites.get(site), seconds / steps)
+            self.per_step = _average(self.per_step, seconds / steps)
+            if predicted is not None:
+                self.errors = (self.errors + [predicted - seconds])[-100:]
+        if self.path:
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """How far recent predictions were from the measured durations."""
+        with self._lock:
+            errors = list(self.errors)
+        if not errors:
+            return {"predictions": 0, "mean_absolute_error_seconds": None}
+        return {
+            "predictions": len(errors),
+            "mean_absolute_error_seconds": round(
+                sum(abs(error) for error in errors) / len(errors), 2
+            ),
+        }
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.cases = data.get("cases", {})
+        self.sites = data.get("sites", {})
+        self.per_step = data.get("per_step")
+        self.errors = data.get("errors", [])
+
+    def _save(self):
+        with self._lock:
+            data = {
+                "cases": self.cases,
+                "sites": self.sites,
+                "per_step": self.per_step,
+                "errors": self.errors,
+            }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{self.path}.tmp", self.path)
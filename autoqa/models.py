@@ -15,8 +15,17 @@ class TestCase:
         self.steps = steps
         self.expected_result = expected_result
         self.actual_result: Optional[str] = None
-        self.status: Optional[str] = None  # "PASS", "FAIL", or "ERROR"
+        # "PASS", "FAIL", "ERROR", "TIMEOUT" or "SKIPPED"
+        self.status: Optional[str] = None
         self.notes: Optional[str] = None
+        # Agent's self-reported certainty, 0-1
+        self.confidence: Optional[float] = None
+        # Model (or "replay") that decided the status
+        self.model_tier: Optional[str] = None
+        self.duration_seconds: Optional[float] = None
+        self.predicted_seconds: Optional[float] = None
+        # Leading steps a shared prefix or cached session performed beforehand
+        self.forked_steps: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert the test case to a dictionary."""
@@ -28,6 +37,8 @@ class TestCase:
             "actual_result": self.actual_result,
             "status": self.status,
             "notes": self.notes,
+            "confidence": self.confidence,
+            "model_tier": self.model_tier,
         }
 
 
@@ -38,6 +49,8 @@ class TestPlan:
         self.url = url
         self.scenario = scenario
         self.test_cases = test_cases or []
+        # Near-duplicates removed before execution
+        self.pruned: List[Dict[str, Any]] = []
 
     def add_test_case(self, test_case: TestCase):
         """Add a test case to the test plan."""
@@ -49,8 +62,41 @@ class TestPlan:
             "url": self.url,
             "scenario": self.scenario,
             "test_cases": [tc.to_dict() for tc in self.test_cases],
+            "pruned": self.pruned,
         }
 
     def to_json(self) -> str:
         """Convert the test plan to a JSON string."""
         return json.dumps(self.to_dict(), indent=2)
+
+
+class ExecutionLimits:
+    """Step and wall-clock budgets for the planning and execution agents."""
+
+    def __init__(
+        self,
+        max_steps: int = 50,
+        timeout_seconds: float = 600,
+        planning_max_steps: int = 100,
+        planning_timeout_seconds: float = 900,
+    ):
+        self.max_steps = max_steps
+        self.timeout_seconds = timeout_seconds
+        self.planning_max_steps = planning_max_steps
+        self.planning_timeout_seconds = planning_timeout_seconds
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ExecutionLimits":
+        """Create limits from a dictionary, ignoring unset (None) values."""
+        return cls(
+            **{key: value for key, value in (data or {}).items() if value is not None}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the limits to a dictionary."""
+        return {
+            "max_steps": self.max_steps,
+            "timeout_seconds": self.timeout_seconds,
+            "planning_max_steps": self.planning_max_steps,
+            "planning_timeout_seconds": self.planning_timeout_seconds,
+        }
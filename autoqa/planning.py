@@ -0,0 +1,65 @@
+"""Split planning into sub-areas explored by concurrent agents."""
+
+import os
+from typing import List, Optional
+
+from autoqa.models import TestCase
+from autoqa.prefix import normalize_step
+
+# Fewest steps a sub-area agent gets, however many areas share the budget
+MIN_AREA_STEPS = 15
+
+
+class PlanningArea:
+    """A slice of the scenario explored by its own planning agent."""
+
+    def __init__(self, name: str, focus: str):
+        self.name = name
+        self.focus = focus
+
+
+DEFAULT_AREAS = [
+    PlanningArea(
+        "happy_path",
+        "Normal usage: the main user flows completing successfully with valid input.",
+    ),
+    PlanningArea(
+        "validation",
+        "Validation and error handling: invalid, missing or malformed input and how the site reports it.",
+    ),
+    PlanningArea(
+        "edge_cases",
+        "Edge cases: boundary values, unusual but valid input, repeated or interrupted actions.",
+    ),
+]
+
+
+def areas_from_env() -> Optional[List[PlanningArea]]:
+    """Default areas if ``AUTOQA_PARALLEL_PLANNING`` turns parallel planning on."""
+    if os.getenv("AUTOQA_PARALLEL_PLANNING", "").lower() in ("1", "true", "yes"):
+        return DEFAULT_AREAS
+    return None
+
+
+def merge_test_cases(partials: List[List[TestCase]]) -> List[TestCase]:
+    """
+    Combine the test cases of several partial plans, dropping cases whose
+    description and steps repeat an earlier one and renumbering the rest
+    ``TC001``, ``TC002``, ... so ids stay unique across areas.
+    """
+    merged: List[TestCase] = []
+    seen = set()
+    for test_cases in partials:
+        for test_case in test_cases:
+            key = (
+                normalize_step(test_case.description),
+                tuple(normalize_step(step) for step in test_case.steps),
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(test_case)
+
+    for number, test_case in enumerate(merged, 1):
+        test_case.id = f"TC{number:03d}"
+    return merged
@@ -0,0 +1,89 @@
+"""Prefix tree over test case steps, used to run shared setup steps once."""
+
+import re
+from typing import Dict, List, Optional
+
+from autoqa.models import TestCase
+
+
+def normalize_step(step: str) -> str:
+    """Normalise a step so trivially different wordings compare equal."""
+    step = re.sub(r"^\s*(step\s*)?\d+[.):]\s*", "", str(step), flags=re.IGNORECASE)
+    step = re.sub(r"\s+", " ", step).strip().lower()
+    return step.rstrip(".!;:")
+
+
+class PrefixNode:
+    """A run of steps shared by every test case below the node."""
+
+    def __init__(self, steps: Optional[List[str]] = None, depth: int = 0):
+        self.steps = steps or []  # Steps of this segment, as written in the first case
+        self.depth = depth  # Number of steps before this segment
+        self.children: List["PrefixNode"] = []
+        self.test_cases: List[TestCase] = []  # Cases whose steps end with this segment
+
+    @property
+    def end(self) -> int:
+        """Number of steps completed once this segment has run."""
+        return self.depth + len(self.steps)
+
+    def all_test_cases(self) -> List[TestCase]:
+        """Every test case at or below this node."""
+        cases = list(self.test_cases)
+        for child in self.children:
+            cases.extend(child.all_test_cases())
+        return cases
+
+    def to_dict(self) -> Dict[str, object]:
+        """Convert the tree to a dictionary for logging and traces."""
+        return {
+            "steps": self.steps,
+            "test_cases": [tc.id for tc in self.test_cases],
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class _TrieNode:
+    def __init__(self, step: Optional[str] = None):
+        self.step = step
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.test_cases: List[TestCase] = []
+
+
+def build_prefix_tree(
+    test_cases: List[TestCase], offsets: Optional[Dict[str, int]] = None
+) -> PrefixNode:
+    """
+    Build a compressed prefix tree over the normalised steps of ``test_cases``.
+
+    Chains of steps with a single continuation are merged into one segment, so
+    every non-root node marks a point where cases diverge or end. ``offsets``
+    maps test case ids to a number of leading steps to leave out of the tree.
+    """
+    offsets = offsets or {}
+    trie = _TrieNode()
+    for test_case in test_cases:
+        node = trie
+        for step in test_case.steps[offsets.get(test_case.id, 0) :]:
+            key = normalize_step(step)
+            if key not in node.children:
+                node.children[key] = _TrieNode(step)
+            node = node.children[key]
+        node.test_cases.append(test_case)
+
+    def compress(trie_node: _TrieNode, depth: int) -> PrefixNode:
+        steps = [trie_node.step]
+        while len(trie_node.children) == 1 and not trie_node.test_cases:
+            trie_node = next(iter(trie_node.children.values()))
+            steps.append(trie_node.step)
+        node = PrefixNode(steps, depth)
+        node.test_cases = trie_node.test_cases
+        node.children = [
+            compress(child, node.end) for child in trie_node.children.values()
+        ]
+        return node
+
+    root = PrefixNode()
+    root.test_cases = trie.test_cases
+    root.children = [compress(child, 0) for child in trie.children.values()]
+    return root
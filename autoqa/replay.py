@@ -0,0 +1,352 @@
+"""Compile passing agent runs into selector-based scripts and replay them."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from autoqa.models import TestCase
+from autoqa.prefix import normalize_step
+from autoqa.sessions import encryption_key, site_key
+
+SCRIPT_VERSION = 2
+RESOLVE_TIMEOUT_MS = 5000
+# Final page text shown to the model judging a replay with no expected texts
+VERDICT_PAGE_TEXT_CHARS = 8000
+
+# Quoted text in an expected result ("a 'Thanks for subscribing' message"),
+# not apostrophes inside words
+_QUOTED = re.compile(r"(?<!\w)[\"'“‘]([^\"'”’\n]{3,80})[\"'”’](?!\w)")
+
+# browser-use actions that only read the page and can be left out of a replay
+_READ_ONLY_ACTIONS = {"done", "extract_content", "get_dropdown_options", "wait"}
+
+
+class ReplayStepFailed(Exception):
+    """Raised when a replayed action cannot be resolved on the current page."""
+
+
+class ReplayAction:
+    """One browser action with the selectors of the element it targets."""
+
+    def __init__(
+        self,
+        kind: str,
+        selectors: Optional[List[str]] = None,
+        value: Optional[Any] = None,
+        description: str = "",
+    ):
+        self.kind = kind
+        self.selectors = selectors or []
+        self.value = value
+        self.description = description
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "selectors": self.selectors,
+            "value": self.value,
+            "description": self.description,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReplayAction":
+        return cls(
+            data["kind"],
+            data.get("selectors"),
+            data.get("value"),
+            data.get("description", ""),
+        )
+
+
+class ReplayScript:
+    """Actions of a passing test case run plus the page it ended on."""
+
+    def __init__(
+        self,
+        test_id: str,
+        completed_steps: int,
+        actions: List[ReplayAction],
+        final_url: Optional[str],
+        final_title: Optional[str] = None,
+        created_at: Optional[float] = None,
+        expected_texts: Optional[List[str]] = None,
+    ):
+        self.test_id = test_id
+        self.completed_steps = completed_steps  # Steps done before the script starts
+        self.actions = actions
+        self.final_url = final_url
+        self.final_title = final_title
+        self.created_at = created_at or time.time()
+        # Text the final page must show for the expected result to hold
+        self.expected_texts = expected_texts or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": SCRIPT_VERSION,
+            "test_id": self.test_id,
+            "completed_steps": self.completed_steps,
+            "actions": [action.to_dict() for action in self.actions],
+            "final_url": self.final_url,
+            "final_title": self.final_title,
+            "created_at": self.created_at,
+            "expected_texts": self.expected_texts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReplayScript":
+        return cls(
+            data["test_id"],
+            data.get("completed_steps", 0),
+            [ReplayAction.from_dict(action) for action in data.get("actions", [])],
+            data.get("final_url"),
+            data.get("final_title"),
+            data.get("created_at"),
+            data.get("expected_texts"),
+        )
+
+
+def _selectors(element: Any) -> List[str]:
+    """Playwright selectors for an interacted element, most specific first."""
+    if element is None:
+        return []
+    selectors = []
+    if getattr(element, "css_selector", None):
+        selectors.append(element.css_selector)
+    if getattr(element, "xpath", None):
+        selectors.append(f"xpath=//{element.xpath}")
+    return selectors
+
+
+def expected_texts(test_case: TestCase, typed: Iterable[Any] = ()) -> List[str]:
+    """
+    Quoted text in a test case's expected result, which the final page has to
+    show. Values the script types into fields are left out: input values are
+    not part of the page text.
+    """
+    typed_values = {str(value).strip().lower() for value in typed}
+    texts = []
+    for match in _QUOTED.finditer(test_case.expected_result or ""):
+        text = match.group(1).strip()
+        if text and text.lower() not in typed_values and text not in texts:
+            texts.append(text)
+    return texts
+
+
+def compile_history(test_case: TestCase, history: Any, completed_steps: int = 0):
+    """
+    Turn a browser-use ``AgentHistoryList`` into a ``ReplayScript``.
+
+    Quoted text in the expected result is recorded as the page text a replay
+    has to end on (see ``expected_texts``). Returns None when the run used an action that cannot be replayed without
+    the agent (tabs, uploads, drag and drop) or clicked an element it did not
+    record selectors for.
+    """
+    actions: List[ReplayAction] = []
+    final_url = final_title = None
+    for item in history.history:
+        state = getattr(item, "state", None)
+        if state is not None:
+            final_url = state.url
+            final_title = getattr(state, "title", None)
+        if item.model_output is None:
+            continue
+        goal = getattr(item.model_output.current_state, "next_goal", "")
+        elements = getattr(state, "interacted_element", None) or []
+        for i, action in enumerate(item.model_output.action):
+            dumped = action.model_dump(exclude_none=True)
+            if not dumped:
+                continue
+            name, params = next(iter(dumped.items()))
+            params = params or {}
+            element = elements[i] if i < len(elements) else None
+
+            if name in _READ_ONLY_ACTIONS:
+                continue
+            if name == "go_to_url":
+                actions.append(
+                    ReplayAction("navigate", value=params["url"], description=goal)
+                )
+            elif name == "search_google":
+                url = f"https://www.google.com/search?q={params['query']}&udm=14"
+                actions.append(ReplayAction("navigate", value=url, description=goal))
+            elif name == "go_back":
+                actions.append(ReplayAction("go_back", description=goal))
+            elif name in ("scroll_down", "scroll_up"):
+                amount = params.get("amount")
+                sign = -1 if name == "scroll_up" else 1
+                actions.append(
+                    ReplayAction(
+                        "scroll",
+                        value=sign * amount if amount is not None else sign,
+                        description=goal,
+                    )
+                )
+            elif name == "send_keys":
+                actions.append(
+                    ReplayAction("keys", value=params["keys"], description=goal)
+                )
+            elif name in ("click_element_by_index", "click_element"):
+                if not _selectors(element):
+                    return None
+                actions.append(
+                    ReplayAction("click", _selectors(element), description=goal)
+                )
+            elif name == "input_text":
+                if not _selectors(element):
+                    return None
+                actions.append(
+                    ReplayAction("fill", _selectors(element), params["text"], goal)
+                )
+            elif name == "select_dropdown_option":
+                if not _selectors(element):
+                    return None
+                actions.append(
+                    ReplayAction("select", _selectors(element), params["text"], goal)
+                )
+            else:
+                return None
+
+    if not actions:
+        return None
+    typed = [action.value for action in actions if action.kind in ("fill", "select")]
+    return ReplayScript(
+        test_case.id,
+        completed_steps,
+        actions,
+        final_url,
+        final_title,
+        expected_texts=expected_texts(test_case, typed),
+    )
+
+
+async def _resolve(page: Any, action: ReplayAction):
+    for selector in action.selectors:
+        locator = page.locator(selector).first
+        try:
+            await locator.wait_for(state="visible", timeout=RESOLVE_TIMEOUT_MS)
+            return locator
+        except Exception:
+            continue
+    raise ReplayStepFailed(
+        f"Could not resolve element for '{action.description or action.kind}'"
+    )
+
+
+async def run_script(page: Any, script: ReplayScript) -> str:
+    """
+    Execute a script on a Playwright page and verify it ends where the
+    recorded run did, showing the script's expected texts. Returns the text of
+    the final page. Raises ``ReplayStepFailed`` on the first action that
+    cannot be performed or if the final page differs.
+    """
+    for index, action in enumerate(script.actions):
+        try:
+            if action.kind == "navigate":
+                await page.goto(action.value)
+            elif action.kind == "go_back":
+                await page.go_back()
+            elif action.kind == "scroll":
+                if abs(action.value) == 1:
+                    await page.evaluate(
+                        f"window.scrollBy(0, {action.value} * window.innerHeight);"
+                    )
+                else:
+                    await page.evaluate(f"window.scrollBy(0, {action.value});")
+            elif action.kind == "keys":
+                await page.keyboard.press(action.value)
+            elif action.kind == "click":
+                await (await _resolve(page, action)).click()
+            elif action.kind == "fill":
+                await (await _resolve(page, action)).fill(action.value)
+            elif action.kind == "select":
+                await (await _resolve(page, action)).select_option(label=action.value)
+            await page.wait_for_load_state()
+        except ReplayStepFailed as e:
+            raise ReplayStepFailed(f"Action {index + 1}: {e}") from None
+        except Exception as e:
+            raise ReplayStepFailed(
+                f"Action {index + 1} ({action.kind}) failed: {e}"
+            ) from None
+
+    if script.final_url and urlparse(page.url).path != urlparse(script.final_url).path:
+        raise ReplayStepFailed(f"Ended on {page.url} instead of {script.final_url}")
+    if script.final_title and await page.title() != script.final_title:
+        raise ReplayStepFailed(
+            f"Ended on a page titled '{await page.title()}' instead of '{script.final_title}'"
+        )
+    text = await page.inner_text("body")
+    missing = [t for t in script.expected_texts if t.lower() not in text.lower()]
+    if missing:
+        raise ReplayStepFailed(
+            "Expected result not shown: " + ", ".join(f"'{t}'" for t in missing)
+        )
+    return text
+
+
+class ReplayStore:
+    """
+    Compiled scripts on disk, keyed by site and test case content.
+
+    Scripts hold the values typed into fields, passwords included, so they are
+    Fernet-encrypted like cached sessions; pass the session cache's key to
+    share it, otherwise ``encryption_key`` picks one for ``directory``.
+    """
+
+    def __init__(self, directory: str = "data/replays", key: Optional[bytes] = None):
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._fernet = Fernet(key or encryption_key(directory))
+
+    @staticmethod
+    def fingerprint(url: str, test_case: TestCase, completed_steps: int = 0) -> str:
+        """Stable key for a test case: same site, steps and expectation."""
+        content = json.dumps(
+            [
+                site_key(url),
+                normalize_step(test_case.description),
+                [normalize_step(step) for step in test_case.steps],
+                normalize_step(test_case.expected_result),
+                completed_steps,
+            ]
+        )
+        return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, f"{fingerprint}.replay")
+
+    def load(self, fingerprint: str) -> Optional[ReplayScript]:
+        """Return the script stored under a fingerprint, if any."""
+        try:
+            with open(self._path(fingerprint), "rb") as f:
+                data = json.loads(self._fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError):
+            # Written with another key or corrupted
+            self.invalidate(fingerprint)
+            return None
+        if data.get("version") != SCRIPT_VERSION:
+            return None
+        return ReplayScript.from_dict(data)
+
+    def save(self, fingerprint: str, script: ReplayScript):
+        """Encrypt and store a script, replacing any previous one."""
+        token = self._fernet.encrypt(json.dumps(script.to_dict()).encode())
+        path = self._path(fingerprint)
+        fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(f"{path}.tmp", path)
+
+    def invalidate(self, fingerprint: str):
+        """Forget the script stored under a fingerprint."""
+        try:
+            os.remove(self._path(fingerprint))
+        except FileNotFoundError:
+            pass
@@ -29,6 +29,9 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
     passed = summary.get('passed', 0)
     failed = summary.get('failed', 0)
     errors = summary.get('errors', 0)
+    timeouts = summary.get('timeouts', 0)
+    skipped = summary.get('skipped', 0)
+    all_passed = failed == 0 and errors == 0 and timeouts == 0
     pass_rate = summary.get('pass_rate', '0%')
     
     # Extract timing data
@@ -36,11 +39,16 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
     planning_time = timing.get('planning_seconds', 0)
     execution_time = timing.get('execution_seconds', 0)
     total_time = timing.get('total_seconds', 0)
+    cache_hit_rate = timing.get('decision_cache_hit_rate')
     
     # Get detailed test timing
     detailed_timing = results.get('timing', {})
     test_timing = detailed_timing.get('execution', {}).get('tests', {})
     
+    # Extract token usage (absent in reports produced before usage tracking)
+    tokens = summary.get('tokens')
+    test_usage = results.get('usage', {}).get('test_cases', {})
+    
     # Create the markdown report
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -49,7 +57,7 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
 
 ## Summary
 
-{'✅' if failed == 0 and errors == 0 else '❌'} **Overall Result: {'PASS' if failed == 0 and errors == 0 else 'FAIL'}**
+{'✅' if all_passed else '❌'} **Overall Result: {'PASS' if all_passed else 'FAIL'}**
 
 - **Website**: {url}
 - **Scenario**: {scenario}
@@ -58,6 +66,8 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
 - **Passed**: {passed}
 - **Failed**: {failed}
 - **Errors**: {errors}
+- **Timeouts**: {timeouts}
+- **Skipped**: {skipped}
 - **Pass Rate**: {pass_rate}
 
 ## Timing
@@ -65,11 +75,56 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
 - **Planning Phase**: {planning_time} seconds
 - **Execution Phase**: {execution_time} seconds
 - **Total Time**: {total_time} seconds
+"""
+    if cache_hit_rate is not None:
+        markdown += f"- **LLM Decision Cache Hit Rate**: {cache_hit_rate * 100:.1f}%\n"
+    
+    replayed = summary.get('replayed')
+    if replayed:
+        markdown += f"- **Replayed Without LLM**: {replayed}\n"
+    
+    # Which model tier decided each result
+    routing = summary.get('routing') or {}
+    if routing.get('decided_by'):
+        markdown += "\n## Model Routing\n\n"
+        if routing.get('planning_tier'):
+            markdown += f"- **Planning Model**: {routing['planning_tier']}\n"
+        for tier, count in routing['decided_by'].items():
+            markdown += f"- **Decided by {tier}**: {count}\n"
+        markdown += f"- **Escalated**: {routing.get('escalated', 0)}\n"
+    
+    if tokens:
+        markdown += f"""
+## Token Usage
+
+- **LLM Calls**: {tokens.get('llm_calls', 0)}
+- **Input Tokens**: {tokens.get('input_tokens', 0)}
+- **Output Tokens**: {tokens.get('output_tokens', 0)}
+- **Total Tokens**: {tokens.get('total_tokens', 0)}
+- **Estimated Cost**: ${tokens.get('cost_usd', 0):.4f}
+"""
+        if tokens.get('budget_exceeded'):
+            markdown += "- **Token Budget**: exceeded, remaining test cases were skipped\n"
+    
+    # Near-duplicate test cases removed before execution
+    dedup = summary.get('dedup') or {}
+    pruned_cases = results.get('pruned_test_cases', [])
+    if pruned_cases:
+        markdown += f"""
+## Pruned Duplicates
+
+- **Pruned Test Cases**: {dedup.get('pruned', len(pruned_cases))}
+- **Estimated Browser Time Saved**: {dedup.get('estimated_browser_minutes_saved', 0)} minutes
 
+"""
+        for pruned in pruned_cases:
+            markdown += f"- {pruned.get('id')}: {pruned.get('description')} (duplicate of {pruned.get('duplicate_of')}, similarity {pruned.get('similarity')})\n"
+    
+    markdown += """
 ## Test Cases
 
-| ID | Description | Status | Time | Notes |
-|---|---|:---:|:---:|---|
+| ID | Description | Status | Time | Tokens | Notes |
+|---|---|:---:|:---:|:---:|---|
 """
     
     # Add each test case to the markdown
@@ -86,8 +141,11 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
         test_time = test_timing.get(test_id, {}).get('duration', '-')
         test_time_str = f"{test_time} s" if test_time != '-' else '-'
         
+        # Get test token usage if available
+        test_tokens = test_usage.get(test_id, {}).get('total_tokens', '-')
+        
         # Add row to the table
-        markdown += f"| {test_id} | {description} | {status_emoji} {status} | {test_time_str} | {notes[:50]}{'...' if len(notes) > 50 else ''} |\n"
+        markdown += f"| {test_id} | {description} | {status_emoji} {status} | {test_time_str} | {test_tokens} | {notes[:50]}{'...' if len(notes) > 50 else ''} |\n"
     
     # Add detailed test results section
     markdown += "\n## Detailed Test Results\n\n"
@@ -107,11 +165,19 @@ def generate_markdown_report(results_file: str, output_file: Optional[str] = Non
         markdown += f"### {test_id}: {description}\n\n"
         markdown += f"**Status**: {status_emoji} {status}\n\n"
         
+        if test.get('model_tier'):
+            markdown += f"**Decided By**: {test['model_tier']}\n\n"
+        
         # Add test timing if available
         test_time = test_timing.get(test_id, {}).get('duration', '-')
         if test_time != '-':
             markdown += f"**Execution Time**: {test_time} seconds\n\n"
         
+        # Add test token usage if available
+        if test_id in test_usage:
+            usage = test_usage[test_id]
+            markdown += f"**LLM Usage**: {usage.get('calls', 0)} calls, {usage.get('total_tokens', 0)} tokens\n\n"
+        
         markdown += "**Steps**:\n"
         for i, step in enumerate(steps, 1):
             markdown += f"{i}. {step}\n"
@@ -0,0 +1,93 @@
+"""Tiered model routing: try a fast model first and escalate when unsure."""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+FAST_MODEL = "gemini-2.0-flash"
+STRONG_MODEL = "gemini-2.5-flash-preview-04-17"
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+_CONFIDENCE = re.compile(r'"confidence"\s*:\s*"?([0-9]*\.?[0-9]+)')
+
+
+def parse_confidence(result_str: Optional[str]) -> Optional[float]:
+    """Self-reported confidence (0-1) from an agent's JSON output, if present."""
+    match = _CONFIDENCE.search(result_str or "")
+    if not match:
+        return None
+    value = float(match.group(1))
+    # Accept percentages as well as fractions
+    return value / 100 if value > 1 else value
+
+
+def _models(value: Optional[str], default: List[str]) -> List[str]:
+    if not value:
+        return default
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+class RoutingPolicy:
+    """
+    Ordered model tiers per phase, cheapest first. A phase's result is
+    re-run on the next tier when it ends with one of ``escalate_on`` or
+    reports a confidence below ``min_confidence``.
+    """
+
+    def __init__(
+        self,
+        planning: Optional[List[str]] = None,
+        execution: Optional[List[str]] = None,
+        escalate_on: Iterable[str] = ("ERROR",),
+        min_confidence: Optional[float] = DEFAULT_MIN_CONFIDENCE,
+    ):
+        self.tiers: Dict[str, List[str]] = {
+            "planning": planning or [STRONG_MODEL],
+            "execution": execution or [FAST_MODEL, STRONG_MODEL],
+        }
+        self.escalate_on = set(escalate_on)
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def from_env(cls) -> Optional["RoutingPolicy"]:
+        """
+        Build a policy from ``AUTOQA_*`` environment variables, or None, so
+        every agent uses the default model, unless ``AUTOQA_MODEL_ROUTING``
+        turns routing on.
+        """
+        if os.getenv("AUTOQA_MODEL_ROUTING", "").lower() not in ("1", "true", "yes"):
+            return None
+        min_confidence = os.getenv("AUTOQA_MIN_CONFIDENCE")
+        return cls(
+            planning=_models(os.getenv("AUTOQA_PLANNING_MODELS"), [STRONG_MODEL]),
+            execution=_models(
+                os.getenv("AUTOQA_EXECUTION_MODELS"), [FAST_MODEL, STRONG_MODEL]
+            ),
+            escalate_on=_models(os.getenv("AUTOQA_ESCALATE_ON"), ["ERROR"]),
+            min_confidence=(
+                float(min_confidence) if min_confidence else DEFAULT_MIN_CONFIDENCE
+            ),
+        )
+
+    def models(self, phase: str) -> List[str]:
+        """Models to try for a phase, in order."""
+        return self.tiers[phase]
+
+    def should_escalate(
+        self, status: Optional[str], confidence: Optional[float]
+    ) -> bool:
+        """Whether a test case outcome is too uncertain to keep."""
+        if status in self.escalate_on or status is None:
+            return True
+        return (
+            self.min_confidence is not None
+            and confidence is not None
+            and confidence < self.min_confidence
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "tiers": self.tiers,
+            "escalate_on": sorted(self.escalate_on),
+            "min_confidence": self.min_confidence,
+        }
@@ -0,0 +1,168 @@
+"""Encrypted per-site cache of authenticated browser sessions."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from autoqa.browser import BrowserSnapshot
+from autoqa.models import TestCase
+
+DEFAULT_TTL_SECONDS = 3600
+
+_LOGIN_STEP = re.compile(
+    r"\b(log\s?-?in|sign\s?-?in|password|credentials|authenticate)\b", re.I
+)
+_SUBMIT_STEP = re.compile(r"\b(click|press|submit|tap)\b", re.I)
+LOGIN_URL = re.compile(r"log-?in|sign-?in|auth", re.I)
+
+
+def site_key(url: str) -> str:
+    """Cache key for a URL: its scheme and host."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+def session_key(url: str, login_steps: List[str], owner: str = "") -> str:
+    """
+    Cache key for a signed-in session: the site, the user that owns it and a
+    hash of the sign-in steps, which carry the account and its credentials.
+    """
+    steps = "\n".join(re.sub(r"\s+", " ", str(step)).strip() for step in login_steps)
+    login = hashlib.sha256(steps.encode()).hexdigest()
+    return f"{site_key(url)}|{owner}|{login}"
+
+
+def login_step_count(steps: List[str]) -> int:
+    """
+    Number of leading steps that make up a sign-in flow, or 0 if the steps do
+    not log in. The flow ends at the last step mentioning logging in or a
+    password, plus the following submit click if there is one.
+    """
+    last = -1
+    for i, step in enumerate(steps):
+        if _LOGIN_STEP.search(str(step)):
+            last = i
+    if last < 0:
+        return 0
+    if last + 1 < len(steps) and _SUBMIT_STEP.search(str(steps[last + 1])):
+        last += 1
+    return last + 1
+
+
+def login_setup_steps(test_case: TestCase) -> int:
+    """
+    Number of leading sign-in steps a test case can skip when it starts from a
+    cached session. Cases that test authentication itself, or consist of
+    nothing but the sign-in flow, always log in for real.
+    """
+    count = login_step_count(test_case.steps)
+    if count >= len(test_case.steps):
+        return 0
+    if _LOGIN_STEP.search(f"{test_case.description} {test_case.expected_result}"):
+        return 0
+    return count
+
+
+def cookies_expired(snapshot: BrowserSnapshot, now: Optional[float] = None) -> bool:
+    """Whether any persistent cookie in the snapshot has already expired."""
+    now = now or time.time()
+    return any(0 < cookie.get("expires", -1) < now for cookie in snapshot.cookies)
+
+
+def encryption_key(directory: str) -> bytes:
+    """
+    The Fernet key from ``AUTOQA_SESSION_KEY`` or, if unset, from a key file
+    in ``directory`` that is created with owner-only permissions.
+    """
+    key = os.getenv("AUTOQA_SESSION_KEY")
+    if key:
+        return key.encode()
+    path = os.path.join(directory, ".key")
+    if not os.path.exists(path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(Fernet.generate_key())
+    with open(path, "rb") as f:
+        return f.read().strip()
+
+
+class SessionCache:
+    """
+    Storage state captured after a successful login, one entry per site, owner
+    and sign-in flow (see ``session_key``), so a session is only reused by the
+    same user signing in with the same steps.
+
+    Entries are Fernet-encrypted on disk and expire ``ttl_seconds`` after they
+    were written. The key comes from ``AUTOQA_SESSION_KEY`` or, if unset, from
+    a key file created next to the entries with owner-only permissions.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data/sessions",
+        key: Optional[bytes] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Shared with the replay store, whose scripts hold typed passwords too
+        self.key = key or encryption_key(directory)
+        self._fernet = Fernet(self.key)
+
+    def _path(self, url: str, login_steps: List[str], owner: str) -> str:
+        key = session_key(url, login_steps, owner)
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.session")
+
+    def load(
+        self, url: str, login_steps: List[str], owner: str = ""
+    ) -> Optional[BrowserSnapshot]:
+        """Return the owner's cached session for the sign-in flow if still usable."""
+        path = self._path(url, login_steps, owner)
+        try:
+            with open(path, "rb") as f:
+                token = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            data = json.loads(self._fernet.decrypt(token, ttl=self.ttl_seconds))
+        except (InvalidToken, ValueError):
+            # Expired, written with another key or corrupted
+            self.invalidate(url, login_steps, owner)
+            return None
+
+        snapshot = BrowserSnapshot.from_dict(data)
+        if cookies_expired(snapshot):
+            self.invalidate(url, login_steps, owner)
+            return None
+        return snapshot
+
+    def save(
+        self,
+        url: str,
+        login_steps: List[str],
+        snapshot: BrowserSnapshot,
+        owner: str = "",
+    ):
+        """Encrypt and store the session the owner's sign-in flow produced."""
+        token = self._fernet.encrypt(json.dumps(snapshot.to_dict()).encode())
+        path = self._path(url, login_steps, owner)
+        fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(f"{path}.tmp", path)
+
+    def invalidate(self, url: str, login_steps: List[str], owner: str = ""):
+        """Forget the owner's cached session for the sign-in flow."""
+        try:
+            os.remove(self._path(url, login_steps, owner))
+        except FileNotFoundError:
+            pass
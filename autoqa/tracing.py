@@ -0,0 +1,163 @@
+"""Lightweight span tracing for AutoQA runs."""
+
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "autoqa_current_span", default=None
+)
+
+
+def current_span() -> Optional["Span"]:
+    """Return the innermost open span in the current context, if any."""
+    return _current_span.get()
+
+
+class Span:
+    """A named, timed unit of work with attributes and child spans."""
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"] = None,
+        start: Optional[float] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.start = start if start is not None else time.time()
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, or None while the span is still open."""
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+    def set_attribute(self, key: str, value: Any):
+        """Set a single attribute on the span."""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        """Set several attributes on the span."""
+        self.attributes.update(attributes)
+
+    def add_to_attribute(self, key: str, amount: float):
+        """Increment a numeric attribute, starting from zero."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def finish(self, end: Optional[float] = None):
+        """Close the span."""
+        if self.end is None:
+            self.end = end if end is not None else time.time()
+
+    def walk(self) -> Iterator["Span"]:
+        """Yield this span and all of its descendants depth-first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span and its children to a dictionary."""
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "start": datetime.fromtimestamp(self.start).isoformat(),
+            "end": datetime.fromtimestamp(self.end).isoformat() if self.end else None,
+            "duration": round(self.duration, 4) if self.end else None,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Tracer:
+    """Collects the span tree for a single AutoQA run."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.roots: List[Span] = []
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        start: Optional[float] = None,
+        **attributes: Any,
+    ) -> Span:
+        """Open a span under ``parent`` (default: the current span)."""
+        if parent is None:
+            parent = current_span()
+            if parent is not None and parent.tracer is not self:
+                parent = None
+        span = Span(self, name, parent=parent, start=start, attributes=attributes)
+        if parent is None:
+            self.roots.append(span)
+        else:
+            parent.children.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Open a span for the duration of a ``with`` block and make it current."""
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        parent: Optional[Span] = None,
+        **attributes: Any,
+    ) -> Span:
+        """Add an already finished span, e.g. one reconstructed from agent history."""
+        span = self.start_span(name, parent=parent, start=start, **attributes)
+        span.finish(end)
+        return span
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        """Return all spans, optionally filtered by name, in depth-first order."""
+        found = []
+        for root in self.roots:
+            for span in root.walk():
+                if name is None or span.name == name:
+                    found.append(span)
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the whole trace to a dictionary."""
+        return {
+            "trace_id": self.trace_id,
+            "spans": [root.to_dict() for root in self.roots],
+        }
+
+    def to_json(self) -> str:
+        """Convert the whole trace to a JSON string."""
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def export(self, path: str):
+        """Write the trace as JSON to ``path``."""
+        with open(path, "w") as f:
+            f.write(self.to_json())
@@ -0,0 +1,188 @@
+"""LLM token, latency and cost accounting for AutoQA runs."""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# USD per million (input, output) tokens
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-flash-preview-04-17": (0.15, 0.60),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-pro-preview-05-06": (1.25, 10.00),
+    "gpt-4o": (2.50, 10.00),
+}
+
+_current: ContextVar[Optional[Tuple["UsageTracker", str]]] = ContextVar(
+    "autoqa_usage_scope", default=None
+)
+
+
+def current_scope() -> Optional[Tuple["UsageTracker", str]]:
+    """Return the (tracker, scope) pair active in the current context, if any."""
+    return _current.get()
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "latency_seconds": 0.0,
+        "cost_usd": 0.0,
+    }
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a call, or 0.0 for models without known pricing."""
+    if not model:
+        return 0.0
+    pricing = MODEL_PRICING.get(model.split("/")[-1])
+    if pricing is None:
+        return 0.0
+    return (input_tokens * pricing[0] + output_tokens * pricing[1]) / 1_000_000
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a run has used more tokens than its budget allows."""
+
+
+class UsageTracker:
+    """Aggregate LLM calls per scope (planning or a test case id) and per run."""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget
+        self.scopes: Dict[str, Dict[str, Any]] = {}
+        self.total = _empty_totals()
+        # scope -> decision cache outcome ("memory_hits", "disk_hits", "misses") -> count
+        self.cache: Dict[str, Dict[str, int]] = {}
+        # Set once the budget is used up, to stop agents mid-run
+        self._exhausted = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @contextmanager
+    def scope(self, name: str) -> Iterator[None]:
+        """Attribute LLM calls made inside the block to ``name``."""
+        token = _current.set((self, name))
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def record(
+        self,
+        scope: str,
+        model: Optional[str],
+        input_tokens: int,
+        output_tokens: int,
+        latency: float,
+    ):
+        """Add a single LLM call to the scope and run totals."""
+        cost = estimate_cost(model, input_tokens, output_tokens)
+        for totals in (self.scopes.setdefault(scope, _empty_totals()), self.total):
+            totals["calls"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["total_tokens"] += input_tokens + output_tokens
+            totals["latency_seconds"] += latency
+            totals["cost_usd"] += cost
+        # LangChain may call back from a worker thread
+        if self.budget_exceeded and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._exhausted.set)
+
+    def record_cache(self, scope: str, outcome: str):
+        """Count a decision cache lookup made in the scope."""
+        counts = self.cache.setdefault(
+            scope, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+        counts[outcome] += 1
+
+    def cache_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Decision cache hits, misses and hit rate for planning, execution and overall."""
+
+        def combine(scopes) -> Dict[str, Any]:
+            counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            for scope in scopes:
+                for outcome, count in self.cache.get(scope, {}).items():
+                    counts[outcome] += count
+            hits = counts["memory_hits"] + counts["disk_hits"]
+            lookups = hits + counts["misses"]
+            return {
+                **counts,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+            }
+
+        execution = [scope for scope in self.cache if scope != "planning"]
+        return {
+            "planning": combine(["planning"]),
+            "execution": combine(execution),
+            "total": combine(list(self.cache)),
+        }
+
+    @property
+    def budget_exceeded(self) -> bool:
+        """Whether the run has used up its token budget."""
+        return (
+            self.token_budget is not None
+            and self.total["total_tokens"] >= self.token_budget
+        )
+
+    def check_budget(self):
+        """Raise ``TokenBudgetExceeded`` once the budget is used up."""
+        if self.budget_exceeded:
+            raise TokenBudgetExceeded(
+                f"Token budget of {self.token_budget} exceeded "
+                f"({self.total['total_tokens']} tokens used)"
+            )
+
+    async def enforce(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await ``awaitable``, cancelling it as soon as an LLM call pushes the
+        run over its token budget, so one runaway agent cannot overspend.
+        Raises ``TokenBudgetExceeded`` if the budget is or becomes used up.
+        """
+        self.check_budget()
+        if self.token_budget is None:
+            return await awaitable
+
+        self._loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(awaitable)
+        exhausted = asyncio.ensure_future(self._exhausted.wait())
+        try:
+            await asyncio.wait({task, exhausted}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            exhausted.cancel()
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if not task.cancelled():
+            return task.result()
+        self.check_budget()
+        raise asyncio.CancelledError()
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the run totals and per-scope breakdown as a dictionary."""
+
+        def rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                **totals,
+                "latency_seconds": round(totals["latency_seconds"], 2),
+                "cost_usd": round(totals["cost_usd"], 6),
+            }
+
+        return {
+            "token_budget": self.token_budget,
+            "budget_exceeded": self.budget_exceeded,
+            "total": rounded(self.total),
+            "planning": rounded(self.scopes.get("planning", _empty_totals())),
+            "shared_prefixes": rounded(self.scopes.get("prefix", _empty_totals())),
+            "test_cases": {
+                name: rounded(totals)
+                for name, totals in self.scopes.items()
+                if name not in ("planning", "prefix")
+            },
+        }
@@ -35,6 +35,13 @@ GOOGLE_REDIRECT_URI = os.getenv(
     "GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback"
 )
 
+# Users allowed to use admin endpoints such as the profiler
+ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("AUTOQA_ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 
@@ -116,11 +123,10 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    # Runs on every request: never log the token or its payload, and leave
+    # message formatting to the logging thread
     try:
-        logger.info(f"Attempting to decode token: {token[:20]}...")
-        logger.info(f"Using SECRET_KEY: {SECRET_KEY[:10]}...")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.info(f"JWT payload: {payload}")
         user_id_str = payload.get("sub")
         if user_id_str is None:
             logger.warning("No 'sub' field in JWT payload")
@@ -128,19 +134,18 @@ async def get_current_user(
         try:
             user_id = int(user_id_str)
         except (ValueError, TypeError):
-            logger.warning(f"Invalid user_id format: {user_id_str}")
+            logger.warning("Invalid user_id format in JWT payload")
             raise credentials_exception
-        logger.info(f"Extracted user_id: {user_id}")
         token_data = TokenData(user_id=user_id)
     except InvalidTokenError as e:
-        logger.error(f"JWT decode error: {e}")
+        logger.info("JWT decode error: %s", e)
         raise credentials_exception
 
     user = get_user_by_id(db, user_id=token_data.user_id)
     if user is None:
-        logger.warning(f"User not found for ID: {token_data.user_id}")
+        logger.warning("User not found for ID: %s", token_data.user_id)
         raise credentials_exception
-    logger.info(f"Successfully authenticated user: {user.email}")
+    logger.debug("Authenticated user ID: %s", user.id)
     return user
 
 
@@ -155,6 +160,31 @@ async def get_current_active_user(
     return current_user
 
 
+def is_admin(user: Optional[User]) -> bool:
+    """Whether the user is listed in AUTOQA_ADMIN_EMAILS"""
+    return user is not None and user.email.lower() in ADMIN_EMAILS
+
+
+async def get_admin_user(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+) -> User:
+    """Get current user, raise exception unless they are an admin"""
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
+
+
+def get_user_from_token(db: Session, token: str) -> Optional[User]:
+    """Get the user a JWT token belongs to, or None if it is not valid"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return get_user_by_id(db, int(payload.get("sub")))
+    except (InvalidTokenError, ValueError, TypeError):
+        return None
+
+
 async def get_google_user_info(access_token: str) -> GoogleUserInfo:
     """Get user info from Google using access token"""
     async with httpx.AsyncClient() as client:
@@ -5,30 +5,63 @@ Service for integrating AutoQA with the web application
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Callable, List, Optional
-from datetime import datetime
+import os
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 from autoqa.core import AutoQA
-from autoqa.models import TestCase as AutoQATestCase
+from autoqa.durations import DurationModel
+from autoqa.models import ExecutionLimits, TestCase as AutoQATestCase
+from autoqa.planning import areas_from_env
+from autoqa.replay import ReplayStore
+from autoqa.routing import RoutingPolicy
+from autoqa.sessions import DEFAULT_TTL_SECONDS, SessionCache
+from autoqa.tracing import Tracer
+from autoqa.usage import UsageTracker
 
 from . import crud
-from .database import get_db, TestRun
+from . import metrics
+from .database import get_db, SessionLocal, TestRun
+from .events import FINAL_STATUSES
+from .governor import ResourceGovernor
+from .logs import run_id_var
+from .profiler import PROFILER, Profile
+
+if TYPE_CHECKING:
+    from autoqa.decisions import DecisionCache
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("autoqa-service")
 
+# Seconds between heartbeats of the runs a process executes, and after which
+# a run without one is considered abandoned
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+
 
 class LogCapture:
     """
     Capture logs from AutoQA and broadcast them via WebSocket
     """
 
-    def __init__(self, test_run_id: str, db: Session, connection_manager):
+    def __init__(
+        self, test_run_id: str, db: Session, connection_manager, tracer: Tracer
+    ):
         self.test_run_id = test_run_id
         self.db = db
         self.connection_manager = connection_manager
+        self.tracer = tracer
         self.logs = []
 
     async def log(self, message: str):
@@ -37,9 +70,10 @@ class LogCapture:
         log_entry = f"[{timestamp}] {message}"
         self.logs.append(log_entry)
 
-        db_test_run = crud.get_test_run(self.db, self.test_run_id)
-        if db_test_run:
-            crud.create_test_log(self.db, db_test_run.id, message)
+        with self.tracer.span("persist", table="test_logs"):
+            db_test_run = crud.get_test_run(self.db, self.test_run_id)
+            if db_test_run:
+                crud.create_test_log(self.db, db_test_run.id, message)
 
         await self.connection_manager.safe_broadcast(
             self.test_run_id,
@@ -56,60 +90,396 @@ class AutoQAService:
     def __init__(self, connection_manager):
         self.connection_manager = connection_manager
         self.active_runs: Dict[str, Dict[str, Any]] = {}
+        # Refreshes the heartbeat of active_runs and picks up cancel requests
+        # made through other API processes
+        self._watcher: Optional[asyncio.Task] = None
+        # Set while the server drains; cancelled runs are then interrupted
+        self.shutting_down = False
+        # Signed-in browser state reused by a user's runs against the same site
+        self.session_cache = SessionCache(
+            ttl_seconds=int(os.getenv("AUTOQA_SESSION_TTL", DEFAULT_TTL_SECONDS))
+        )
+        # Compiled scripts of passing cases, replayed without the LLM
+        self.replay_store = ReplayStore(key=self.session_cache.key)
+        # LLM decisions for agent steps, shared by all runs of this process and
+        # created by the first run so the API starts without the LLM stack
+        self.decision_cache: Optional["DecisionCache"] = None
+        # Fast model first, stronger model only for uncertain outcomes, if enabled
+        self.routing: Optional[RoutingPolicy] = RoutingPolicy.from_env()
+        # Sub-areas of a scenario explored by concurrent planning agents
+        self.planning_areas = areas_from_env()
+        # Case durations of earlier runs, loaded from the database on first use
+        self.duration_model: Optional[DurationModel] = None
+        # Browser agents only start while the host has memory and CPU to spare
+        self.governor = ResourceGovernor.from_env()
+
+    def start_run(self, test_run_id: str, url: str, scenario: str, **options) -> asyncio.Task:
+        """
+        Schedule run_test as its own task and track it in active_runs so it
+        can be cancelled later
+        """
+        return self._track(test_run_id, url, self.run_test(test_run_id, url, scenario, **options))
+
+    def start_rerun(self, test_run_id: str, url: str, **options) -> asyncio.Task:
+        """
+        Schedule rerun_test as its own tracked task
+        """
+        return self._track(test_run_id, url, self.rerun_test(test_run_id, **options))
+
+    def _track(self, test_run_id: str, url: str, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=f"autoqa-run-{test_run_id}")
+        self.active_runs[test_run_id] = {
+            "task": task,
+            "url": url,
+            "started_at": datetime.utcnow(),
+            # In the backlog until the governor admits its first browser
+            "backlogged": True,
+        }
+        metrics.RUNS_BACKLOG.inc()
+        task.add_done_callback(lambda _: self._untrack(test_run_id))
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch_runs())
+        return task
+
+    def _untrack(self, test_run_id: str):
+        self._leave_backlog(test_run_id)
+        self.active_runs.pop(test_run_id, None)
+
+    def _leave_backlog(self, test_run_id: str):
+        run = self.active_runs.get(test_run_id)
+        if run is not None and run.pop("backlogged", False):
+            metrics.RUNS_BACKLOG.dec()
+
+    @staticmethod
+    def _heartbeat(run_ids: List[str]) -> List[str]:
+        db = SessionLocal()
+        try:
+            return crud.heartbeat_test_runs(db, run_ids)
+        finally:
+            db.close()
+
+    async def _watch_runs(self):
+        """
+        While this process executes runs, refresh their heartbeat and cancel
+        the ones flagged for cancellation by another process
+        """
+        while self.active_runs:
+            try:
+                flagged = await asyncio.to_thread(self._heartbeat, list(self.active_runs))
+            except Exception as e:
+                logger.error("Error refreshing run heartbeats: %s", e)
+                flagged = []
+            for test_run_id in flagged:
+                if self.cancel_run(test_run_id):
+                    logger.info("Test run %s cancelled through another process", test_run_id)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    def run_is_live(self, db_test_run: TestRun) -> bool:
+        """
+        Whether a run is being executed, by this or any other API process
+        """
+        if db_test_run.run_id in self.active_runs:
+            return True
+        heartbeat = db_test_run.heartbeat_at
+        return (
+            heartbeat is not None
+            and db_test_run.status not in FINAL_STATUSES
+            and datetime.utcnow() - heartbeat < timedelta(seconds=HEARTBEAT_TIMEOUT)
+        )
+
+    async def wait_until_finished(
+        self, db: Session, test_run_id: str, timeout: float = 10
+    ) -> bool:
+        """
+        Wait for a run executed elsewhere to reach a final status. Returns
+        False if it is still going after ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            db.expire_all()
+            db_test_run = crud.get_test_run(db, test_run_id)
+            if db_test_run is None or db_test_run.status in FINAL_STATUSES:
+                return True
+            await asyncio.sleep(0.25)
+        return False
 
-    async def run_test(self, test_run_id: str, url: str, scenario: str):
+    def cancel_run(self, test_run_id: str) -> bool:
+        """
+        Cancel a live run. The in-flight agent is cancelled (closing its
+        browser), no further test cases are started and run_test persists the
+        partial results. Returns False if the run is not active in this process.
+        """
+        active_run = self.active_runs.get(test_run_id)
+        if not active_run or active_run["task"].done():
+            return False
+        active_run["task"].cancel()
+        return True
+
+    async def run_test(
+        self,
+        test_run_id: str,
+        url: str,
+        scenario: str,
+        token_budget: Optional[int] = None,
+        limits: Optional[Dict[str, Any]] = None,
+        profile: bool = False,
+    ):
         """
         Run an AutoQA test and update the database with results
+
+        Args:
+            token_budget: Skip remaining test cases once this many tokens are used
+            limits: Overrides for autoqa.models.ExecutionLimits (step and time budgets)
+            profile: Record a sampling profile of the run with its artifacts
         """
+
+        async def body(db, log_capture, tracer, usage):
+            await self._run_test(
+                db,
+                log_capture,
+                tracer,
+                usage,
+                ExecutionLimits.from_dict(limits),
+                test_run_id,
+                url,
+                scenario,
+            )
+
+        await self._run_guarded(test_run_id, url, token_budget, body, profile)
+
+    async def rerun_test(
+        self,
+        test_run_id: str,
+        token_budget: Optional[int] = None,
+        limits: Optional[Dict[str, Any]] = None,
+        concurrency: int = 3,
+        profile: bool = False,
+    ):
+        """
+        Execute the test cases copied into a rerun attempt, reusing the stored
+        plan instead of planning again
+
+        Args:
+            test_run_id: The attempt created by crud.create_rerun
+            concurrency: Maximum number of test cases executed at the same time
+            profile: Record a sampling profile of the run with its artifacts
+        """
+
+        async def body(db, log_capture, tracer, usage):
+            await self._rerun_test(
+                db,
+                log_capture,
+                tracer,
+                usage,
+                ExecutionLimits.from_dict(limits),
+                test_run_id,
+                concurrency,
+            )
+
+        await self._run_guarded(test_run_id, None, token_budget, body, profile)
+
+    async def _run_guarded(
+        self,
+        test_run_id: str,
+        url: Optional[str],
+        token_budget: Optional[int],
+        body: Callable,
+        profile: bool = False,
+    ):
+        """
+        Shared error, cancellation and artifact handling around a run body
+        """
+        # Tag every log record of this run task and the tasks it starts
+        run_id_var.set(test_run_id)
+
         # Get database session
         db = next(get_db())
+        tracer = Tracer(trace_id=test_run_id)
+        usage = UsageTracker(token_budget)
+
+        # Create log capture
+        log_capture = LogCapture(test_run_id, db, self.connection_manager, tracer)
+        profiling = PROFILER.attach(f"run {test_run_id}") if profile else nullcontext()
+        run_profile = None
 
         try:
-            # Create log capture
-            log_capture = LogCapture(test_run_id, db, self.connection_manager)
+            with (
+                metrics.RUNS_ACTIVE.track_inprogress(),
+                profiling as run_profile,
+                tracer.span("run", run_id=test_run_id, url=url),
+            ):
+                await body(db, log_capture, tracer, usage)
+
+        except asyncio.CancelledError:
+            if self.shutting_down:
+                logger.info("Test run %s interrupted by shutdown", test_run_id)
+                await self.mark_cancelled(
+                    db,
+                    test_run_id,
+                    "interrupted",
+                    "Server shut down; rerun the cancelled test cases to resume",
+                )
+                await log_capture.log("Test run interrupted by server shutdown")
+                raise
+            logger.info("Test run %s cancelled", test_run_id)
+            await self.mark_cancelled(db, test_run_id)
+            await log_capture.log("Test run cancelled")
+            raise
+        except Exception as e:
+            logger.exception("Error running test: %s", e)
+            await self.connection_manager.safe_broadcast(
+                test_run_id,
+                {"status": "error", "message": f"Error: {str(e)}"},
+                "status_update"
+            )
+            crud.update_test_run_status(db, test_run_id, "failed")
+        finally:
+            self._save_run_artifacts(db, test_run_id, tracer, usage, run_profile)
+            db.close()
 
-            # Get the database test run
+    async def mark_cancelled(
+        self,
+        db: Session,
+        test_run_id: str,
+        status: str = "cancelled",
+        message: str = "Test run cancelled",
+    ):
+        """
+        Persist the cancelled state of a run and notify subscribers
+        """
+        crud.update_test_run_status(db, test_run_id, status)
+        db_test_run = crud.get_test_run(db, test_run_id)
+        if db_test_run:
+            crud.cancel_unfinished_test_cases(db, db_test_run.id)
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {"status": status, "message": message},
+            "status_update"
+        )
+
+    async def checkpoint_active_runs(self, timeout: float = 10):
+        """
+        Stop the runs still active in this process before it exits. Finished
+        test cases are already persisted; the rest are marked CANCELLED and
+        the run "interrupted", so a rerun of its CANCELLED cases resumes it.
+        """
+        self.shutting_down = True
+        tasks = [run["task"] for run in self.active_runs.values() if not run["task"].done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def _save_run_artifacts(
+        self,
+        db: Session,
+        test_run_id: str,
+        tracer: Tracer,
+        usage: UsageTracker,
+        profile: Optional[Profile] = None,
+    ):
+        """
+        Store the run's span trace, LLM usage and profile next to the test run
+        """
+        try:
             db_test_run = crud.get_test_run(db, test_run_id)
-            if not db_test_run:
-                await log_capture.log(f"Error: Test run {test_run_id} not found")
-                return
+            if db_test_run and tracer.roots:
+                crud.save_test_trace(db, db_test_run.id, tracer.to_dict())
+            if db_test_run:
+                crud.update_test_run_usage(db, test_run_id, usage.summary())
+            if db_test_run and profile is not None:
+                crud.save_profile(
+                    db,
+                    profile.target,
+                    profile.samples,
+                    profile.interval * 1000,
+                    profile.duration,
+                    profile.folded(),
+                    test_run_id=db_test_run.id,
+                )
+        except Exception as e:
+            logger.error("Error saving run artifacts for %s: %s", test_run_id, e)
+
+    async def _run_test(
+        self,
+        db: Session,
+        log_capture: LogCapture,
+        tracer: Tracer,
+        usage: UsageTracker,
+        limits: ExecutionLimits,
+        test_run_id: str,
+        url: str,
+        scenario: str,
+    ):
+        # Get the database test run
+        db_test_run = crud.get_test_run(db, test_run_id)
+        if not db_test_run:
+            await log_capture.log(f"Error: Test run {test_run_id} not found")
+            return
+        if db_test_run.status == "cancelled":
+            # Cancelled before it got scheduled
+            return
+
+        # Update status to 'generating_plan'
+        crud.update_test_run_status(db, test_run_id, "generating_plan")
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {
+                "status": "generating_plan",
+                "message": "Generating test plan...",
+            },
+            "status_update"
+        )
 
-            # Update status to 'generating_plan'
-            crud.update_test_run_status(db, test_run_id, "generating_plan")
+        # Initialize AutoQA
+        await log_capture.log(f"Initializing AutoQA for URL: {url}")
+        autoqa = AutoQA(
+            url=url,
+            scenario=scenario,
+            tracer=tracer,
+            usage=usage,
+            limits=limits,
+            session_cache=self.session_cache,
+            session_owner=str(db_test_run.user_id),
+            replay_store=self.replay_store,
+            decision_cache=self._decision_cache(),
+            routing=self.routing,
+            planning_areas=self.planning_areas,
+            duration_model=self._duration_model(db),
+            admission=self._admission(log_capture, test_run_id),
+        )
+
+        # Create test plan
+        await log_capture.log("Creating test plan...")
+        with (
+            metrics.RUN_PHASE_DURATION.labels("planning").time(),
+            metrics.AGENTS_ACTIVE.labels("planning").track_inprogress(),
+        ):
+            test_plan = await autoqa.create_test_plan()
+
+        if not test_plan:
+            await log_capture.log("Error: Failed to create test plan")
+            crud.update_test_run_status(db, test_run_id, "failed")
             await self.connection_manager.safe_broadcast(
                 test_run_id,
                 {
-                    "status": "generating_plan",
-                    "message": "Generating test plan...",
+                    "status": "failed",
+                    "message": "Failed to create test plan",
                 },
                 "status_update"
             )
+            return
 
-            # Initialize AutoQA
-            await log_capture.log(f"Initializing AutoQA for URL: {url}")
-            autoqa = AutoQA(url=url, scenario=scenario)
-
-            # Create test plan
-            await log_capture.log("Creating test plan...")
-            test_plan = await autoqa.create_test_plan()
-
-            if not test_plan:
-                await log_capture.log("Error: Failed to create test plan")
-                crud.update_test_run_status(db, test_run_id, "failed")
-                await self.connection_manager.safe_broadcast(
-                    test_run_id,
-                    {
-                        "status": "failed",
-                        "message": "Failed to create test plan",
-                    },
-                    "status_update"
-                )
-                return
-
-            # Store test plan in database
+        # Store test plan in database
+        await log_capture.log(
+            f"Test plan created with {len(test_plan.test_cases)} test cases"
+        )
+        for pruned in test_plan.pruned:
             await log_capture.log(
-                f"Test plan created with {len(test_plan.test_cases)} test cases"
+                f"Pruned {pruned['id']} as a near-duplicate of "
+                f"{pruned['duplicate_of']} (similarity {pruned['similarity']})"
             )
+        with tracer.span("persist", table="test_plans"):
             plan_data = test_plan.to_dict()
             crud.create_test_plan(db, db_test_run.id, plan_data)
 
@@ -124,94 +494,326 @@ class AutoQAService:
                     tc.expected_result,
                 )
 
-            # Update status to 'executing_tests'
-            crud.update_test_run_status(db, test_run_id, "executing_tests")
-            await self.connection_manager.safe_broadcast(
-                test_run_id,
-                {
-                    "status": "executing_tests",
-                    "message": "Executing test cases...",
-                },
-                "status_update"
+        await self._execute_cases(
+            db, log_capture, tracer, autoqa, db_test_run, test_plan.test_cases
+        )
+        await self._complete_run(db, log_capture, autoqa, test_run_id)
+
+    async def _rerun_test(
+        self,
+        db: Session,
+        log_capture: LogCapture,
+        tracer: Tracer,
+        usage: UsageTracker,
+        limits: ExecutionLimits,
+        test_run_id: str,
+        concurrency: int,
+    ):
+        db_test_run = crud.get_test_run(db, test_run_id)
+        if not db_test_run:
+            await log_capture.log(f"Error: Test run {test_run_id} not found")
+            return
+        if db_test_run.status == "cancelled":
+            return
+
+        autoqa = AutoQA(
+            url=db_test_run.url,
+            scenario=db_test_run.scenario,
+            tracer=tracer,
+            usage=usage,
+            limits=limits,
+            session_cache=self.session_cache,
+            session_owner=str(db_test_run.user_id),
+            replay_store=self.replay_store,
+            decision_cache=self._decision_cache(),
+            routing=self.routing,
+            planning_areas=self.planning_areas,
+            duration_model=self._duration_model(db),
+            admission=self._admission(log_capture, test_run_id),
+        )
+        for db_tc in crud.get_test_cases(db, db_test_run.id):
+            autoqa.test_plan.add_test_case(
+                AutoQATestCase(
+                    id=db_tc.tc_id,
+                    description=db_tc.description,
+                    steps=json.loads(db_tc.steps),
+                    expected_result=db_tc.expected_result,
+                )
             )
 
-            # Execute test cases
-            await log_capture.log("Executing test cases...")
-            for i, tc in enumerate(test_plan.test_cases):
-                await log_capture.log(
-                    f"Executing test case {tc.id} ({i + 1}/{len(test_plan.test_cases)}): {tc.description}"
-                )
+        await log_capture.log(
+            f"Re-running {len(autoqa.test_plan.test_cases)} test cases from "
+            f"{db_test_run.parent_run_id} (attempt {db_test_run.attempt})"
+        )
+        await self._execute_cases(
+            db,
+            log_capture,
+            tracer,
+            autoqa,
+            db_test_run,
+            autoqa.test_plan.test_cases,
+            concurrency,
+        )
+        await self._complete_run(db, log_capture, autoqa, test_run_id)
+
+    async def _execute_cases(
+        self,
+        db: Session,
+        log_capture: LogCapture,
+        tracer: Tracer,
+        autoqa: AutoQA,
+        db_test_run: TestRun,
+        test_cases: List[AutoQATestCase],
+        concurrency: int = 1,
+    ):
+        """
+        Execute test cases with at most ``concurrency`` agents at a time
+        """
+        test_run_id = db_test_run.run_id
 
-                # Notify about current test case
-                await self.connection_manager.safe_broadcast(
-                    test_run_id,
-                    {
-                        "tc_id": tc.id,
-                        "status": "running",
-                        "current": i + 1,
-                        "total": len(test_plan.test_cases),
-                    },
-                    "test_case_update"
-                )
+        # Update status to 'executing_tests'
+        crud.update_test_run_status(db, test_run_id, "executing_tests")
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {
+                "status": "executing_tests",
+                "message": "Executing test cases...",
+            },
+            "status_update"
+        )
 
-                # Execute the test case
-                updated_tc = await autoqa.execute_test_case(tc)
-
-                # Update test case in database
-                db_test_cases = crud.get_test_cases(db, db_test_run.id)
-                for db_tc in db_test_cases:
-                    if db_tc.tc_id == updated_tc.id:
-                        crud.update_test_case(
-                            db,
-                            db_tc.id,
-                            updated_tc.actual_result or "",
-                            updated_tc.status or "ERROR",
-                            updated_tc.notes,
-                        )
-                        break
-
-                # Notify about test case result
-                await log_capture.log(
-                    f"Test case {tc.id} completed with status: {updated_tc.status}"
-                )
-                await self.connection_manager.safe_broadcast(
-                    test_run_id,
-                    {
-                        "tc_id": tc.id,
-                        "status": updated_tc.status,
-                        "actual_result": updated_tc.actual_result,
-                        "notes": updated_tc.notes,
-                    },
-                    "test_case_update"
+        # Execute test cases
+        await log_capture.log("Executing test cases...")
+
+        async def execute(tc: AutoQATestCase, **fork) -> AutoQATestCase:
+            return await self._execute_case(
+                db,
+                log_capture,
+                tracer,
+                autoqa,
+                db_test_run,
+                tc,
+                test_cases.index(tc),
+                len(test_cases),
+                **fork,
+            )
+
+        with (
+            metrics.RUN_PHASE_DURATION.labels("execution").time(),
+            tracer.span(
+                "execution",
+                concurrency=concurrency,
+                share_prefixes=autoqa.share_prefixes,
+            ),
+        ):
+            if autoqa.share_prefixes:
+                # Steps shared by several cases run once and are forked from
+                await autoqa.execute_shared_prefixes(test_cases, execute, concurrency)
+            else:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def execute_limited(tc: AutoQATestCase):
+                    async with semaphore:
+                        await execute(tc)
+
+                # Longest predicted cases first so none starts last
+                await asyncio.gather(
+                    *(execute_limited(tc) for tc in autoqa.schedule(test_cases))
                 )
 
-            # Generate report
-            await log_capture.log("Generating test report...")
-            report = autoqa.generate_report()
+        # Report in plan order regardless of completion order
+        autoqa.results.sort(key=test_cases.index)
+
+    async def _execute_case(
+        self,
+        db: Session,
+        log_capture: LogCapture,
+        tracer: Tracer,
+        autoqa: AutoQA,
+        db_test_run: TestRun,
+        tc: AutoQATestCase,
+        index: int,
+        total: int,
+        **fork,
+    ) -> AutoQATestCase:
+        """
+        Execute a single test case, persist its outcome and broadcast progress.
+        ``fork`` holds the browser snapshot and completed step count when the
+        case continues from a shared prefix.
+        """
+        test_run_id = db_test_run.run_id
+        usage = autoqa.usage
 
-            # Update status to 'completed'
-            crud.update_test_run_status(db, test_run_id, "completed")
+        if usage.budget_exceeded:
+            await log_capture.log(
+                f"Token budget of {usage.token_budget} exceeded, skipping {tc.id}"
+            )
+            updated_tc = autoqa.skip_test_case(tc, "Skipped: token budget exceeded")
+            autoqa.results.append(updated_tc)
+            self._persist_test_case(db, tracer, db_test_run.id, updated_tc)
             await self.connection_manager.safe_broadcast(
                 test_run_id,
                 {
-                    "status": "completed",
-                    "message": "Test run completed",
-                    "summary": report["summary"],
+                    "tc_id": tc.id,
+                    "status": updated_tc.status,
+                    "notes": updated_tc.notes,
                 },
-                "status_update"
+                "test_case_update"
             )
+            return updated_tc
 
-            await log_capture.log(
-                f"Test run completed. {report['summary']['passed']}/{report['summary']['total_tests']} tests passed."
-            )
+        await log_capture.log(
+            f"Executing test case {tc.id} ({index + 1}/{total}): {tc.description}"
+        )
 
-        except Exception as e:
-            logger.error(f"Error running test: {e}")
-            await self.connection_manager.safe_broadcast(
-                test_run_id,
-                {"status": "error", "message": f"Error: {str(e)}"},
-                "status_update"
-            )
-            crud.update_test_run_status(db, test_run_id, "failed")
-        finally:
-            db.close()
+        # Notify about current test case
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {
+                "tc_id": tc.id,
+                "status": "running",
+                "current": index + 1,
+                "total": total,
+            },
+            "test_case_update"
+        )
+
+        # Its browsers start once the governor admits them (see _admission)
+        with metrics.AGENTS_ACTIVE.labels("execution").track_inprogress():
+            updated_tc = await autoqa.execute_test_case(tc, **fork)
+        autoqa.results.append(updated_tc)
+        metrics.TEST_CASE_OUTCOMES.labels(updated_tc.status or "ERROR").inc()
+
+        # Update test case in database
+        self._persist_test_case(db, tracer, db_test_run.id, updated_tc)
+
+        # Notify about test case result
+        await log_capture.log(
+            f"Test case {tc.id} completed with status: {updated_tc.status}"
+        )
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {
+                "tc_id": tc.id,
+                "status": updated_tc.status,
+                "actual_result": updated_tc.actual_result,
+                "notes": updated_tc.notes,
+            },
+            "test_case_update"
+        )
+        return updated_tc
+
+    def _admission(self, log_capture: LogCapture, test_run_id: str):
+        """
+        Admission hook for a run's AutoQA: every browser it starts, whether
+        for planning, a shared prefix, a session check, a replay or a test
+        case, waits for the governor. Queued test cases are reported to the
+        run's subscribers
+        """
+
+        def admit(label: str, tc: Optional[AutoQATestCase] = None):
+            on_queued = None
+            if tc is not None:
+
+                async def on_queued(reason: str):
+                    await log_capture.log(f"Test case {tc.id} queued: {reason}")
+                    await self.connection_manager.safe_broadcast(
+                        test_run_id,
+                        {"tc_id": tc.id, "status": "queued", "reason": reason},
+                        "test_case_update"
+                    )
+
+            return self._admit(test_run_id, label, on_queued)
+
+        return admit
+
+    @asynccontextmanager
+    async def _admit(
+        self,
+        test_run_id: str,
+        label: str,
+        on_queued: Optional[Callable[[str], Awaitable[None]]],
+    ) -> AsyncIterator[float]:
+        async with self.governor.admit(f"{test_run_id}/{label}", on_queued) as waited:
+            self._leave_backlog(test_run_id)
+            yield waited
+
+    async def _complete_run(
+        self, db: Session, log_capture: LogCapture, autoqa: AutoQA, test_run_id: str
+    ):
+        """
+        Generate the report and mark the run as completed
+        """
+        # Generate report
+        await log_capture.log("Generating test report...")
+        report = json.loads(autoqa.generate_report())
+
+        # Update status to 'completed'
+        crud.update_test_run_status(db, test_run_id, "completed")
+        await self.connection_manager.safe_broadcast(
+            test_run_id,
+            {
+                "status": "completed",
+                "message": "Test run completed",
+                "summary": report["summary"],
+            },
+            "status_update"
+        )
+
+        await log_capture.log(
+            f"Test run completed. {report['summary']['passed']}/{report['summary']['total_tests']} tests passed."
+        )
+
+    def _duration_model(self, db: Session) -> DurationModel:
+        """
+        Duration model trained on the measured case durations stored so far
+        """
+        if self.duration_model is None:
+            self.duration_model = DurationModel()
+            for url, db_tc in crud.get_timed_test_cases(db):
+                self.duration_model.observe(
+                    url,
+                    AutoQATestCase(
+                        id=db_tc.tc_id,
+                        description=db_tc.description,
+                        steps=json.loads(db_tc.steps),
+                        expected_result=db_tc.expected_result,
+                    ),
+                    db_tc.duration_seconds,
+                    db_tc.predicted_seconds,
+                    db_tc.forked_steps or 0,
+                )
+        return self.duration_model
+
+    def _decision_cache(self) -> "DecisionCache":
+        """
+        The process-wide decision cache, importing langchain on first use
+        """
+        if self.decision_cache is None:
+            from autoqa.decisions import DecisionCache
+
+            self.decision_cache = DecisionCache(key=self.session_cache.key)
+        return self.decision_cache
+
+    def _persist_test_case(
+        self, db: Session, tracer: Tracer, db_test_run_id: int, test_case: AutoQATestCase
+    ):
+        """
+        Write a test case outcome back to its database row
+        """
+        with tracer.span("persist", table="test_cases", test_id=test_case.id):
+            db_test_cases = crud.get_test_cases(db, db_test_run_id)
+            for db_tc in db_test_cases:
+                if db_tc.tc_id == test_case.id:
+                    crud.update_test_case(
+                        db,
+                        db_tc.id,
+                        test_case.actual_result or "",
+                        test_case.status or "ERROR",
+                        test_case.notes,
+                        test_case.model_tier,
+                        test_case.duration_seconds,
+                        test_case.predicted_seconds,
+                        test_case.forked_steps,
+                    )
+                    break
@@ -8,7 +8,7 @@ import json
 import uuid
 from typing import List, Dict, Any, Optional
 
-from .database import TestRun, TestPlan, TestCase, TestLog
+from .database import Profile, TestRun, TestPlan, TestCase, TestLog, TestTrace
 
 
 # Test Run operations
@@ -37,6 +37,48 @@ def get_test_run(db: Session, run_id: str) -> Optional[TestRun]:
     return db.query(TestRun).filter(TestRun.run_id == run_id).first()
 
 
+def create_rerun(db: Session, source_run: TestRun, test_cases: List[TestCase]) -> TestRun:
+    """
+    Create a new attempt of a test run containing copies of the given test
+    cases, reusing the source run's test plan
+    """
+    root_run_id = source_run.parent_run_id or source_run.run_id
+    last_attempt = max(
+        [source_run.attempt or 1]
+        + [
+            run.attempt or 1
+            for run in db.query(TestRun).filter(TestRun.parent_run_id == root_run_id)
+        ]
+    )
+    db_test_run = TestRun(
+        run_id=f"run-{uuid.uuid4().hex[:8]}",
+        user_id=source_run.user_id,
+        url=source_run.url,
+        scenario=source_run.scenario,
+        status="in_progress",
+        parent_run_id=root_run_id,
+        attempt=last_attempt + 1,
+    )
+    db.add(db_test_run)
+    db.flush()
+
+    if source_run.test_plan:
+        db.add(TestPlan(test_run_id=db_test_run.id, plan_json=source_run.test_plan.plan_json))
+    for tc in test_cases:
+        db.add(
+            TestCase(
+                test_run_id=db_test_run.id,
+                tc_id=tc.tc_id,
+                description=tc.description,
+                steps=tc.steps,
+                expected_result=tc.expected_result,
+            )
+        )
+    db.commit()
+    db.refresh(db_test_run)
+    return db_test_run
+
+
 def get_test_runs(db: Session, skip: int = 0, limit: int = 100) -> List[TestRun]:
     """
     Get all test runs with pagination
@@ -51,6 +93,19 @@ def get_user_test_runs(db: Session, user_id: int, skip: int = 0, limit: int = 10
     return db.query(TestRun).filter(TestRun.user_id == user_id).order_by(TestRun.created_at.desc()).offset(skip).limit(limit).all()
 
 
+def get_user_test_runs_by_ids(db: Session, user_id: int, run_ids: List[str]) -> List[TestRun]:
+    """
+    Get the runs among the given run ids that belong to a user
+    """
+    if not run_ids:
+        return []
+    return (
+        db.query(TestRun)
+        .filter(TestRun.user_id == user_id, TestRun.run_id.in_(run_ids))
+        .all()
+    )
+
+
 def update_test_run_status(db: Session, run_id: str, status: str) -> Optional[TestRun]:
     """
     Update the status of a test run
@@ -65,6 +120,53 @@ def update_test_run_status(db: Session, run_id: str, status: str) -> Optional[Te
     return db_test_run
 
 
+def request_test_run_cancel(db: Session, run_id: str) -> Optional[TestRun]:
+    """
+    Flag a test run for cancellation by whichever process is executing it
+    """
+    db_test_run = get_test_run(db, run_id)
+    if db_test_run:
+        db_test_run.cancel_requested_at = datetime.utcnow()
+        db.add(db_test_run)
+        db.commit()
+        db.refresh(db_test_run)
+    return db_test_run
+
+
+def heartbeat_test_runs(db: Session, run_ids: List[str]) -> List[str]:
+    """
+    Record that the given runs are still being executed and return the ones
+    flagged for cancellation
+    """
+    if not run_ids:
+        return []
+    db.query(TestRun).filter(TestRun.run_id.in_(run_ids)).update(
+        {TestRun.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    return [
+        run_id
+        for (run_id,) in db.query(TestRun.run_id).filter(
+            TestRun.run_id.in_(run_ids), TestRun.cancel_requested_at.isnot(None)
+        )
+    ]
+
+
+def update_test_run_usage(
+    db: Session, run_id: str, usage_data: Dict[str, Any]
+) -> Optional[TestRun]:
+    """
+    Store the LLM token and cost summary of a test run
+    """
+    db_test_run = get_test_run(db, run_id)
+    if db_test_run:
+        db_test_run.usage_json = json.dumps(usage_data)
+        db.add(db_test_run)
+        db.commit()
+        db.refresh(db_test_run)
+    return db_test_run
+
+
 # Test Plan operations
 def create_test_plan(
     db: Session, test_run_id: int, plan_data: Dict[str, Any]
@@ -123,12 +225,31 @@ def get_test_cases(db: Session, test_run_id: int) -> List[TestCase]:
     return db.query(TestCase).filter(TestCase.test_run_id == test_run_id).all()
 
 
+def get_timed_test_cases(db: Session, limit: int = 5000) -> List[tuple]:
+    """
+    Get (url, test case) pairs with a measured duration, oldest first
+    """
+    rows = (
+        db.query(TestRun.url, TestCase)
+        .join(TestCase, TestCase.test_run_id == TestRun.id)
+        .filter(TestCase.duration_seconds.isnot(None))
+        .order_by(TestCase.executed_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return list(reversed(rows))
+
+
 def update_test_case(
     db: Session,
     test_case_id: int,
     actual_result: str,
     status: str,
     notes: Optional[str] = None,
+    model_tier: Optional[str] = None,
+    duration_seconds: Optional[float] = None,
+    predicted_seconds: Optional[float] = None,
+    forked_steps: Optional[int] = None,
 ) -> Optional[TestCase]:
     """
     Update a test case with results
@@ -138,6 +259,10 @@ def update_test_case(
         db_test_case.actual_result = actual_result
         db_test_case.status = status
         db_test_case.notes = notes
+        db_test_case.model_tier = model_tier
+        db_test_case.duration_seconds = duration_seconds
+        db_test_case.predicted_seconds = predicted_seconds
+        db_test_case.forked_steps = forked_steps
         db_test_case.executed_at = datetime.utcnow()
         db.add(db_test_case)
         db.commit()
@@ -145,6 +270,19 @@ def update_test_case(
     return db_test_case
 
 
+def cancel_unfinished_test_cases(db: Session, test_run_id: int) -> int:
+    """
+    Mark every test case of a run that has not finished yet as CANCELLED
+    """
+    count = (
+        db.query(TestCase)
+        .filter(TestCase.test_run_id == test_run_id, TestCase.status == "pending")
+        .update({TestCase.status: "CANCELLED"}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
 # Test Log operations
 def create_test_log(db: Session, test_run_id: int, log_text: str) -> TestLog:
     """
@@ -165,3 +303,124 @@ def get_test_logs(db: Session, test_run_id: int) -> List[TestLog]:
     Get all logs for a test run
     """
     return db.query(TestLog).filter(TestLog.test_run_id == test_run_id).order_by(TestLog.timestamp).all()
+
+
+# Test Trace operations
+def save_test_trace(db: Session, test_run_id: int, trace_data: Dict[str, Any]) -> TestTrace:
+    """
+    Create or replace the span trace for a test run
+    """
+    trace_json = json.dumps(trace_data, default=str)
+    db_test_trace = db.query(TestTrace).filter(TestTrace.test_run_id == test_run_id).first()
+    if db_test_trace:
+        db_test_trace.trace_json = trace_json
+    else:
+        db_test_trace = TestTrace(test_run_id=test_run_id, trace_json=trace_json)
+    db.add(db_test_trace)
+    db.commit()
+    db.refresh(db_test_trace)
+    return db_test_trace
+
+
+def get_test_trace(db: Session, test_run_id: int) -> Optional[TestTrace]:
+    """
+    Get the span trace for a test run
+    """
+    return db.query(TestTrace).filter(TestTrace.test_run_id == test_run_id).first()
+
+
+def save_profile(
+    db: Session,
+    target: str,
+    samples: int,
+    interval_ms: float,
+    duration_seconds: float,
+    folded: str,
+    test_run_id: Optional[int] = None,
+) -> Profile:
+    """
+    Store a sampling profile of a test run or an API request
+    """
+    db_profile = Profile(
+        test_run_id=test_run_id,
+        target=target,
+        samples=samples,
+        interval_ms=interval_ms,
+        duration_seconds=duration_seconds,
+        folded=folded,
+    )
+    db.add(db_profile)
+    db.commit()
+    db.refresh(db_profile)
+    return db_profile
+
+
+def get_profile(db: Session, profile_id: int) -> Optional[Profile]:
+    """
+    Get a stored profile by ID
+    """
+    return db.query(Profile).filter(Profile.id == profile_id).first()
+
+
+def get_profiles(
+    db: Session, test_run_id: Optional[int] = None, skip: int = 0, limit: int = 100
+) -> List[Profile]:
+    """
+    Get stored profiles, newest first, optionally only those of a test run
+    """
+    query = db.query(Profile)
+    if test_run_id is not None:
+        query = query.filter(Profile.test_run_id == test_run_id)
+    return query.order_by(Profile.created_at.desc()).offset(skip).limit(limit).all()
+
+
+def get_test_runs_after(
+    db: Session,
+    after_id: int,
+    limit: int,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[TestRun]:
+    """
+    Get the next batch of test runs by primary key, for exports that page
+    through the whole table without loading it at once
+    """
+    query = db.query(TestRun).filter(TestRun.id > after_id)
+    if user_id is not None:
+        query = query.filter(TestRun.user_id == user_id)
+    if since is not None:
+        query = query.filter(TestRun.created_at >= since)
+    if until is not None:
+        query = query.filter(TestRun.created_at < until)
+    return query.order_by(TestRun.id).limit(limit).all()
+
+
+def get_test_cases_after(
+    db: Session, test_run_ids: List[int], after_id: int, limit: int
+) -> List[TestCase]:
+    """
+    Get the next batch of test cases of the given runs by primary key
+    """
+    return (
+        db.query(TestCase)
+        .filter(TestCase.test_run_id.in_(test_run_ids), TestCase.id > after_id)
+        .order_by(TestCase.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_test_logs_after(
+    db: Session, test_run_ids: List[int], after_id: int, limit: int
+) -> List[TestLog]:
+    """
+    Get the next batch of logs of the given runs by primary key
+    """
+    return (
+        db.query(TestLog)
+        .filter(TestLog.test_run_id.in_(test_run_ids), TestLog.id > after_id)
+        .order_by(TestLog.id)
+        .limit(limit)
+        .all()
+    )
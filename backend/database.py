@@ -2,7 +2,7 @@
 Database configuration and models for AutoQA Web Application using SQLAlchemy
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from typing import Optional, List, Dict, Any
@@ -74,8 +74,12 @@ class TestCase(Base):
     steps = Column(Text, nullable=False)  # JSON array of steps
     expected_result = Column(Text, nullable=False)
     actual_result = Column(Text, nullable=True)
-    status = Column(String, default="pending")  # PASS, FAIL, ERROR, pending
+    status = Column(String, default="pending")  # PASS, FAIL, ERROR, TIMEOUT, SKIPPED, CANCELLED, pending
     notes = Column(Text, nullable=True)
+    model_tier = Column(String, nullable=True)  # Model that decided the status
+    duration_seconds = Column(Float, nullable=True)  # Measured execution time
+    predicted_seconds = Column(Float, nullable=True)  # Duration model estimate before running
+    forked_steps = Column(Integer, nullable=True)  # Steps done by a shared prefix or cached session
     executed_at = Column(DateTime, nullable=True)
 
     # Relationships
@@ -91,6 +95,7 @@ class TestCase(Base):
             "actual_result": self.actual_result,
             "status": self.status,
             "notes": self.notes,
+            "model_tier": self.model_tier,
             "executed_at": self.executed_at.isoformat() if self.executed_at else None,
         }
 
@@ -118,6 +123,56 @@ class TestLog(Base):
         }
 
 
+class TestTrace(Base):
+    """Model representing the span trace recorded for a test run"""
+
+    __tablename__ = "test_traces"
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_run_id = Column(Integer, ForeignKey("test_runs.id"), unique=True, nullable=False)
+    trace_json = Column(Text, nullable=False)  # JSON export of autoqa.tracing.Tracer
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    test_run = relationship("TestRun", back_populates="trace")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "test_run_id": self.test_run_id,
+            "trace": json.loads(self.trace_json),
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class Profile(Base):
+    """Model representing a sampling profile of a test run or an API request"""
+
+    __tablename__ = "profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_run_id = Column(Integer, ForeignKey("test_runs.id"), nullable=True, index=True)  # Unset for request profiles
+    target = Column(String, nullable=False)  # "run <run_id>" or "<METHOD> <path>"
+    samples = Column(Integer, nullable=False)
+    interval_ms = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    folded = Column(Text, nullable=False)  # Collapsed stacks, see backend.profiler
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert model to dictionary, without the stacks"""
+        return {
+            "id": self.id,
+            "test_run_id": self.test_run_id,
+            "target": self.target,
+            "samples": self.samples,
+            "interval_ms": self.interval_ms,
+            "duration_seconds": self.duration_seconds,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
 class TestRun(Base):
     """Model representing a test run"""
 
@@ -128,7 +183,14 @@ class TestRun(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     url = Column(String, nullable=False)
     scenario = Column(Text, nullable=False)
-    status = Column(String, default="in_progress")  # in_progress, completed, failed
+    status = Column(String, default="in_progress")  # in_progress, completed, failed, cancelled
+    usage_json = Column(Text, nullable=True)  # LLM token/cost totals, see autoqa.usage
+    parent_run_id = Column(String, nullable=True, index=True)  # run_id of the original run for reruns
+    attempt = Column(Integer, nullable=True)  # 1 for the original run, 2+ for reruns
+    # Set by any API process; the process executing the run polls it
+    cancel_requested_at = Column(DateTime, nullable=True)
+    # Refreshed by the process executing the run while it is active
+    heartbeat_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -137,12 +199,40 @@ class TestRun(Base):
     test_plan = relationship("TestPlan", back_populates="test_run", uselist=False)
     test_cases = relationship("TestCase", back_populates="test_run")
     logs = relationship("TestLog", back_populates="test_run")
+    trace = relationship("TestTrace", back_populates="test_run", uselist=False)
+
+    @property
+    def usage(self) -> Optional[Dict[str, Any]]:
+        """Decoded LLM usage summary, if recorded"""
+        return json.loads(self.usage_json) if self.usage_json else None
 
 
 # Create all tables in the database
 def init_db():
     """Initialize the database by creating all tables"""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+def _add_missing_columns():
+    """
+    Add nullable columns introduced after a table was first created.
+    create_all only creates missing tables, so existing databases would
+    otherwise lack newer columns.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
 
 
 # Get a database session
@@ -0,0 +1,303 @@
+"""
+Pub/sub backends that deliver WebSocket broadcasts to every API process
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("autoqa-web")
+
+Deliver = Callable[[str, str], Awaitable[None]]
+
+# Run statuses after which no more events are expected
+FINAL_STATUSES = {"completed", "failed", "error", "cancelled", "interrupted"}
+
+
+class EventBus(abc.ABC):
+    """
+    Publishes messages per topic (a test run id) and hands every message,
+    whichever process published it, to the ``deliver`` callback given to
+    ``start``
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, topic: str, message: str):
+        """Deliver ``message`` to the subscribers of ``topic`` in every process"""
+
+
+class InMemoryEventBus(EventBus):
+    """
+    Delivers messages within the publishing process only
+    """
+
+    async def publish(self, topic: str, message: str):
+        if self._deliver is not None:
+            await self._deliver(topic, message)
+
+
+class SQLiteEventBus(EventBus):
+    """
+    Shares messages between processes on one host through an append-only
+    table in a SQLite file. Messages are delivered locally right away; other
+    processes pick them up by polling for rows newer than the last one they
+    saw. Rows older than ``retention_seconds`` are pruned.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/events.db",
+        poll_interval: float = 0.05,
+        retention_seconds: float = 60.0,
+    ):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._last_id = 0
+        self._last_prune = 0.0
+        self._poller: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, "
+            "topic TEXT NOT NULL, message TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        connection.commit()
+        return connection
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self._connection = await asyncio.to_thread(self._connect)
+        row = await asyncio.to_thread(self._query, "SELECT MAX(id) FROM events", ())
+        self._last_id = row[0][0] or 0
+        self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _query(self, sql: str, parameters: tuple) -> List[Tuple]:
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+            self._connection.commit()
+        return rows
+
+    def _insert(self, topic: str, message: str):
+        now = time.time()
+        self._query(
+            "INSERT INTO events (origin, topic, message, created) VALUES (?, ?, ?, ?)",
+            (self.origin, topic, message, now),
+        )
+        if now - self._last_prune > self.retention_seconds:
+            self._last_prune = now
+            self._query(
+                "DELETE FROM events WHERE created < ?", (now - self.retention_seconds,)
+            )
+
+    async def publish(self, topic: str, message: str):
+        if self._deliver is not None:
+            await self._deliver(topic, message)
+        if self._connection is not None:
+            await asyncio.to_thread(self._insert, topic, message)
+
+    async def _poll(self):
+        while True:
+            try:
+                rows = await asyncio.to_thread(
+                    self._query,
+                    "SELECT id, origin, topic, message FROM events "
+                    "WHERE id > ? ORDER BY id LIMIT 500",
+                    (self._last_id,),
+                )
+                for event_id, origin, topic, message in rows:
+                    self._last_id = event_id
+                    if origin != self.origin:
+                        await self._deliver(topic, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error polling event bus: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+
+class EventBatcher:
+    """
+    Coalesces the events of each run into batched frames, flushed after
+    ``flush_interval`` seconds or once ``max_events`` are pending.
+
+    Within a batch, updates of the same test case are merged and repeated
+    status updates collapse into the last one. Test case updates only carry
+    the fields that changed since the last update sent for that case, plus
+    its ``tc_id``; a subscriber that joins late, or in another process, gets
+    the complete cases first (see ``snapshot_message``). A batch holding a
+    single event is sent unwrapped; otherwise the frame is
+    {"type": "batch", "events": [...]}.
+    """
+
+    def __init__(
+        self,
+        publish: Deliver,
+        flush_interval: float = 0.05,
+        max_events: int = 50,
+    ):
+        self.publish = publish
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # Flushes started by timers, referenced until done so they are not
+        # garbage collected mid-flight
+        self._flushes: Set[asyncio.Task] = set()
+        self._sent_cases: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._sent_status: Dict[str, Dict[str, Any]] = {}
+
+    async def add(self, topic: str, event: Dict[str, Any]):
+        """Queue an event of a run, flushing when the batch is full"""
+        pending = self._pending.setdefault(topic, [])
+        pending.append(event)
+        if len(pending) >= self.max_events:
+            await self.flush(topic)
+        elif topic not in self._timers:
+            self._timers[topic] = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush_later, topic
+            )
+
+    def _flush_later(self, topic: str):
+        task = asyncio.create_task(self.flush(topic))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _coalesce(
+        self, topic: str, events: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        sent_cases = self._sent_cases.setdefault(topic, {})
+        coalesced: List[Dict[str, Any]] = []
+        cases: Dict[str, Dict[str, Any]] = {}
+        status: Optional[Dict[str, Any]] = None
+
+        for event in events:
+            data = event.get("data")
+            if event.get("type") == "test_case_update" and isinstance(data, dict):
+                tc_id = data.get("tc_id")
+                if tc_id in cases:
+                    cases[tc_id]["data"].update(data)
+                    continue
+                cases[tc_id] = {"type": "test_case_update", "data": dict(data)}
+                coalesced.append(cases[tc_id])
+            elif event.get("type") == "status_update" and isinstance(data, dict):
+                if status is not None:
+                    coalesced.remove(status)
+                status = event
+                coalesced.append(event)
+            else:
+                coalesced.append(event)
+
+        # Send only what changed since the last update of each case
+        for tc_id, event in cases.items():
+            previous = sent_cases.setdefault(tc_id, {})
+            delta = {
+                key: value
+                for key, value in event["data"].items()
+                if key == "tc_id" or previous.get(key) != value
+            }
+            previous.update(event["data"])
+            event["data"] = delta
+        if status is not None:
+            if status == self._sent_status.get(topic):
+                coalesced.remove(status)
+            self._sent_status[topic] = status
+        return coalesced
+
+    async def flush(self, topic: str):
+        """Send the pending events of a run as one frame"""
+        timer = self._timers.pop(topic, None)
+        if timer is not None:
+            timer.cancel()
+        events = self._coalesce(topic, self._pending.pop(topic, []))
+
+        finished = any(
+            event.get("type") == "status_update"
+            and isinstance(event.get("data"), dict)
+            and event["data"].get("status") in FINAL_STATUSES
+            for event in events
+        )
+        if finished:
+            self._sent_cases.pop(topic, None)
+            self._sent_status.pop(topic, None)
+
+        if not events:
+            return
+        if len(events) == 1:
+            message = json.dumps(events[0])
+        else:
+            message = json.dumps({"type": "batch", "events": events})
+        try:
+            await self.publish(topic, message)
+        except Exception as e:
+            logger.error("Error publishing events for %s: %s", topic, e)
+
+    async def flush_all(self):
+        """Send everything still pending, e.g. before shutting down"""
+        for topic in list(self._pending):
+            await self.flush(topic)
+        if self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+
+def snapshot_message(status: Dict[str, Any], cases: List[Dict[str, Any]]) -> str:
+    """
+    A frame with a run's status and its test cases in full, sent to a
+    subscriber when it joins so the deltas that follow apply to complete cases
+    """
+    events = [{"type": "status_update", "data": status}]
+    events.extend({"type": "test_case_update", "data": case} for case in cases)
+    if len(events) == 1:
+        return json.dumps(events[0])
+    return json.dumps({"type": "batch", "events": events})
+
+
+def create_event_bus() -> EventBus:
+    """
+    Event bus selected by AUTOQA_EVENT_BUS: "memory" (default) for a single
+    process, "sqlite" to share events between processes through
+    AUTOQA_EVENT_DB
+    """
+    kind = os.getenv("AUTOQA_EVENT_BUS", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteEventBus(os.getenv("AUTOQA_EVENT_DB", "data/events.db"))
+    if kind != "memory":
+        raise ValueError(f"Unknown AUTOQA_EVENT_BUS: {kind}")
+    return InMemoryEventBus()
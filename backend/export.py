@@ -0,0 +1,245 @@
+"""
+Streaming export of test runs, test cases and logs as NDJSON or CSV
+
+    python -m backend.export [--user EMAIL] [--since DATE] [--until DATE]
+                             [--format ndjson|csv] [--gzip] [-o FILE]
+
+The database is read in batches ordered by primary key and every record is
+written as soon as it is read, so memory use does not grow with the history
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .database import SessionLocal, User
+
+FORMATS = ("ndjson", "csv")
+BATCH_SIZE = 500
+
+# CSV columns: the union of the fields of all record types
+CSV_COLUMNS = [
+    "record_type",
+    "run_id",
+    "timestamp",
+    "status",
+    "url",
+    "scenario",
+    "parent_run_id",
+    "attempt",
+    "usage",
+    "tc_id",
+    "description",
+    "steps",
+    "expected_result",
+    "actual_result",
+    "notes",
+    "model_tier",
+    "duration_seconds",
+    "predicted_seconds",
+    "message",
+]
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def iter_records(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield each run created in the window, followed by its test cases and its
+    logs, one batch of runs at a time
+    """
+    after_run = 0
+    while True:
+        runs = crud.get_test_runs_after(
+            db, after_run, batch_size, user_id, since, until
+        )
+        if not runs:
+            return
+        after_run = runs[-1].id
+        run_ids = {run.id: run.run_id for run in runs}
+
+        for run in runs:
+            yield {
+                "record_type": "run",
+                "run_id": run.run_id,
+                "timestamp": _isoformat(run.created_at),
+                "status": run.status,
+                "url": run.url,
+                "scenario": run.scenario,
+                "parent_run_id": run.parent_run_id,
+                "attempt": run.attempt,
+                "usage": run.usage,
+            }
+
+        after_case = 0
+        while True:
+            cases = crud.get_test_cases_after(db, list(run_ids), after_case, batch_size)
+            if not cases:
+                break
+            after_case = cases[-1].id
+            for case in cases:
+                yield {
+                    "record_type": "test_case",
+                    "run_id": run_ids[case.test_run_id],
+                    "timestamp": _isoformat(case.executed_at),
+                    "status": case.status,
+                    "tc_id": case.tc_id,
+                    "description": case.description,
+                    "steps": json.loads(case.steps),
+                    "expected_result": case.expected_result,
+                    "actual_result": case.actual_result,
+                    "notes": case.notes,
+                    "model_tier": case.model_tier,
+                    "duration_seconds": case.duration_seconds,
+                    "predicted_seconds": case.predicted_seconds,
+                }
+
+        after_log = 0
+        while True:
+            logs = crud.get_test_logs_after(db, list(run_ids), after_log, batch_size)
+            if not logs:
+                break
+            after_log = logs[-1].id
+            for log in logs:
+                yield {
+                    "record_type": "log",
+                    "run_id": run_ids[log.test_run_id],
+                    "timestamp": _isoformat(log.timestamp),
+                    "message": log.log_text,
+                }
+
+        # Drop the batch's objects from the session so memory stays flat
+        db.expunge_all()
+
+
+def ndjson_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def csv_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, restval="")
+    writer.writeheader()
+    for record in records:
+        writer.writerow(
+            {
+                key: json.dumps(value) if isinstance(value, (list, dict)) else value
+                for key, value in record.items()
+            }
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def encode(
+    records: Iterable[Dict[str, Any]],
+    format: str = "ndjson",
+    compress: bool = False,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """
+    Serialize records as NDJSON or CSV in chunks of about ``chunk_size``
+    bytes, gzip-compressed on the fly if ``compress`` is set
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    lines = ndjson_lines(records) if format == "ndjson" else csv_lines(records)
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    pending = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size < chunk_size:
+            continue
+        chunk = b"".join(pending)
+        pending, size = [], 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def stream_export(
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: str = "ndjson",
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """
+    Export chunks read through a session of their own, which is closed once
+    the export is consumed or abandoned
+    """
+    db = SessionLocal()
+    try:
+        yield from encode(iter_records(db, user_id, since, until), format, compress)
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export AutoQA test history")
+    parser.add_argument("--user", help="Only export runs of the user with this email")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Runs created at or after this time",
+    )
+    parser.add_argument(
+        "--until", type=datetime.fromisoformat, help="Runs created before this time"
+    )
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output")
+    parser.add_argument("-o", "--output", help="Write to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    user_id = None
+    if args.user:
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == args.user).first()
+        finally:
+            db.close()
+        if user is None:
+            parser.error(f"No user with email {args.user}")
+        user_id = user.id
+
+    chunks = stream_export(user_id, args.since, args.until, args.format, args.gzip)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Admission control for browser agents based on host memory, CPU and the
+resident memory of the browsers this process has started
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import psutil
+
+from . import metrics
+
+# Share of a budget above which admissions are spaced out by a sample interval
+STAGGER_THRESHOLD = 0.8
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class ResourceGovernor:
+    """
+    Admit test case executions only while the host is under its memory, CPU
+    and browser RSS budgets, queueing the rest in arrival order.
+
+    At least ``min_agents`` executions are always admitted so runs keep
+    making progress on a busy host. While usage is within
+    ``STAGGER_THRESHOLD`` of a budget, the next admission waits a sample
+    interval so a browser that is still starting up is counted before
+    another is launched; with headroom to spare they start back to back.
+    Queued executions are woken when a slot is released or the queue moves,
+    and re-sample every ``sample_interval`` while a budget is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_memory_percent: Optional[float] = 85.0,
+        max_cpu_percent: Optional[float] = 90.0,
+        max_browser_rss_mb: Optional[float] = None,
+        max_agents: Optional[int] = None,
+        min_agents: int = 1,
+        sample_interval: float = 1.0,
+    ):
+        self.max_memory_percent = max_memory_percent
+        self.max_cpu_percent = max_cpu_percent
+        self.max_browser_rss_mb = max_browser_rss_mb
+        self.max_agents = max_agents
+        self.min_agents = min_agents
+        self.sample_interval = sample_interval
+
+        self.active = 0
+        self._waiting: Deque[object] = deque()
+        # Replaced after every wakeup so a waiter cannot miss one
+        self._changed = asyncio.Event()
+        self._sample: Dict[str, float] = {}
+        self._sampled_at = 0.0
+        self._admitted_at = 0.0
+        self._process = psutil.Process()
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self._totals = {"admitted": 0, "queued": 0, "wait_seconds": 0.0}
+
+        # Prime the CPU counter; the first reading is always 0
+        psutil.cpu_percent(interval=None)
+        metrics.AGENTS_QUEUED.set_function(lambda: len(self._waiting))
+        metrics.HOST_MEMORY_PERCENT.set_function(
+            lambda: self._sample.get("memory_percent", 0.0)
+        )
+        metrics.BROWSER_RSS_BYTES.set_function(
+            lambda: self._sample.get("browser_rss_mb", 0.0) * 1024 * 1024
+        )
+
+    @classmethod
+    def from_env(cls) -> "ResourceGovernor":
+        """
+        Budgets from AUTOQA_MAX_MEMORY_PERCENT, AUTOQA_MAX_CPU_PERCENT,
+        AUTOQA_MAX_BROWSER_RSS_MB and AUTOQA_MAX_AGENTS
+        """
+        max_agents = os.getenv("AUTOQA_MAX_AGENTS")
+        return cls(
+            max_memory_percent=_env_float("AUTOQA_MAX_MEMORY_PERCENT", 85.0),
+            max_cpu_percent=_env_float("AUTOQA_MAX_CPU_PERCENT", 90.0),
+            max_browser_rss_mb=_env_float("AUTOQA_MAX_BROWSER_RSS_MB", None),
+            max_agents=int(max_agents) if max_agents else None,
+        )
+
+    def _browser_rss_mb(self) -> float:
+        total = 0
+        for child in self._process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def sample(self) -> Dict[str, float]:
+        """
+        Current resource usage, re-sampled at most every ``sample_interval``
+        seconds and always after an admission
+        """
+        now = time.monotonic()
+        if (
+            now - self._sampled_at >= self.sample_interval
+            or self._admitted_at > self._sampled_at
+        ):
+            self._sample = {
+                "memory_percent": psutil.virtual_memory().percent,
+                "cpu_percent": psutil.cpu_percent(interval=None),
+                "browser_rss_mb": round(self._browser_rss_mb(), 1),
+            }
+            self._sampled_at = now
+        return self._sample
+
+    def _budgets(self) -> List[Tuple[str, Optional[float]]]:
+        return [
+            ("memory_percent", self.max_memory_percent),
+            ("cpu_percent", self.max_cpu_percent),
+            ("browser_rss_mb", self.max_browser_rss_mb),
+        ]
+
+    def _near_limit(self, sample: Dict[str, float]) -> bool:
+        """Whether any usage is within STAGGER_THRESHOLD of its budget"""
+        return any(
+            limit is not None and sample[key] >= limit * STAGGER_THRESHOLD
+            for key, limit in self._budgets()
+        )
+
+    def _blocked_by(self) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Why a new execution cannot start right now, or None if it can, and
+        the seconds after which to check again (None: when a slot is released)
+        """
+        if self.active < self.min_agents:
+            return None, None
+        if self.max_agents is not None and self.active >= self.max_agents:
+            return f"{self.active} agents running (limit {self.max_agents})", None
+        sample = self.sample()
+        if (
+            self.max_memory_percent is not None
+            and sample["memory_percent"] >= self.max_memory_percent
+        ):
+            return (
+                f"memory at {sample['memory_percent']}% "
+                f"(limit {self.max_memory_percent}%)"
+            ), self.sample_interval
+        if (
+            self.max_cpu_percent is not None
+            and sample["cpu_percent"] >= self.max_cpu_percent
+        ):
+            return (
+                f"CPU at {sample['cpu_percent']}% (limit {self.max_cpu_percent}%)"
+            ), self.sample_interval
+        if (
+            self.max_browser_rss_mb is not None
+            and sample["browser_rss_mb"] >= self.max_browser_rss_mb
+        ):
+            return (
+                f"browsers using {sample['browser_rss_mb']} MB "
+                f"(limit {self.max_browser_rss_mb} MB)"
+            ), self.sample_interval
+        # Close to a budget, give the last admitted browser time to show up in
+        # the next sample before starting another
+        since_admission = time.monotonic() - self._admitted_at
+        if since_admission < self.sample_interval and self._near_limit(sample):
+            return (
+                "waiting for the last admitted agent to start",
+                self.sample_interval - since_admission,
+            )
+        return None, None
+
+    def _notify(self):
+        """Wake the queued executions to check again"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _record(self, label: str, decision: str, reason: Optional[str], waited: float):
+        metrics.ADMISSION_DECISIONS.labels(decision).inc()
+        self.decisions.append(
+            {
+                "at": time.time(),
+                "label": label,
+                "decision": decision,
+                "reason": reason,
+                "wait_seconds": round(waited, 3),
+                "active": self.active,
+                "queued": len(self._waiting),
+                **self._sample,
+            }
+        )
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        label: str = "",
+        on_queued: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> AsyncIterator[float]:
+        """
+        Wait until an execution may start and hold its slot for the block.
+        Yields the seconds spent queued. ``on_queued`` is awaited once with
+        the reason if the execution has to wait.
+        """
+        ticket = object()
+        start = time.monotonic()
+        self._waiting.append(ticket)
+        queued_reason = None
+        try:
+            while True:
+                changed = self._changed
+                if self._waiting[0] is ticket:
+                    reason, retry = self._blocked_by()
+                else:
+                    reason, retry = "behind earlier executions", None
+                if reason is None:
+                    break
+                if queued_reason is None:
+                    queued_reason = reason
+                    self._totals["queued"] += 1
+                    self._record(label, "queued", reason, 0.0)
+                    if on_queued is not None:
+                        await on_queued(reason)
+                try:
+                    await asyncio.wait_for(changed.wait(), retry)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiting.remove(ticket)
+            self._notify()
+
+        waited = time.monotonic() - start
+        self.active += 1
+        self._admitted_at = time.monotonic()
+        self._totals["admitted"] += 1
+        self._totals["wait_seconds"] += waited
+        metrics.ADMISSION_WAIT.observe(waited)
+        self._record(label, "admitted", queued_reason, waited)
+        try:
+            yield waited
+        finally:
+            self.active -= 1
+            self._notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Budgets, current usage and recent admission decisions"""
+        admitted = self._totals["admitted"]
+        return {
+            "budgets": {
+                "max_memory_percent": self.max_memory_percent,
+                "max_cpu_percent": self.max_cpu_percent,
+                "max_browser_rss_mb": self.max_browser_rss_mb,
+                "max_agents": self.max_agents,
+                "min_agents": self.min_agents,
+            },
+            "usage": dict(self.sample()),
+            "active": self.active,
+            "queued": len(self._waiting),
+            "admitted_total": admitted,
+            "queued_total": self._totals["queued"],
+            "mean_wait_seconds": (
+                round(self._totals["wait_seconds"] / admitted, 3) if admitted else 0.0
+            ),
+            "recent_decisions": list(self.decisions),
+        }
@@ -0,0 +1,180 @@
+"""
+Logging through a queue drained by a background thread, as JSON records
+carrying the current run and request ids
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Set per API request and per test run task; copied onto every record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+run_id_var: ContextVar[Optional[str]] = ContextVar("run_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the run and request ids onto records. Runs in the logging task,
+    before the record is queued, so it sees that task's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.run_id = run_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in ``rate`` records below WARNING for each configured logger
+    (and its children), so chatty loggers cannot flood the queue. Warnings
+    and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self._counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "SamplingFilter":
+        """
+        Rates from AUTOQA_LOG_SAMPLING, e.g. "browser_use=10,autoqa-web=5"
+        """
+        rates = {}
+        for item in os.getenv("AUTOQA_LOG_SAMPLING", "").split(","):
+            name, _, rate = item.partition("=")
+            if name.strip() and rate.strip():
+                rates[name.strip()] = max(int(rate), 1)
+        return cls(rates)
+
+    def _rate(self, name: str) -> int:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        count = self._counts.get(record.name, 0)
+        self._counts[record.name] = count + 1
+        return count % rate == 0
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line with the timestamp, level, logger, message, the
+    run and request ids, and any fields passed through ``extra``
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments and render the traceback while the objects they
+        # refer to are still in their current state; the JSON formatting
+        # itself happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background thread. Records
+    are written to stderr as JSON, or as text with AUTOQA_LOG_FORMAT=text, at
+    AUTOQA_LOG_LEVEL (default INFO). Safe to call more than once; queued
+    records are written out when the process exits.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        stream = logging.StreamHandler(sys.stderr)
+        if os.getenv("AUTOQA_LOG_FORMAT", "json").lower() == "text":
+            stream.setFormatter(
+                logging.Formatter(
+                    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+                    " [run=%(run_id)s request=%(request_id)s]"
+                )
+            )
+        else:
+            stream.setFormatter(JSONFormatter())
+
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(SamplingFilter.from_env())
+        handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level or os.getenv("AUTOQA_LOG_LEVEL", "INFO").upper())
+
+        # Send uvicorn's loggers through the queue as well
+        for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers = []
+            uvicorn_logger.propagate = True
+
+        _listener = logging.handlers.QueueListener(
+            records, stream, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
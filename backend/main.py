@@ -2,7 +2,6 @@
 FastAPI backend for AutoQA Web Application
 """
 
-import os
 from dotenv import load_dotenv
 from fastapi import (
     FastAPI,
@@ -11,22 +10,29 @@ from fastapi import (
     WebSocketDisconnect,
     HTTPException,
     Depends,
+    Query,
     Request,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel, HttpUrl
-import uvicorn
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from datetime import datetime, timedelta
 import json
+import time
 
 # Import database and CRUD operations
-from .database import init_db, get_db, TestRun, TestPlan, TestCase, TestLog, User
+from .database import init_db, get_db, engine, TestRun, TestPlan, TestCase, TestLog, User
 from sqlalchemy.orm import Session
 from . import crud
+from . import metrics
+from .events import EventBatcher, EventBus, create_event_bus, snapshot_message
+from .export import FORMATS, stream_export
+from .logs import configure_logging, new_request_id, request_id_var
+from .profiler import PROFILE_HEADER, PROFILE_ID_HEADER, PROFILER
+from .watchdog import LoopWatchdog
 
 # Import AutoQA service
 from .autoqa_service import AutoQAService
@@ -36,8 +42,11 @@ from .auth import (
     Token,
     UserResponse,
     create_access_token,
+    get_admin_user,
     get_current_active_user,
     get_current_user,
+    get_user_from_token,
+    is_admin,
     get_user_by_google_id,
     create_user,
     exchange_code_for_token,
@@ -46,6 +55,10 @@ from .auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
+# Setup logging: JSON records written by a background thread
+configure_logging()
+logger = logging.getLogger("autoqa-web")
+
 # Create FastAPI app
 app = FastAPI(
     title="AutoQA Web API",
@@ -59,7 +72,7 @@ app.add_middleware(
     allow_origins=["http://localhost:3000"],  # Specific origin for development
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["X-Requested-With", "Content-Type", "Authorization"],
+    allow_headers=["X-Requested-With", "Content-Type", "Authorization", PROFILE_HEADER],
     expose_headers=["*"],
 )
 
@@ -68,20 +81,136 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     init_db()
+    metrics.instrument_engine(engine)
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    await manager.bus.start(manager.broadcast)
+
+
+# Opt-in detection of blocking calls in coroutines (AUTOQA_LOOP_WATCHDOG=1)
+watchdog = LoopWatchdog.from_env()
+
+
+@app.on_event("startup")
+async def start_watchdog():
+    if watchdog is not None:
+        await watchdog.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Checkpoint runs first so their final events still reach the bus
+    if autoqa_service is not None:
+        await autoqa_service.checkpoint_active_runs()
+    await manager.batcher.flush_all()
+    await manager.bus.stop()
+    if watchdog is not None:
+        await watchdog.stop()
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag the request's log records with its X-Request-ID, generating one if missing"""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency and status per route template"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUEST_DURATION.labels(request.method, path).observe(
+            time.perf_counter() - start
+        )
+        metrics.HTTP_REQUESTS.labels(request.method, path, status_code).inc()
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Profile requests sent by an admin with the profile header"""
+    if PROFILE_HEADER not in request.headers:
+        return await call_next(request)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    db = next(get_db())
+    try:
+        user = get_user_from_token(db, token) if scheme.lower() == "bearer" else None
+        if not is_admin(user):
+            return JSONResponse(
+                status_code=403,
+                content={"detail": "Admin access required to profile requests"},
+            )
+        with PROFILER.attach(f"{request.method} {request.url.path}") as profile:
+            response = await call_next(request)
+        db_profile = crud.save_profile(
+            db,
+            profile.target,
+            profile.samples,
+            profile.interval * 1000,
+            profile.duration,
+            profile.folded(),
+        )
+        response.headers[PROFILE_ID_HEADER] = str(db_profile.id)
+        return response
+    finally:
+        db.close()
 
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
-logger = logging.getLogger("autoqa-web")
 
 
 # WebSocket connection manager
+def _tag_message(test_run_id: str, message: str) -> str:
+    """Add the run id to a serialized event without decoding it again"""
+    if message.startswith("{") and message.strip() != "{}":
+        return '{"run_id": %s, %s' % (json.dumps(test_run_id), message[1:])
+    return json.dumps({"run_id": test_run_id, "data": json.loads(message)})
+
+
+def _run_snapshot(db: Session, db_test_run: TestRun) -> str:
+    """The current status and test cases of a run, for a subscriber that just joined"""
+    status = {
+        "status": db_test_run.status,
+        "message": f"Current status: {db_test_run.status}",
+    }
+    cases = [
+        {
+            "tc_id": tc.tc_id,
+            "description": tc.description,
+            "status": tc.status,
+            "actual_result": tc.actual_result,
+            "notes": tc.notes,
+        }
+        for tc in crud.get_test_cases(db, db_test_run.id)
+    ]
+    return snapshot_message(status, cases)
+
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, bus: Optional[EventBus] = None):
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Multiplexed sockets: run id -> sockets, and socket -> run ids
+        self.subscribers: Dict[str, Set[WebSocket]] = {}
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}
+        # Carries broadcasts to the connections held by every API process
+        self.bus = bus or create_event_bus()
+        # Coalesces each run's events into batched frames before publishing
+        self.batcher = EventBatcher(self.bus.publish)
 
     async def connect(self, websocket: WebSocket, test_run_id: str):
         await websocket.accept()
@@ -96,35 +225,65 @@ class ConnectionManager:
             if not self.active_connections[test_run_id]:
                 del self.active_connections[test_run_id]
 
-    async def broadcast(self, test_run_id: str, message: str):
-        """Send a message to all connected clients for a specific test run"""
-        if test_run_id in self.active_connections:
-            # Create a copy of the connections list to avoid modification during iteration
-            connections = self.active_connections[test_run_id].copy()
-            closed_connections = []
-
-            for connection in connections:
-                try:
-                    await connection.send_text(message)
-                except RuntimeError as e:
-                    # Connection already closed
-                    if "Cannot call 'send' once a close message has been sent" in str(
-                        e
-                    ):
-                        logger.warning(
-                            f"WebSocket already closed for test run {test_run_id}"
-                        )
-                        closed_connections.append(connection)
-                    else:
-                        logger.error(f"Error sending message to WebSocket: {e}")
-                except Exception as e:
-                    logger.error(f"Unexpected error sending WebSocket message: {e}")
+    def subscribe(self, websocket: WebSocket, test_run_ids: List[str]):
+        """Deliver events of the given runs to a multiplexed socket"""
+        runs = self.subscriptions.setdefault(websocket, set())
+        for test_run_id in test_run_ids:
+            runs.add(test_run_id)
+            self.subscribers.setdefault(test_run_id, set()).add(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, test_run_ids: Optional[List[str]] = None):
+        """Stop delivering events of the given runs, or all runs, to a multiplexed socket"""
+        runs = self.subscriptions.get(websocket, set())
+        for test_run_id in list(runs if test_run_ids is None else test_run_ids):
+            runs.discard(test_run_id)
+            sockets = self.subscribers.get(test_run_id)
+            if sockets is not None:
+                sockets.discard(websocket)
+                if not sockets:
+                    del self.subscribers[test_run_id]
+        if test_run_ids is None:
+            self.subscriptions.pop(websocket, None)
+
+    async def _send(
+        self, connections: List[WebSocket], message: str, test_run_id: str
+    ) -> List[WebSocket]:
+        """Send a message to each connection and return the ones that are closed"""
+        closed_connections = []
+        for connection in connections:
+            try:
+                await connection.send_text(message)
+            except RuntimeError as e:
+                # Connection already closed
+                if "Cannot call 'send' once a close message has been sent" in str(e):
+                    logger.warning(
+                        "WebSocket already closed for test run %s", test_run_id
+                    )
                     closed_connections.append(connection)
+                else:
+                    logger.error("Error sending message to WebSocket: %s", e)
+            except Exception as e:
+                logger.error("Unexpected error sending WebSocket message: %s", e)
+                closed_connections.append(connection)
+        return closed_connections
 
-            # Remove closed connections
-            for connection in closed_connections:
+    async def broadcast(self, test_run_id: str, message: str):
+        """Send a message to all connected clients for a specific test run"""
+        # Copy the connection lists to avoid modification during iteration
+        connections = list(self.active_connections.get(test_run_id, ()))
+        subscribers = list(self.subscribers.get(test_run_id, ()))
+        if not connections and not subscribers:
+            return
+        with metrics.BROADCAST_DURATION.time():
+            for connection in await self._send(connections, message, test_run_id):
                 self.disconnect(connection, test_run_id)
 
+            if subscribers:
+                # Tagged once, then shared by every multiplexed socket
+                tagged = _tag_message(test_run_id, message)
+                for connection in await self._send(subscribers, tagged, test_run_id):
+                    self.unsubscribe(connection)
+
     async def safe_broadcast(
         self, test_run_id: str, message_data: dict, message_type: str = None
     ):
@@ -137,32 +296,39 @@ class ConnectionManager:
             message_type: Message type (if not provided in message_data)
         """
         try:
-            # Prepare the message
+            # Prepare the event
             if (
                 isinstance(message_data, dict)
                 and "type" not in message_data
                 and message_type
             ):
-                message = json.dumps({"type": message_type, "data": message_data})
-            elif isinstance(message_data, dict) and "type" in message_data:
-                message = json.dumps(message_data)
+                event = {"type": message_type, "data": message_data}
             else:
-                message = json.dumps(message_data)
+                event = message_data
 
-            # Broadcast the message
-            await self.broadcast(test_run_id, message)
+            # Batch the event; the bus delivers each batch to broadcast in every process
+            await self.batcher.add(test_run_id, event)
         except Exception as e:
-            logger.error(f"Error in safe_broadcast: {e}")
+            logger.error("Error in safe_broadcast: %s", e)
             # Continue execution even if broadcast fails
 
 
 manager = ConnectionManager()
+metrics.WEBSOCKET_CONNECTIONS.set_function(
+    lambda: sum(len(connections) for connections in manager.active_connections.values())
+    + len(manager.subscriptions)
+)
 
 
 # Pydantic models for request/response validation
 class TestRunRequest(BaseModel):
     url: HttpUrl
     scenario: str
+    token_budget: Optional[int] = Field(None, gt=0)  # Stop executing cases once exceeded
+    max_steps: Optional[int] = Field(None, gt=0)  # Per test case agent steps
+    timeout_seconds: Optional[float] = Field(None, gt=0)  # Per test case wall clock
+    planning_max_steps: Optional[int] = Field(None, gt=0)
+    planning_timeout_seconds: Optional[float] = Field(None, gt=0)
 
 
 class TestRunResponse(BaseModel):
@@ -171,6 +337,9 @@ class TestRunResponse(BaseModel):
     scenario: str
     status: str
     created_at: datetime
+    usage: Optional[Dict[str, Any]] = None
+    parent_run_id: Optional[str] = None  # Original run, set on reruns
+    attempt: Optional[int] = None
 
 
 class TestCaseResponse(BaseModel):
@@ -181,6 +350,7 @@ class TestCaseResponse(BaseModel):
     actual_result: Optional[str] = None
     status: str
     notes: Optional[str] = None
+    model_tier: Optional[str] = None
     executed_at: Optional[datetime] = None
 
 
@@ -202,12 +372,26 @@ class TestLogResponse(BaseModel):
 autoqa_service = None
 
 
+def get_autoqa_service() -> AutoQAService:
+    """Return the process-wide AutoQA service, creating it on first use"""
+    global autoqa_service
+    if autoqa_service is None:
+        autoqa_service = AutoQAService(manager)
+    return autoqa_service
+
+
 # API Routes
 @app.get("/")
 async def root():
     return {"message": "Welcome to AutoQA Web API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Expose process metrics in Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Auth Routes
 @app.get("/auth/google")
 async def google_auth():
@@ -220,7 +404,6 @@ async def google_auth():
         "scope=openid%20email%20profile&"
         f"redirect_uri={GOOGLE_REDIRECT_URI}"
     )
-    print(f"Redirecting to Google OAuth with client ID: {google_auth_url=}")
     return RedirectResponse(google_auth_url)
 
 
@@ -246,8 +429,8 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
                 google_id=google_user.id,
                 picture=google_user.picture,
             )
-            logger.info(f"Created new user: {user.email} with ID: {user.id}")
-        logger.info(f"Logging in user: {user.email} with ID: {user.id}")
+            logger.info("Created new user with ID: %s", user.id)
+        logger.info("Logging in user with ID: %s", user.id)
 
         # Create JWT token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -255,7 +438,6 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
             data={"sub": str(user.id)}, expires_delta=access_token_expires
         )
 
-        print("succesfully authenticated")
         # Redirect to frontend with token
         return RedirectResponse(f"http://localhost:3000/auth/success?token={jwt_token}")
 
@@ -278,6 +460,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def create_test_run(
     test_run: TestRunRequest,
     background_tasks: BackgroundTasks,
+    profile: bool = Query(False, description="Record a sampling profile of the run (admins only)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
@@ -285,6 +468,9 @@ async def create_test_run(
     Create a new test run with the given URL and scenario.
     The test will be executed in the background.
     """
+    if profile and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required to profile runs")
+
     # Create test run in database
     db_test_run = crud.create_test_run(
         db, current_user.id, str(test_run.url), test_run.scenario
@@ -296,6 +482,14 @@ async def create_test_run(
         test_run_id=db_test_run.run_id,
         url=str(test_run.url),
         scenario=test_run.scenario,
+        token_budget=test_run.token_budget,
+        limits={
+            "max_steps": test_run.max_steps,
+            "timeout_seconds": test_run.timeout_seconds,
+            "planning_max_steps": test_run.planning_max_steps,
+            "planning_timeout_seconds": test_run.planning_timeout_seconds,
+        },
+        profile=profile,
     )
 
     return {
@@ -353,6 +547,125 @@ async def get_test_run(
         "scenario": db_test_run.scenario,
         "status": db_test_run.status,
         "created_at": db_test_run.created_at,
+        "usage": db_test_run.usage,
+        "parent_run_id": db_test_run.parent_run_id,
+        "attempt": db_test_run.attempt,
+    }
+
+
+@app.post("/api/test-runs/{test_run_id}/cancel", response_model=TestRunResponse)
+async def cancel_test_run(
+    test_run_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Cancel a running test run. The in-flight agent is stopped, its browser is
+    released, no further test cases are started and partial results are kept.
+    """
+    db_test_run = crud.get_test_run(db, test_run_id)
+    if not db_test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    # Check if test run belongs to current user
+    if db_test_run.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    if db_test_run.status in ("completed", "failed", "cancelled"):
+        raise HTTPException(
+            status_code=409, detail=f"Test run already {db_test_run.status}"
+        )
+
+    service = get_autoqa_service()
+    active_run = service.active_runs.get(test_run_id)
+    if active_run and service.cancel_run(test_run_id):
+        # Give the run a moment to persist its partial results
+        await asyncio.wait([active_run["task"]], timeout=10)
+    elif service.run_is_live(db_test_run):
+        # Executed by another worker, which polls for the flag and cancels it
+        crud.request_test_run_cancel(db, test_run_id)
+        await service.wait_until_finished(db, test_run_id, timeout=10)
+    else:
+        # Not started yet, or the process running it is gone: mark it directly
+        await service.mark_cancelled(db, test_run_id)
+
+    db.expire_all()
+    db_test_run = crud.get_test_run(db, test_run_id)
+    return {
+        "id": db_test_run.run_id,
+        "url": db_test_run.url,
+        "scenario": db_test_run.scenario,
+        "status": db_test_run.status,
+        "created_at": db_test_run.created_at,
+        "usage": db_test_run.usage,
+    }
+
+
+RERUNNABLE_STATUSES = {"PASS", "FAIL", "ERROR", "TIMEOUT", "SKIPPED", "CANCELLED"}
+
+
+@app.post("/api/test-runs/{test_run_id}/rerun", response_model=TestRunResponse)
+async def rerun_test_run(
+    test_run_id: str,
+    status: str = Query("FAIL,ERROR", description="Comma separated test case statuses to re-execute"),
+    concurrency: int = Query(3, gt=0, le=10),
+    token_budget: Optional[int] = Query(None, gt=0),
+    profile: bool = Query(False, description="Record a sampling profile of the rerun (admins only)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Re-execute the test cases of a finished run that ended with one of the
+    given statuses. The stored test plan is reused, so no planning phase runs,
+    and the results are recorded as a new attempt linked to the original run.
+    """
+    db_test_run = crud.get_test_run(db, test_run_id)
+    if not db_test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    # Check if test run belongs to current user
+    if db_test_run.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    statuses = {s.strip().upper() for s in status.split(",") if s.strip()}
+    unknown = statuses - RERUNNABLE_STATUSES
+    if not statuses or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status filter, expected any of {sorted(RERUNNABLE_STATUSES)}",
+        )
+
+    if profile and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required to profile runs")
+
+    if get_autoqa_service().run_is_live(db_test_run):
+        raise HTTPException(status_code=409, detail="Test run is still in progress")
+
+    selected = [
+        tc for tc in crud.get_test_cases(db, db_test_run.id) if tc.status in statuses
+    ]
+    if not selected:
+        raise HTTPException(
+            status_code=400, detail="No test cases match the status filter"
+        )
+
+    rerun = crud.create_rerun(db, db_test_run, selected)
+    get_autoqa_service().start_rerun(
+        rerun.run_id,
+        rerun.url,
+        token_budget=token_budget,
+        concurrency=concurrency,
+        profile=profile,
+    )
+
+    return {
+        "id": rerun.run_id,
+        "url": rerun.url,
+        "scenario": rerun.scenario,
+        "status": rerun.status,
+        "created_at": rerun.created_at,
+        "parent_run_id": rerun.parent_run_id,
+        "attempt": rerun.attempt,
     }
 
 
@@ -383,6 +696,7 @@ async def get_test_cases(
             "actual_result": tc.actual_result,
             "status": tc.status,
             "notes": tc.notes,
+            "model_tier": tc.model_tier,
             "executed_at": tc.executed_at,
         }
         for tc in test_cases
@@ -418,6 +732,130 @@ async def get_test_logs(
     ]
 
 
+@app.get("/api/test-runs/{test_run_id}/trace")
+async def get_test_trace(
+    test_run_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the span trace recorded for a specific test run.
+    """
+    db_test_run = crud.get_test_run(db, test_run_id)
+    if not db_test_run:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    # Check if test run belongs to current user
+    if db_test_run.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    db_test_trace = crud.get_test_trace(db, db_test_run.id)
+    if not db_test_trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+
+    return db_test_trace.to_dict()
+
+
+@app.get("/api/export")
+async def export_history(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    since: Optional[datetime] = Query(None, description="Runs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Runs created before this time"),
+    gzip: bool = False,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream the current user's test runs with their test cases and logs as
+    NDJSON or CSV, optionally gzip-compressed. Records are read in batches
+    and sent as they are read, so any amount of history can be exported.
+    """
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid format, expected one of {list(FORMATS)}"
+        )
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"autoqa-export.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(current_user.id, since, until, format, gzip),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+@app.get("/api/governor")
+async def get_governor(current_user: User = Depends(get_admin_user)):
+    """
+    Get the resource governor's budgets, current host usage and recent
+    admission decisions. Admins only, since it describes the host.
+    """
+    return get_autoqa_service().governor.stats()
+
+
+@app.get("/api/diagnostics/loop-lag")
+async def get_loop_lag(
+    limit: int = Query(10, gt=0, le=50),
+    current_user: User = Depends(get_admin_user),
+):
+    """
+    Get event loop stall totals and the call sites that blocked the loop
+    the longest, with the stack of their last stall. Admins only, since the
+    stacks reveal source paths.
+    """
+    if watchdog is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Loop watchdog is disabled; set AUTOQA_LOOP_WATCHDOG=1 to enable it",
+        )
+    return watchdog.summary(limit)
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(
+    run_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """
+    List stored request and run profiles, newest first, optionally only those
+    of one test run.
+    """
+    test_run_id = None
+    if run_id is not None:
+        db_test_run = crud.get_test_run(db, run_id)
+        if not db_test_run:
+            raise HTTPException(status_code=404, detail="Test run not found")
+        test_run_id = db_test_run.id
+    return [p.to_dict() for p in crud.get_profiles(db, test_run_id, skip, limit)]
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: int,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Download a profile as collapsed stacks, ready for flamegraph.pl or
+    speedscope.
+    """
+    db_profile = crud.get_profile(db, profile_id)
+    if not db_profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=db_profile.folded,
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'
+        },
+    )
+
+
 @app.websocket("/ws/test-runs/{test_run_id}")
 async def websocket_endpoint(
     websocket: WebSocket, test_run_id: str, db: Session = Depends(get_db)
@@ -435,18 +873,9 @@ async def websocket_endpoint(
     # Connect to WebSocket
     await manager.connect(websocket, test_run_id)
 
-    # Send initial status
-    await websocket.send_text(
-        json.dumps(
-            {
-                "type": "status_update",
-                "data": {
-                    "status": db_test_run.status,
-                    "message": f"Current status: {db_test_run.status}",
-                },
-            }
-        )
-    )
+    # Send the current status and the test cases in full; later updates of a
+    # test case only carry the fields that changed
+    await websocket.send_text(_run_snapshot(db, db_test_run))
 
     try:
         while True:
@@ -456,30 +885,113 @@ async def websocket_endpoint(
         manager.disconnect(websocket, test_run_id)
 
 
-# Background task for running AutoQA
-async def run_autoqa_test(test_run_id: str, url: str, scenario: str):
+# Most runs a single multiplexed socket may watch
+MAX_SUBSCRIPTIONS = 200
+
+
+@app.websocket("/ws/subscriptions")
+async def subscriptions_endpoint(
+    websocket: WebSocket, token: Optional[str] = None, db: Session = Depends(get_db)
+):
     """
-    Run the AutoQA test in the background and send updates via WebSocket.
+    Multiplexed WebSocket for watching many test runs over one connection.
+    Authenticate with ?token=<access token>, then send
+    {"action": "subscribe" | "unsubscribe", "run_ids": [...]}. Events of
+    subscribed runs arrive as {"run_id": ..., "type": ..., "data": ...},
+    starting with a snapshot of each run's status and test cases.
     """
-    global autoqa_service
+    try:
+        user = await get_current_user(token, db)
+    except HTTPException:
+        user = None
+    if user is None:
+        await websocket.close(code=1008, reason="Not authenticated")
+        return
 
-    # Initialize AutoQA service if not already done
-    if autoqa_service is None:
-        autoqa_service = AutoQAService(manager)
-    # get GEMINI_API_KEY from .env file
+    await websocket.accept()
+
+    async def reply(message_type: str, data: Dict[str, Any]):
+        await websocket.send_text(json.dumps({"type": message_type, "data": data}))
+
+    try:
+        while True:
+            try:
+                request = json.loads(await websocket.receive_text())
+                action = request.get("action")
+                run_ids = [str(run_id) for run_id in request.get("run_ids", [])]
+            except (ValueError, AttributeError, TypeError):
+                await reply("error", {"message": "Invalid subscription request"})
+                continue
+
+            if action == "subscribe":
+                watched = manager.subscriptions.get(websocket, set())
+                room = max(MAX_SUBSCRIPTIONS - len(watched), 0)
+                runs = crud.get_user_test_runs_by_ids(db, user.id, run_ids[:room])
+                manager.subscribe(websocket, [run.run_id for run in runs])
+                statuses = {run.run_id: run.status for run in runs}
+                await reply(
+                    "subscribed",
+                    {
+                        "runs": statuses,
+                        "denied": [
+                            run_id for run_id in run_ids if run_id not in statuses
+                        ],
+                    },
+                )
+                for run in runs:
+                    await websocket.send_text(
+                        _tag_message(run.run_id, _run_snapshot(db, run))
+                    )
+            elif action == "unsubscribe":
+                manager.unsubscribe(websocket, run_ids)
+                await reply("unsubscribed", {"run_ids": run_ids})
+            elif action == "ping":
+                await reply("pong", {})
+            else:
+                await reply("error", {"message": f"Unknown action: {action}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Also on errors, so broadcasts stop trying to reach the socket
+        manager.unsubscribe(websocket)
+
+
+# Background task for running AutoQA
+async def run_autoqa_test(
+    test_run_id: str,
+    url: str,
+    scenario: str,
+    token_budget: Optional[int] = None,
+    limits: Optional[Dict[str, Any]] = None,
+    profile: bool = False,
+):
+    """
+    Start the AutoQA test as a tracked task that sends updates via WebSocket.
+    """
+    # GEMINI_API_KEY is read from the .env file
     load_dotenv()
+    logger.info("Running AutoQA test for run_id: %s", test_run_id)
 
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    # Log gemini api key from .env file
-    logger.info(
-        "Running AutoQA test for run_id: %s gemini api key: %s",
+    # Run the test as its own task so it can be cancelled
+    get_autoqa_service().start_run(
         test_run_id,
-        gemini_api_key,
+        url,
+        scenario,
+        token_budget=token_budget,
+        limits=limits,
+        profile=profile,
     )
 
-    # Run the test
-    await autoqa_service.run_test(test_run_id, url, scenario)
-
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    import uvicorn
+
+    # permessage-deflate compresses WebSocket frames for clients that offer it
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws="websockets",
+        ws_per_message_deflate=True,
+    )
@@ -0,0 +1,328 @@
+"""
+In-process metrics registry with Prometheus text exposition
+"""
+
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    600.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    """Base class handling names, help text and labelled children."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+
+    def labels(self, *values: str, **kwargs: str):
+        """Return the child metric for the given label values."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> "_Metric":
+        """Return an unlabelled metric of the same kind for one label set."""
+
+    @abc.abstractmethod
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        """Return (suffix, extra label, value) tuples for one child."""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        if self.labelnames:
+            children = list(self._children.items())
+        else:
+            children = [((), self)]
+        for values, child in children:
+            for suffix, extra, value in child._samples():
+                labels = _format_labels(self.labelnames, values, extra)
+                lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+
+    def _new_child(self) -> "Counter":
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def _samples(self):
+        return [("", "", self._value)]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self) -> "Gauge":
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value lazily on every scrape instead of on every change."""
+        self._function = function
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """Increment while the block runs."""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def _samples(self):
+        value = self._function() if self._function else self._value
+        return [("", "", value)]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall-clock duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def _samples(self):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+            cumulative += count
+            samples.append(("_bucket", f'le="{_format_value(bound)}"', cumulative))
+        samples.append(("_sum", "", self._sum))
+        samples.append(("_count", "", cumulative))
+        return samples
+
+
+class Registry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "autoqa_http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "autoqa_http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+RUNS_ACTIVE = REGISTRY.gauge("autoqa_runs_active", "Test runs currently executing")
+RUNS_BACKLOG = REGISTRY.gauge(
+    "autoqa_runs_backlog",
+    "Test runs waiting for the resource governor to admit their first browser",
+)
+RUN_PHASE_DURATION = REGISTRY.histogram(
+    "autoqa_run_phase_duration_seconds", "Duration of test run phases", ("phase",)
+)
+TEST_CASE_OUTCOMES = REGISTRY.counter(
+    "autoqa_test_case_outcomes_total", "Executed test cases by outcome", ("status",)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "autoqa_db_query_duration_seconds",
+    "Database statement latency",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+BROADCAST_DURATION = REGISTRY.histogram(
+    "autoqa_broadcast_duration_seconds",
+    "Time to fan a message out to WebSocket subscribers",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+WEBSOCKET_CONNECTIONS = REGISTRY.gauge(
+    "autoqa_websocket_connections", "Open WebSocket connections"
+)
+AGENTS_ACTIVE = REGISTRY.gauge(
+    "autoqa_agents_active", "Browser agents currently running", ("phase",)
+)
+AGENTS_QUEUED = REGISTRY.gauge(
+    "autoqa_agents_queued", "Test case executions waiting for host resources"
+)
+ADMISSION_DECISIONS = REGISTRY.counter(
+    "autoqa_admission_decisions_total",
+    "Resource governor decisions for browser starts",
+    ("decision",),
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "autoqa_admission_wait_seconds", "Time test case executions waited for admission"
+)
+HOST_MEMORY_PERCENT = REGISTRY.gauge(
+    "autoqa_host_memory_percent", "Host memory in use at the last governor sample"
+)
+BROWSER_RSS_BYTES = REGISTRY.gauge(
+    "autoqa_browser_rss_bytes",
+    "Resident memory of browser processes started by the backend",
+)
+LOOP_LAG = REGISTRY.histogram(
+    "autoqa_event_loop_lag_seconds",
+    "Delay of the watchdog heartbeat behind its schedule",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = REGISTRY.counter(
+    "autoqa_event_loop_stalls_total",
+    "Event loop stalls over the watchdog threshold by blocking call site",
+    ("location",),
+)
+
+
+def instrument_engine(engine):
+    """
+    Time every SQL statement executed through the given SQLAlchemy engine
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("autoqa_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["autoqa_query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - start)
@@ -0,0 +1,150 @@
+"""
+On-demand sampling profiler for single requests and test runs
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Request header that asks for a profile of that request (admins only)
+PROFILE_HEADER = "X-AutoQA-Profile"
+# Response header carrying the id of the stored profile
+PROFILE_ID_HEADER = "X-AutoQA-Profile-Id"
+
+MAX_DEPTH = 128
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class Profile:
+    """
+    Stack samples of the tasks profiled for one target, in the collapsed
+    "frame;frame;frame count" format read by flamegraph.pl and speedscope
+    """
+
+    def __init__(self, target: str, interval: float):
+        self.target = target
+        self.interval = interval
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.stacks: Counter = Counter()
+        self.started = time.monotonic()
+        self.duration = 0.0
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack every ``interval`` seconds while a
+    profile is attached, crediting each sample to the profiles whose tasks
+    were running. Tasks created by a profiled task are profiled too.
+
+    Nothing runs while no profile is attached: the sampling thread and the
+    loop's task factory only exist for the duration of a profile. Profiles
+    attached from another event loop while one is running are rejected.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._profiles: List[Profile] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._previous_factory = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @contextmanager
+    def attach(self, target: str) -> Iterator[Profile]:
+        """Profile the current task and the tasks it creates within the block"""
+        profile = Profile(target, self.interval)
+        profile.tasks.add(asyncio.current_task())
+        with self._lock:
+            if self._profiles and self._loop is not asyncio.get_running_loop():
+                raise RuntimeError("Already profiling another event loop")
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._start()
+        try:
+            yield profile
+        finally:
+            profile.duration = time.monotonic() - profile.started
+            with self._lock:
+                self._profiles.remove(profile)
+                thread = self._stop() if not self._profiles else None
+            if thread is not None:
+                # Outside the lock, which the sampler may be waiting for
+                thread.join()
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample,
+            args=(self._stopping,),
+            name="autoqa-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _stop(self) -> Optional[threading.Thread]:
+        """Restore the task factory and return the sampler thread to join"""
+        self._loop.set_task_factory(self._previous_factory)
+        self._previous_factory = None
+        self._stopping.set()
+        thread, self._thread = self._thread, None
+        return thread
+
+    def _task_factory(self, loop, coro, **kwargs):
+        parent = asyncio.current_task(loop)
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        for profile in self._profiles:
+            if parent in profile.tasks:
+                profile.tasks.add(task)
+        return task
+
+    def _sample(self, stopping: threading.Event):
+        """Runs in its own thread until the last profile is detached"""
+        while not stopping.wait(self.interval):
+            with self._lock:
+                if stopping.is_set():
+                    return
+                task = asyncio.current_task(self._loop)
+                profiles = [p for p in self._profiles if task in p.tasks]
+                if not profiles:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                names = []
+                while frame is not None and len(names) < MAX_DEPTH:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack = ";".join(reversed(names))
+                for profile in profiles:
+                    profile.stacks[stack] += 1
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,98 @@
+"""
+Production entry point for the AutoQA Web backend
+
+    python -m backend.server [--workers N] [--host HOST] [--port PORT]
+
+Unlike run_backend.py this runs without auto-reload, with one worker per
+core by default, uvloop and httptools when they are installed, and a
+graceful drain on SIGTERM
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import time
+
+import uvicorn
+
+from backend.logs import configure_logging
+
+logger = logging.getLogger("autoqa-server")
+
+# Seconds in-flight requests and WebSockets get to finish after SIGTERM
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def default_workers() -> int:
+    """
+    Worker processes from AUTOQA_WORKERS, or one per CPU core
+    """
+    return int(os.getenv("AUTOQA_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def server_config(workers: int, host: str, port: int, graceful_timeout: int) -> dict:
+    """
+    Keyword arguments for uvicorn.run
+    """
+    return {
+        "host": host,
+        "port": port,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "ws": "websockets",
+        "ws_per_message_deflate": True,
+        "lifespan": "on",
+        "proxy_headers": True,
+        "timeout_graceful_shutdown": graceful_timeout,
+        "access_log": False,
+        # Keep the queue-based logging set up by backend.logs
+        "log_config": None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AutoQA Web backend")
+    parser.add_argument("--host", default=os.getenv("AUTOQA_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("AUTOQA_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=int(os.getenv("AUTOQA_GRACEFUL_TIMEOUT", DEFAULT_GRACEFUL_TIMEOUT)),
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging()
+
+    # Workers only see each other's WebSocket events through a shared bus
+    if args.workers > 1:
+        os.environ.setdefault("AUTOQA_EVENT_BUS", "sqlite")
+
+    # Preload the app so import or configuration errors fail before any
+    # worker starts. A single worker serves this instance directly; multiple
+    # workers are spawned by uvicorn and import it themselves.
+    start = time.perf_counter()
+    from backend.main import app
+
+    logger.info("App loaded in %.2f s", time.perf_counter() - start)
+
+    config = server_config(args.workers, args.host, args.port, args.graceful_timeout)
+    logger.info(
+        "Starting %d worker(s) on %s:%d with loop=%s http=%s",
+        args.workers,
+        args.host,
+        args.port,
+        config["loop"],
+        config["http"],
+    )
+    uvicorn.run(app if args.workers == 1 else "backend.main:app", **config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Event loop lag watchdog that records the stack of whatever blocks the loop
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger("autoqa-watchdog")
+
+# Frames under this directory are preferred when naming a blocking call site
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _location(stack: traceback.StackSummary) -> str:
+    """The innermost project frame of a stack, or its innermost frame"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(PROJECT_ROOT) and frame.filename != __file__:
+            path = os.path.relpath(frame.filename, PROJECT_ROOT)
+            return f"{path}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag with a heartbeat task and, from a separate
+    thread, captures the loop thread's stack while the heartbeat is late.
+
+    Every stall longer than ``threshold`` seconds is logged with the stack
+    and the task that was running, counted per call site in
+    ``autoqa_event_loop_stalls_total`` and aggregated for ``summary``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.02,
+        max_offenders: int = 50,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_offenders = max_offenders
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+        self.stalls = 0
+        self.max_lag = 0.0
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = 0.0
+        self._stall: Optional[Dict[str, Any]] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._monitor_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopWatchdog"]:
+        """
+        A watchdog if AUTOQA_LOOP_WATCHDOG is set, with the stall threshold
+        from AUTOQA_LOOP_LAG_THRESHOLD_MS (default 100)
+        """
+        if os.getenv("AUTOQA_LOOP_WATCHDOG", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            threshold=float(os.getenv("AUTOQA_LOOP_LAG_THRESHOLD_MS", 100)) / 1000
+        )
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        )
+        self._monitor_thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._monitor_thread is not None:
+            await asyncio.to_thread(self._monitor_thread.join)
+            self._monitor_thread = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            metrics.LOOP_LAG.observe(lag)
+            with self._lock:
+                stall, self._stall = self._stall, None
+                self._beat = now
+            if lag >= self.threshold:
+                self._report(lag, stall)
+
+    def _monitor(self):
+        """Runs in its own thread; the loop cannot sample itself while blocked"""
+        while not self._stopped.wait(self.threshold / 2):
+            with self._lock:
+                late = time.monotonic() - self._beat > self.interval + self.threshold
+                if late and self._stall is None:
+                    self._stall = self._capture()
+
+    def _capture(self) -> Dict[str, Any]:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        task = asyncio.current_task(self._loop)
+        coroutine = task.get_coro() if task is not None else None
+        return {
+            "location": _location(stack),
+            "task": task.get_name() if task is not None else None,
+            "coroutine": getattr(coroutine, "__qualname__", None),
+            "stack": [
+                f"{frame.filename}:{frame.lineno} in {frame.name}" for frame in stack
+            ],
+        }
+
+    def _report(self, lag: float, stall: Optional[Dict[str, Any]]):
+        stall = stall or {
+            "location": "unknown",
+            "task": None,
+            "coroutine": None,
+            "stack": [],
+        }
+        location = stall["location"]
+        if location not in self.offenders and len(self.offenders) >= self.max_offenders:
+            location = "other"
+
+        lag_ms = round(lag * 1000, 1)
+        self.stalls += 1
+        self.max_lag = max(self.max_lag, lag)
+        offender = self.offenders.setdefault(
+            location, {"location": location, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        offender["count"] += 1
+        offender["total_ms"] = round(offender["total_ms"] + lag_ms, 1)
+        offender["max_ms"] = max(offender["max_ms"], lag_ms)
+        offender["last_task"] = stall["task"]
+        offender["last_coroutine"] = stall["coroutine"]
+        offender["last_stack"] = stall["stack"]
+        metrics.LOOP_STALLS.labels(location).inc()
+
+        logger.warning(
+            "Event loop blocked for %.0f ms at %s",
+            lag_ms,
+            location,
+            extra={"loop_stall": {"lag_ms": lag_ms, **stall}},
+        )
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        """Stall totals and the call sites that blocked the loop the longest"""
+        offenders: List[Dict[str, Any]] = sorted(
+            self.offenders.values(),
+            key=lambda offender: offender["total_ms"],
+            reverse=True,
+        )
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "offenders": offenders[:limit],
+        }
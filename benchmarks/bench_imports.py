@@ -0,0 +1,138 @@
+"""Import-time budget for the API server and the CLI entry points.
+
+Imports each entry point in a fresh interpreter under ``python -X importtime``
+and reports its cumulative import time (best of ``--repeat`` runs) and which
+of the LLM and browser packages it pulled in. Those packages must only load
+when a run starts, so the command exits non-zero if an entry point imports
+one of them or goes over its time budget.
+
+Usage:
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --budget backend.main=800 -o imports.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Entry points and their cumulative import budget in milliseconds
+DEFAULT_BUDGETS_MS = {
+    "backend.main": 1500.0,
+    "autoqa.report": 150.0,
+    "autoqa.core": 400.0,
+    "autoqa.cli": 400.0,
+}
+
+# Packages that belong to a run, not to starting a process
+HEAVY_MODULES = [
+    "langchain_core",
+    "langchain_google_genai",
+    "browser_use",
+    "playwright",
+]
+
+# ``-X importtime`` only reports modules loaded by an import statement
+_PROBE = (
+    "import {module}; import json, sys; "
+    "print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))"
+)
+
+
+def _cumulative_us(stderr: str, module: str) -> int:
+    """Cumulative microseconds of ``module`` in ``-X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:") :].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise ValueError(f"{module} not found in the import time report")
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    """Best cumulative import time of ``module`` and the heavy modules it loads."""
+    samples: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                _PROBE.format(module=module, heavy=HEAVY_MODULES),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()[-1:]
+            return {"error": error[0] if error else "import failed"}
+        samples.append(_cumulative_us(process.stderr, module) / 1000)
+        heavy = json.loads(process.stdout.strip().splitlines()[-1])
+    return {"import_ms": round(min(samples), 1), "heavy_modules": heavy}
+
+
+def main():
+    """Command-line interface for the import-time benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Check the import time of AutoQA entry points"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Fresh interpreters per entry point"
+    )
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Override or add an entry point budget",
+    )
+    parser.add_argument("-o", "--output", help="Write the JSON result to this file")
+
+    args = parser.parse_args()
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+
+    results = {module: measure(module, args.repeat) for module in budgets}
+    failures = []
+    for module, result in results.items():
+        if "error" in result:
+            failures.append(f"{module}: {result['error']}")
+            continue
+        result["budget_ms"] = budgets[module]
+        if result["import_ms"] > budgets[module]:
+            failures.append(
+                f"{module}: {result['import_ms']} ms over budget of {budgets[module]} ms"
+            )
+        if result["heavy_modules"]:
+            failures.append(f"{module}: imports {', '.join(result['heavy_modules'])}")
+
+    text = json.dumps(
+        {
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        },
+        indent=2,
+    )
+    print(text)
+    if args.output:
+        with open(os.path.abspath(args.output), "w") as f:
+            f.write(text)
+
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
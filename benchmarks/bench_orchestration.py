@@ -0,0 +1,288 @@
+"""End-to-end throughput benchmark for the AutoQA orchestration layer.
+
+Drives ``AutoQAService.run_test`` for N concurrent runs, each watched by M
+fake WebSocket subscribers, with the browser agent and LLM replaced by the
+deterministic fakes from ``benchmarks.fakes``. Everything else (CRUD writes,
+``LogCapture``, ``ConnectionManager`` fan-out) is the real code.
+
+Usage:
+    python -m benchmarks.bench_orchestration --runs 20 --subscribers 5
+    python -m benchmarks.bench_orchestration -o bench.json --baseline old.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks import fakes
+
+# Metrics compared against a baseline and the direction that counts as better
+REGRESSION_METRICS = {
+    "runs_per_sec": "higher",
+    "db_write_ms.p99": "lower",
+    "loop_lag_ms.p99": "lower",
+    "broadcast_ms.p50": "lower",
+    "broadcast_ms.p99": "lower",
+}
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Reduce a list of millisecond samples to count/mean/p50/p99/max."""
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _timed(func: Callable, samples: List[float]) -> Callable:
+    """Wrap a sync function so each call's latency lands in ``samples``."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+def _timed_async(func: Callable, samples: List[float]) -> Callable:
+    """Async counterpart of ``_timed``."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+async def _sample_loop_lag(samples: List[float], interval: float, stop: asyncio.Event):
+    """Record how late the event loop wakes us up compared to ``interval``."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - start - interval) * 1000))
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Set up an isolated database, run the workload and collect metrics."""
+    fakes.install(
+        fakes.FakeConfig(
+            llm_latency=args.llm_latency,
+            action_latency=args.action_latency,
+            test_cases=args.cases,
+        )
+    )
+
+    from sqlalchemy import create_engine
+
+    from backend import crud, database
+    from backend.autoqa_service import AutoQAService
+    from backend.main import ConnectionManager
+
+    # AutoQA writes raw agent output below ./autoqa, keep that out of the repo
+    workdir = tempfile.mkdtemp(prefix="autoqa-bench-")
+    os.makedirs(os.path.join(workdir, "autoqa"), exist_ok=True)
+    os.chdir(workdir)
+
+    engine = create_engine(
+        f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        connect_args={"check_same_thread": False},
+    )
+    database.Base.metadata.create_all(bind=engine)
+    database.SessionLocal.configure(bind=engine)
+
+    db_write_ms: List[float] = []
+    broadcast_ms: List[float] = []
+    loop_lag_ms: List[float] = []
+
+    for name in (
+        "create_test_plan",
+        "create_test_case",
+        "update_test_case",
+        "update_test_run_status",
+        "create_test_log",
+    ):
+        setattr(crud, name, _timed(getattr(crud, name), db_write_ms))
+
+    manager = ConnectionManager()
+    manager.broadcast = _timed_async(manager.broadcast, broadcast_ms)
+    # As on server startup; without it published batches reach no socket
+    await manager.bus.start(manager.broadcast)
+    service = AutoQAService(manager)
+
+    db = database.SessionLocal()
+    user = database.User(email="bench@example.com", name="Bench", google_id="bench")
+    db.add(user)
+    db.commit()
+    run_ids = [
+        crud.create_test_run(db, user.id, args.url, "Benchmark scenario").run_id
+        for _ in range(args.runs)
+    ]
+
+    subscribers: List[fakes.FakeWebSocket] = []
+    for run_id in run_ids:
+        for _ in range(args.subscribers):
+            websocket = fakes.FakeWebSocket()
+            await manager.connect(websocket, run_id)
+            subscribers.append(websocket)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(
+        _sample_loop_lag(loop_lag_ms, args.lag_interval, stop)
+    )
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            service.run_test(run_id, args.url, "Benchmark scenario")
+            for run_id in run_ids
+        )
+    )
+    # Deliver the batches still waiting for their flush timer
+    await manager.batcher.flush_all()
+    wall_seconds = time.perf_counter() - start
+
+    stop.set()
+    await lag_task
+    await manager.bus.stop()
+
+    db.expire_all()
+    completed = sum(
+        1 for run_id in run_ids if crud.get_test_run(db, run_id).status == "completed"
+    )
+    db.close()
+
+    from autoqa import __version__
+
+    return {
+        "benchmark": "orchestration",
+        "version": __version__,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {
+            "runs": args.runs,
+            "subscribers": args.subscribers,
+            "cases": args.cases,
+            "llm_latency": args.llm_latency,
+            "action_latency": args.action_latency,
+        },
+        "results": {
+            "wall_seconds": round(wall_seconds, 3),
+            "runs_per_sec": round(args.runs / wall_seconds, 3),
+            "completed_runs": completed,
+            "frames_delivered": sum(ws.frames for ws in subscribers),
+            "bytes_delivered": sum(ws.bytes for ws in subscribers),
+            "db_write_ms": summarize(db_write_ms),
+            "loop_lag_ms": summarize(loop_lag_ms),
+            "broadcast_ms": summarize(broadcast_ms),
+        },
+    }
+
+
+def _lookup(results: Dict[str, Any], dotted: str):
+    value: Any = results
+    for part in dotted.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float):
+    """Return a list of human-readable regressions beyond ``tolerance``."""
+    regressions = []
+    for metric, better in REGRESSION_METRICS.items():
+        new = _lookup(current["results"], metric)
+        old = _lookup(baseline.get("results", {}), metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        if (better == "higher" and change < -tolerance) or (
+            better == "lower" and change > tolerance
+        ):
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    """Command-line interface for the orchestration benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the AutoQA orchestration layer"
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Concurrent test runs")
+    parser.add_argument(
+        "--subscribers", type=int, default=3, help="WebSocket subscribers per run"
+    )
+    parser.add_argument(
+        "--cases", type=int, default=5, help="Test cases per generated plan"
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call"
+    )
+    parser.add_argument(
+        "--action-latency",
+        type=float,
+        default=0.02,
+        help="Seconds per fake browser action",
+    )
+    parser.add_argument(
+        "--lag-interval",
+        type=float,
+        default=0.01,
+        help="Event-loop lag sampling interval",
+    )
+    parser.add_argument(
+        "--url", default="https://example.com", help="URL recorded on each run"
+    )
+    parser.add_argument("-o", "--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Previous JSON result to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10, help="Allowed relative regression"
+    )
+
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    result = asyncio.run(run_benchmark(args))
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+
+    if baseline_path:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
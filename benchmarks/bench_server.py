@@ -0,0 +1,204 @@
+"""Startup time and request throughput of the production server launcher.
+
+Starts ``python -m backend.server`` in a subprocess, times how long it takes
+until ``/`` answers, drives ``/`` with concurrent clients for a fixed time and
+finally sends SIGTERM to measure how long the graceful drain takes.
+``--launcher uvicorn`` starts plain ``uvicorn backend.main:app`` instead, as
+``run_backend.py`` does without auto-reload, for a before/after comparison.
+
+Usage:
+    python -m benchmarks.bench_server --workers 4 --duration 10
+    python -m benchmarks.bench_server --launcher uvicorn -o before.json
+    python -m benchmarks.bench_server -o server.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.bench_orchestration import _lookup, summarize
+
+# Metrics compared against a baseline and the direction that counts as better
+REGRESSION_METRICS = {
+    "startup_seconds": "lower",
+    "requests_per_sec": "higher",
+    "latency_ms.p99": "lower",
+}
+
+
+async def wait_until_ready(url: str, timeout: float) -> float:
+    """Seconds until ``url`` answers with a 200."""
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = await client.get(url)
+                if response.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"Server did not answer {url} within {timeout} s")
+
+
+async def load(url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """Issue requests from ``concurrency`` clients for ``duration`` seconds."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.TransportError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "latency_ms": summarize(latencies),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the server, measure it and shut it down with SIGTERM."""
+    url = f"http://127.0.0.1:{args.port}/"
+    if args.launcher == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "backend.main:app"]
+    else:
+        command = [sys.executable, "-m", "backend.server"]
+    command += [
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(args.port),
+        "--workers",
+        str(args.workers),
+    ]
+    process = subprocess.Popen(command)
+    try:
+        startup = await wait_until_ready(url, args.startup_timeout)
+        throughput = await load(url, args.concurrency, args.duration)
+    finally:
+        start = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=args.startup_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        shutdown = time.perf_counter() - start
+
+    return {
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {
+            "launcher": args.launcher,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "results": {
+            "startup_seconds": round(startup, 3),
+            "shutdown_seconds": round(shutdown, 3),
+            **throughput,
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float):
+    """Return a list of human-readable regressions beyond ``tolerance``."""
+    regressions = []
+    for metric, better in REGRESSION_METRICS.items():
+        new = _lookup(current["results"], metric)
+        old = _lookup(baseline.get("results", {}), metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        if (better == "higher" and change < -tolerance) or (
+            better == "lower" and change > tolerance
+        ):
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    """Command-line interface for the server benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the AutoQA production server"
+    )
+    parser.add_argument(
+        "--launcher",
+        choices=["server", "uvicorn"],
+        default="server",
+        help="backend.server, or plain uvicorn as a baseline",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Server worker processes",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port the server listens on"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=50, help="Concurrent HTTP clients"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds to wait for startup and shutdown",
+    )
+    parser.add_argument("-o", "--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Previous JSON result to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10, help="Allowed relative regression"
+    )
+
+    args = parser.parse_args()
+    result = asyncio.run(run_benchmark(args))
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
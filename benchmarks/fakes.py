@@ -0,0 +1,260 @@
+"""Deterministic stand-ins for the LLM and the browser agent.
+
+The fakes mimic the small surface of ``browser_use.Agent`` and the chat model
+that AutoQA actually uses, so the orchestration code can be exercised without
+a browser, network access or API keys. Latencies are simulated with
+``asyncio.sleep`` and every result is derived from the task text, so two runs
+with the same configuration produce the same plans and statuses.
+"""
+
+import asyncio
+import itertools
+import json
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class FakeConfig:
+    """Knobs for the simulated agent and LLM."""
+
+    llm_latency: float = 0.05  # seconds per LLM call
+    action_latency: float = 0.02  # seconds per browser action
+    planning_steps: int = 4
+    execution_steps: int = 3
+    test_cases: int = 5
+    fail_ratio: float = 0.2  # share of cases reported as FAIL
+
+
+CONFIG = FakeConfig()
+
+# Distinct enough that the planner's near-duplicate pruning keeps every case
+SYNTHETIC_ACTIONS = [
+    "Search for a product by name",
+    "Open the contact form and submit it empty",
+    "Switch the site language",
+    "Subscribe to the newsletter with an invalid email",
+    "Open the pricing page from the footer",
+    "Add an item to the cart and remove it",
+    "Sort the listing by price",
+    "Follow the first blog article link",
+]
+
+# Larger plans pair the actions up rather than repeating them, which would
+# just be pruned as duplicates
+SYNTHETIC_FLOWS = [[action] for action in SYNTHETIC_ACTIONS] + [
+    list(pair) for pair in itertools.combinations(SYNTHETIC_ACTIONS, 2)
+]
+
+
+class FakeLLM:
+    """Chat model stand-in that sleeps for ``llm_latency`` per call."""
+
+    def __init__(self, model: str = "fake-llm", **kwargs):
+        self.model = model
+        self.calls = 0
+
+    async def ainvoke(self, messages: Any, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(CONFIG.llm_latency)
+        return ""
+
+    def invoke(self, messages: Any, **kwargs) -> str:
+        self.calls += 1
+        return ""
+
+
+class FakeStepMetadata:
+    """Timing metadata attached to each fake history item."""
+
+    def __init__(self, step_number: int, start: float, end: float):
+        self.step_number = step_number
+        self.step_start_time = start
+        self.step_end_time = end
+        self.input_tokens = 0
+
+
+class FakeHistoryItem:
+    """One agent step as recorded in ``AgentHistoryList.history``."""
+
+    def __init__(self, metadata: FakeStepMetadata):
+        self.metadata = metadata
+        self.model_output = None
+        self.state = None
+
+
+class FakeAgentHistory:
+    """Minimal ``AgentHistoryList`` replacement returned by ``FakeAgent.run``."""
+
+    def __init__(self, final_result: str, history: List[FakeHistoryItem]):
+        self._final_result = final_result
+        self.history = history
+
+    def final_result(self) -> Optional[str]:
+        return self._final_result
+
+    def number_of_steps(self) -> int:
+        return len(self.history)
+
+    def total_input_tokens(self) -> int:
+        return sum(item.metadata.input_tokens for item in self.history)
+
+    def is_done(self) -> bool:
+        return True
+
+
+class FakeAgent:
+    """Browser agent stand-in that alternates LLM calls and browser actions."""
+
+    def __init__(self, task: str, llm: Any, **kwargs):
+        self.task = task
+        self.llm = llm or FakeLLM()
+
+    async def run(self, max_steps: int = 100, **kwargs) -> FakeAgentHistory:
+        planning = "test plan" in self.task
+        steps = CONFIG.planning_steps if planning else CONFIG.execution_steps
+        if "Perform these setup steps" in self.task:
+            steps = self.task.count("\n- ")
+        history = []
+        for step in range(1, min(steps, max_steps) + 1):
+            start = time.time()
+            await self.llm.ainvoke(self.task)
+            await asyncio.sleep(CONFIG.action_latency)
+            history.append(FakeHistoryItem(FakeStepMetadata(step, start, time.time())))
+        if planning:
+            result = self._plan()
+        elif "Perform these setup steps" in self.task:
+            result = {"status": "DONE", "notes": ""}
+        else:
+            result = self._execution_result()
+        return FakeAgentHistory(json.dumps(result), history)
+
+    def _plan(self) -> Dict[str, Any]:
+        test_cases: List[Dict[str, Any]] = []
+        for i in range(1, CONFIG.test_cases + 1):
+            flow = SYNTHETIC_FLOWS[(i - 1) % len(SYNTHETIC_FLOWS)]
+            summary = " and ".join(action.lower() for action in flow)
+            test_cases.append(
+                {
+                    "id": f"TC{i:03d}",
+                    "description": f"Verify: {summary}",
+                    "steps": [
+                        "Navigate to the website",
+                        "Accept cookies (if prompted)",
+                        *flow,
+                    ],
+                    "expected_result": f"The page reacts correctly to: {summary}",
+                }
+            )
+        return {"test_cases": test_cases}
+
+    def _execution_result(self) -> Dict[str, Any]:
+        match = re.search(r"Test Case ID: (\S+)", self.task)
+        tc_id = match.group(1) if match else "TC000"
+        bucket = zlib.crc32(tc_id.encode()) % 100
+        status = "FAIL" if bucket < CONFIG.fail_ratio * 100 else "PASS"
+        return {
+            "actual_result": f"Synthetic execution of {tc_id}",
+            "status": status,
+            "notes": "Produced by benchmarks.fakes.FakeAgent",
+        }
+
+
+class FakePage:
+    """Page stand-in that only remembers its URL."""
+
+    def __init__(self):
+        self.url = "about:blank"
+
+    async def goto(self, url: str):
+        await asyncio.sleep(CONFIG.action_latency)
+        self.url = url
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+
+class FakePlaywrightContext:
+    """Playwright context stand-in holding cookies and init scripts."""
+
+    def __init__(self):
+        self.cookies: List[Dict[str, Any]] = []
+        self.init_scripts: List[str] = []
+
+    async def storage_state(self) -> Dict[str, Any]:
+        return {"cookies": list(self.cookies), "origins": []}
+
+    async def add_cookies(self, cookies: List[Dict[str, Any]]):
+        self.cookies.extend(cookies)
+
+    async def add_init_script(self, script: str):
+        self.init_scripts.append(script)
+
+
+class FakeSession:
+    def __init__(self):
+        self.context = FakePlaywrightContext()
+
+
+class FakeBrowserContext:
+    """``BrowserContext`` stand-in used for snapshot capture and restore."""
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.page = FakePage()
+
+    async def get_session(self) -> FakeSession:
+        return self.session
+
+    async def get_current_page(self) -> FakePage:
+        return self.page
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    """Browser stand-in; the fake agent never drives a real page."""
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+
+    async def new_context(self, *args, **kwargs) -> FakeBrowserContext:
+        return FakeBrowserContext()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that counts delivered frames and bytes."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None):
+        pass
+
+
+def install(config: Optional[FakeConfig] = None):
+    """Swap the real agent and LLM used by ``autoqa.core`` for the fakes."""
+    global CONFIG
+    if config is not None:
+        CONFIG = config
+
+    import autoqa.core
+
+    autoqa.core.Agent = FakeAgent
+    autoqa.core.Browser = FakeBrowser
+    autoqa.core.ChatGoogleGenerativeAI = FakeLLM
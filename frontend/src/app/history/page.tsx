@@ -3,12 +3,20 @@
 import { useState } from 'react';
 import MainLayout from '@/components/layout/MainLayout';
 import TestRunCard from '@/components/tests/TestRunCard';
-import { useTestRuns } from '@/lib/hooks';
+import { useLiveTestRuns, useTestRuns } from '@/lib/hooks';
+
+// Runs in these states no longer change
+const FINISHED_STATUSES = ['completed', 'failed', 'cancelled', 'interrupted'];
 
 export default function HistoryPage() {
   const { data: testRuns, isLoading, error } = useTestRuns();
   const [searchTerm, setSearchTerm] = useState('');
   
+  // Watch every unfinished run over one WebSocket
+  useLiveTestRuns(
+    testRuns?.filter(testRun => !FINISHED_STATUSES.includes(testRun.status)).map(testRun => testRun.id) ?? []
+  );
+  
   // Filter test runs based on search term
   const filteredTestRuns = testRuns?.filter(testRun => {
     const searchLower = searchTerm.toLowerCase();
@@ -67,6 +67,12 @@ function getStatusBadge(status: string) {
       return <span className="text-error">FAIL</span>;
     case 'ERROR':
       return <span className="text-error">ERROR</span>;
+    case 'TIMEOUT':
+      return <span className="text-warning">TIMEOUT</span>;
+    case 'SKIPPED':
+      return <span className="text-gray-500">SKIPPED</span>;
+    case 'CANCELLED':
+      return <span className="text-gray-500">CANCELLED</span>;
     case 'running':
       return (
         <span className="text-warning flex items-center gap-1">
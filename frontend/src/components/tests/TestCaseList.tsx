@@ -78,6 +78,12 @@ function getStatusBadge(status: string) {
       return <div className="badge badge-error">Fail</div>;
     case 'ERROR':
       return <div className="badge badge-error">Error</div>;
+    case 'TIMEOUT':
+      return <div className="badge badge-warning">Timeout</div>;
+    case 'SKIPPED':
+      return <div className="badge badge-ghost">Skipped</div>;
+    case 'CANCELLED':
+      return <div className="badge badge-ghost">Cancelled</div>;
     case 'running':
       return (
         <div className="badge badge-warning gap-1">
@@ -88,6 +88,10 @@ function getStatusBadge(status: string) {
       return <Badge variant="success">Completed</Badge>;
     case 'failed':
       return <Badge variant="error">Failed</Badge>;
+    case 'cancelled':
+      return <Badge>Cancelled</Badge>;
+    case 'interrupted':
+      return <Badge variant="warning">Interrupted</Badge>;
     case 'in_progress':
       return <Badge variant="warning">In Progress</Badge>;
     case 'generating_plan':
@@ -111,6 +115,10 @@ function getStatusText(status: string) {
       return 'Completed';
     case 'failed':
       return 'Failed';
+    case 'cancelled':
+      return 'Cancelled';
+    case 'interrupted':
+      return 'Interrupted';
     default:
       return status;
   }
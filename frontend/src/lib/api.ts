@@ -31,6 +31,8 @@ export interface TestRun {
   scenario: string;
   status: string;
   created_at: string;
+  parent_run_id?: string | null;
+  attempt?: number | null;
 }
 
 export interface TestCase {
@@ -41,6 +43,7 @@ export interface TestCase {
   actual_result?: string;
   status: string;
   notes?: string;
+  model_tier?: string;
   executed_at?: string;
 }
 
@@ -69,6 +72,18 @@ export const apiClient = {
     return response.data;
   },
   
+  cancelTestRun: async (id: string): Promise<TestRun> => {
+    const response = await api.post(`/test-runs/${id}/cancel`);
+    return response.data;
+  },
+
+  rerunTestRun: async (id: string, statuses: string[] = ['FAIL', 'ERROR']): Promise<TestRun> => {
+    const response = await api.post(`/test-runs/${id}/rerun`, null, {
+      params: { status: statuses.join(',') },
+    });
+    return response.data;
+  },
+  
   // Test cases
   getTestCases: async (testRunId: string): Promise<TestCase[]> => {
     const response = await api.get(`/test-runs/${testRunId}/cases`);
@@ -82,6 +97,11 @@ export const apiClient = {
   },
 };
 
+// Split a batch frame into its events; other frames are a single event
+function unpackEvents(frame: any): any[] {
+  return frame?.type === 'batch' && Array.isArray(frame.events) ? frame.events : [frame];
+}
+
 // WebSocket connection for real-time updates
 export class WebSocketClient {
   private socket: WebSocket | null = null;
@@ -113,8 +133,10 @@ export class WebSocketClient {
       
       this.socket.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
-          this.messageHandlers.forEach(handler => handler(data));
+          // Events may arrive coalesced into one batch frame
+          unpackEvents(JSON.parse(event.data)).forEach(data =>
+            this.messageHandlers.forEach(handler => handler(data))
+          );
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }
@@ -172,3 +194,100 @@ export class WebSocketClient {
     }
   }
 }
+
+// One authenticated WebSocket for watching many test runs at once
+export class RunSubscriptionClient {
+  private socket: WebSocket | null = null;
+  private runIds = new Set<string>();
+  private messageHandlers: ((runId: string, data: any) => void)[] = [];
+  private reconnectTimer: NodeJS.Timeout | null = null;
+  private closed = false;
+  
+  connect() {
+    if (this.socket) return;
+    this.closed = false;
+    
+    const token = getToken();
+    const url = `ws://localhost:8000/ws/subscriptions?token=${encodeURIComponent(token || '')}`;
+    
+    try {
+      this.socket = new WebSocket(url);
+      
+      this.socket.onopen = () => {
+        // Restore subscriptions after a reconnect
+        this.send('subscribe', Array.from(this.runIds));
+      };
+      
+      this.socket.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+          if (data.run_id) {
+            unpackEvents(data).forEach(runEvent =>
+              this.messageHandlers.forEach(handler => handler(data.run_id, runEvent))
+            );
+          }
+        } catch (error) {
+          console.error('Error parsing WebSocket message:', error);
+        }
+      };
+      
+      this.socket.onclose = () => {
+        this.socket = null;
+        if (!this.closed) this.scheduleReconnect();
+      };
+      
+      this.socket.onerror = (error) => {
+        console.error('WebSocket error:', error);
+      };
+    } catch (error) {
+      console.error('Error creating WebSocket:', error);
+      this.socket = null;
+      this.scheduleReconnect();
+    }
+  }
+  
+  private scheduleReconnect() {
+    if (this.reconnectTimer) return;
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      this.connect();
+    }, 3000);
+  }
+  
+  private send(action: 'subscribe' | 'unsubscribe', runIds: string[]) {
+    if (runIds.length === 0 || this.socket?.readyState !== WebSocket.OPEN) return;
+    this.socket.send(JSON.stringify({ action, run_ids: runIds }));
+  }
+  
+  subscribe(runIds: string[]) {
+    const added = runIds.filter(id => !this.runIds.has(id));
+    added.forEach(id => this.runIds.add(id));
+    this.send('subscribe', added);
+  }
+  
+  unsubscribe(runIds: string[]) {
+    const removed = runIds.filter(id => this.runIds.has(id));
+    removed.forEach(id => this.runIds.delete(id));
+    this.send('unsubscribe', removed);
+  }
+  
+  addMessageHandler(handler: (runId: string, data: any) => void) {
+    this.messageHandlers.push(handler);
+  }
+  
+  removeMessageHandler(handler: (runId: string, data: any) => void) {
+    this.messageHandlers = this.messageHandlers.filter(h => h !== handler);
+  }
+  
+  disconnect() {
+    this.closed = true;
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
+    }
+    if (this.socket) {
+      this.socket.close();
+      this.socket = null;
+    }
+  }
+}
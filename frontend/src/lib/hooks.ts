@@ -1,5 +1,6 @@
+import { useEffect, useRef } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { apiClient, TestRun, TestCase, TestLog } from './api';
+import { apiClient, RunSubscriptionClient, TestRun, TestCase, TestLog } from './api';
 
 // Query keys
 export const queryKeys = {
@@ -17,6 +18,37 @@ export function useTestRuns() {
   });
 }
 
+// Keep the status of the given runs live over a single multiplexed WebSocket
+export function useLiveTestRuns(runIds: string[]) {
+  const queryClient = useQueryClient();
+  const clientRef = useRef<RunSubscriptionClient | null>(null);
+  
+  useEffect(() => {
+    const client = new RunSubscriptionClient();
+    clientRef.current = client;
+    client.addMessageHandler((runId, message) => {
+      if (message.type !== 'status_update' || !message.data?.status) return;
+      queryClient.setQueryData<TestRun[]>([queryKeys.testRuns], (runs) =>
+        runs?.map(run => run.id === runId ? { ...run, status: message.data.status } : run)
+      );
+    });
+    client.connect();
+    return () => {
+      client.disconnect();
+      clientRef.current = null;
+    };
+  }, [queryClient]);
+  
+  const key = runIds.join(',');
+  useEffect(() => {
+    const client = clientRef.current;
+    if (!client || !key) return;
+    const ids = key.split(',');
+    client.subscribe(ids);
+    return () => client.unsubscribe(ids);
+  }, [key]);
+}
+
 export function useTestRun(id: string) {
   return useQuery({
     queryKey: queryKeys.testRun(id),
@@ -0,0 +1,67 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend import database
+from benchmarks import fakes
+
+
+@pytest.fixture
+def fake_agents(monkeypatch, tmp_path):
+    """
+    Run AutoQA against the benchmark's fake agent, browser and LLM with no
+    simulated latency, from a scratch working directory.
+    """
+    import autoqa.core
+
+    config = fakes.FakeConfig(llm_latency=0, action_latency=0)
+    monkeypatch.setattr(fakes, "CONFIG", config)
+    # Set in the module namespace so the real stacks are never imported
+    namespace = vars(autoqa.core)
+    monkeypatch.setitem(namespace, "Agent", fakes.FakeAgent)
+    monkeypatch.setitem(namespace, "Browser", fakes.FakeBrowser)
+    monkeypatch.setitem(namespace, "ChatGoogleGenerativeAI", fakes.FakeLLM)
+    # Execution writes the raw agent output under autoqa/
+    (tmp_path / "autoqa").mkdir(exist_ok=True)
+    monkeypatch.chdir(tmp_path)
+    return config
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    A session on a fresh SQLite database, which the backend uses too, with
+    two users (ids 1 and 2).
+    """
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    database.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    database.SessionLocal.configure(bind=engine)
+    session = database.SessionLocal()
+    for name in ("qa", "other"):
+        session.add(
+            database.User(email=f"{name}@example.com", name=name, google_id=name)
+        )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """An API client signed in as user 1, with a fresh AutoQA service."""
+    from fastapi.testclient import TestClient
+
+    from backend import main
+    from backend.auth import create_access_token
+
+    monkeypatch.setattr(main, "autoqa_service", None)
+    with TestClient(main.app) as client:
+        client.token = create_access_token({"sub": "1"})
+        client.headers["Authorization"] = f"Bearer {client.token}"
+        yield client
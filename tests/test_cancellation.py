@@ -0,0 +1,44 @@
+"""Tests for cancelling runs executed by another API process."""
+
+import asyncio
+
+import pytest
+
+from backend import autoqa_service, crud
+from backend.autoqa_service import AutoQAService
+
+
+class Manager:
+    async def safe_broadcast(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fast_heartbeat(monkeypatch):
+    monkeypatch.setattr(autoqa_service, "HEARTBEAT_INTERVAL", 0.05)
+
+
+def test_cancel_request_reaches_the_process_running_the_run(db):
+    run_id = crud.create_test_run(db, 1, "https://example.com", "Search").run_id
+    worker, other_worker = AutoQAService(Manager()), AutoQAService(Manager())
+
+    async def main():
+        task = worker._track(run_id, "https://example.com", asyncio.sleep(30))
+        await asyncio.sleep(0.1)
+
+        db.expire_all()
+        assert other_worker.run_is_live(crud.get_test_run(db, run_id))
+
+        crud.request_test_run_cancel(db, run_id)
+        await asyncio.wait([task], timeout=1)
+        return task
+
+    task = asyncio.run(main())
+
+    assert task.cancelled()
+
+
+def test_run_without_heartbeat_is_not_live(db):
+    db_test_run = crud.create_test_run(db, 1, "https://example.com", "Search")
+
+    assert not AutoQAService(Manager()).run_is_live(db_test_run)
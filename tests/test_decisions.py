@@ -0,0 +1,90 @@
+"""Tests for the disk tier of autoqa.decisions."""
+
+import asyncio
+import json
+import os
+import time
+
+from cryptography.fernet import Fernet
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from autoqa.decisions import DecisionCache, decision_key
+
+
+def _prompt(step: int) -> str:
+    return json.dumps(
+        [
+            {"kwargs": {"content": 'Your ultimate task is: """Open the cart"""'}},
+            {"kwargs": {"content": f"[Current state starts here] element {step}"}},
+        ]
+    )
+
+
+def _age(cache: DecisionCache, step: int, seconds: float):
+    when = time.time() - seconds
+    os.utime(cache._path(decision_key(_prompt(step), "model")), (when, when))
+
+
+def _files(directory) -> list:
+    return [name for name in os.listdir(directory) if name.endswith(".decision")]
+
+
+def test_prune_keeps_the_most_recently_used_disk_entries(tmp_path):
+    cache = DecisionCache(str(tmp_path), max_disk_entries=3)
+    for step in range(5):
+        cache.update(_prompt(step), "model", [Generation(text=str(step))])
+        _age(cache, step, 100 - step)
+
+    cache.prune()
+
+    assert len(_files(tmp_path)) == 3
+    fresh = DecisionCache(str(tmp_path))
+    assert fresh.lookup(_prompt(0), "model") is None
+    assert fresh.lookup(_prompt(4), "model")[0].text == "4"
+
+
+def test_expired_disk_entries_are_ignored_and_pruned(tmp_path):
+    cache = DecisionCache(str(tmp_path), disk_ttl_seconds=60)
+    cache.update(_prompt(0), "model", [Generation(text="0")])
+    _age(cache, 0, 120)
+
+    fresh = DecisionCache(str(tmp_path), disk_ttl_seconds=60)
+    assert fresh.lookup(_prompt(0), "model") is None
+    cache.prune()
+    assert _files(tmp_path) == []
+
+
+def test_disk_entries_are_encrypted(tmp_path):
+    key = Fernet.generate_key()
+    cache = DecisionCache(str(tmp_path), key=key)
+    typed = 'input_text {"index": 2, "text": "hunter22"}'
+    generation = ChatGeneration(message=AIMessage(content=typed))
+    cache.update(_prompt(0), "model", [generation])
+
+    (name,) = _files(tmp_path)
+    with open(os.path.join(tmp_path, name), "rb") as f:
+        assert b"hunter22" not in f.read()
+    assert (
+        DecisionCache(str(tmp_path), key=key)
+        .lookup(_prompt(0), "model")[0]
+        .message.content
+        == typed
+    )
+    other = DecisionCache(str(tmp_path), key=Fernet.generate_key())
+    assert other.lookup(_prompt(0), "model") is None
+
+
+def test_async_methods_use_the_disk_tier(tmp_path):
+    key = Fernet.generate_key()
+    cache = DecisionCache(str(tmp_path), key=key)
+
+    async def scenario():
+        await cache.aupdate(_prompt(0), "model", [Generation(text="0")])
+        fresh = DecisionCache(str(tmp_path), key=key)
+        return await fresh.alookup(_prompt(0), "model"), fresh.stats
+
+    generations, stats = asyncio.run(scenario())
+
+    assert generations[0].text == "0"
+    assert stats["disk_hits"] == 1
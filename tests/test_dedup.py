@@ -0,0 +1,79 @@
+"""Tests for near-duplicate pruning in autoqa.dedup."""
+
+from autoqa.dedup import find_duplicates
+from autoqa.models import TestCase
+from benchmarks import fakes
+
+
+def _login(id, description, password, expected):
+    return TestCase(
+        id,
+        description,
+        ["Open the login page", f"Enter a valid email and {password}", "Click Log in"],
+        expected,
+    )
+
+
+def test_repeated_case_is_pruned():
+    cases = [
+        _login(
+            "TC001", "Log in", "password", "The user is redirected to the dashboard"
+        ),
+        _login(
+            "TC002",
+            "Log in again",
+            "password",
+            "The user is redirected to the dashboard page",
+        ),
+    ]
+
+    kept, pruned = find_duplicates(cases)
+
+    assert [tc.id for tc in kept] == ["TC001"]
+    assert pruned[0]["id"] == "TC002"
+    assert pruned[0]["duplicate_of"] == "TC001"
+
+
+def test_negative_variant_is_not_merged():
+    cases = [
+        _login(
+            "TC001",
+            "Log in with valid credentials",
+            "password",
+            "The user is redirected to the dashboard",
+        ),
+        _login(
+            "TC002",
+            "Log in with an invalid password",
+            "an invalid password",
+            "The user is redirected to the dashboard",
+        ),
+    ]
+
+    kept, pruned = find_duplicates(cases)
+
+    assert [tc.id for tc in kept] == ["TC001", "TC002"]
+    assert pruned == []
+
+
+def test_different_expected_result_is_not_merged():
+    steps = ["Open the search page", "Search for 'laptop'"]
+    cases = [
+        TestCase("TC001", "Search", steps, "Matching products are listed"),
+        TestCase("TC002", "Search", steps, "The results can be sorted by price"),
+    ]
+
+    kept, _ = find_duplicates(cases)
+
+    assert len(kept) == 2
+
+
+def test_synthetic_benchmark_plan_is_kept(monkeypatch):
+    monkeypatch.setattr(fakes.CONFIG, "test_cases", len(fakes.SYNTHETIC_FLOWS))
+    plan = fakes.FakeAgent("Create a test plan", llm=None)._plan()
+    cases = [TestCase(**tc) for tc in plan["test_cases"]]
+
+    kept, pruned = find_duplicates(cases)
+
+    assert len(kept) == len(fakes.SYNTHETIC_FLOWS)
+    assert pruned == []
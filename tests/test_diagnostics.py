@@ -0,0 +1,24 @@
+"""Tests for access to the backend's diagnostic endpoints."""
+
+from backend import auth, main
+from backend.watchdog import LoopWatchdog
+
+
+def test_loop_lag_is_admin_only(client, monkeypatch):
+    monkeypatch.setattr(main, "watchdog", LoopWatchdog())
+
+    assert client.get("/api/diagnostics/loop-lag").status_code == 403
+
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"qa@example.com"})
+    response = client.get("/api/diagnostics/loop-lag")
+    assert response.status_code == 200
+    assert response.json()["offenders"] == []
+
+
+def test_governor_is_admin_only(client, monkeypatch):
+    assert client.get("/api/governor").status_code == 403
+
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"qa@example.com"})
+    response = client.get("/api/governor")
+    assert response.status_code == 200
+    assert "memory_percent" in response.json()["usage"]
@@ -0,0 +1,91 @@
+"""Tests for duration prediction in autoqa.durations."""
+
+import asyncio
+import json
+
+from autoqa.browser import BrowserSnapshot
+from autoqa.core import AutoQA
+from autoqa.durations import DurationModel
+from autoqa.models import TestCase
+from backend import crud
+from backend.autoqa_service import AutoQAService
+from benchmarks.fakes import FakeLLM
+
+URL = "https://shop.example.com/"
+STEPS = ["Sign in", "Open the cart", "Remove the first item", "Check the total"]
+
+
+def _test_case(description="Empty the cart", steps=STEPS) -> TestCase:
+    return TestCase("TC001", description, steps, "The cart is empty")
+
+
+def test_unknown_case_falls_back_to_per_step_average():
+    model = DurationModel(default_seconds=50.0)
+    assert model.predict(URL, _test_case()) == 50.0
+
+    model.observe(URL, _test_case("Other case", STEPS[:2]), 20.0)
+
+    # 10 seconds per step on this site, 4 steps
+    assert model.predict(URL, _test_case()) == 40.0
+    assert model.predict(URL, _test_case(), completed_steps=3) == 10.0
+
+
+def test_forked_case_is_keyed_on_its_remaining_steps():
+    model = DurationModel()
+    model.observe(URL, _test_case(), 30.0, completed_steps=2)
+
+    assert model.predict(URL, _test_case(), completed_steps=2) == 30.0
+    assert model.predict(URL, _test_case()) != 30.0
+
+
+def test_observations_persist(tmp_path):
+    path = str(tmp_path / "durations.json")
+    DurationModel(path).observe(URL, _test_case(), 30.0, predicted=40.0)
+
+    model = DurationModel(path)
+
+    assert model.predict(URL, _test_case()) == 30.0
+    assert model.stats() == {"predictions": 1, "mean_absolute_error_seconds": 10.0}
+
+
+def test_schedule_puts_the_longest_case_first(fake_agents):
+    model = DurationModel()
+    short, long = _test_case("Short", STEPS[:1]), _test_case("Long")
+    model.observe(URL, short, 5.0)
+    model.observe(URL, long, 60.0)
+    qa = AutoQA(URL, "Shop", llm=FakeLLM(), duration_model=model)
+
+    assert qa.schedule([short, long]) == [long, short]
+
+
+class Manager:
+    async def safe_broadcast(self, *args, **kwargs):
+        pass
+
+
+def test_backend_retrains_forked_cases_on_their_remaining_steps(db):
+    db_test_run = crud.create_test_run(db, 1, URL, "Shop")
+    db_tc = crud.create_test_case(
+        db, db_test_run.id, "TC001", "Empty the cart", STEPS, "The cart is empty"
+    )
+    crud.update_test_case(
+        db, db_tc.id, "Done", "PASS", duration_seconds=30.0, forked_steps=2
+    )
+
+    model = AutoQAService(Manager())._duration_model(db)
+
+    assert model.predict(URL, _test_case(), completed_steps=2) == 30.0
+    assert json.loads(next(iter(model.cases)))[2] == 2
+
+
+def test_forked_execution_is_observed_on_its_remaining_steps(fake_agents):
+    model = DurationModel()
+    qa = AutoQA(URL, "Shop", llm=FakeLLM(), duration_model=model)
+    snapshot = BrowserSnapshot(URL, [], {})
+
+    result = asyncio.run(
+        qa.execute_test_case(_test_case(), snapshot=snapshot, completed_steps=2)
+    )
+
+    assert result.forked_steps == 2
+    assert [json.loads(key)[2] for key in model.cases] == [2]
@@ -0,0 +1,145 @@
+"""Tests for event batching in backend.events."""
+
+import asyncio
+import json
+
+from backend.events import EventBatcher, snapshot_message
+
+
+class Published:
+    def __init__(self):
+        self.frames = []
+
+    async def __call__(self, topic, message):
+        self.frames.append((topic, json.loads(message)))
+
+
+def _case(tc_id, **fields):
+    return {"type": "test_case_update", "data": {"tc_id": tc_id, **fields}}
+
+
+def _status(status):
+    return {"type": "status_update", "data": {"status": status}}
+
+
+def test_batch_merges_case_updates_and_keeps_last_status():
+    published = Published()
+    batcher = EventBatcher(published)
+
+    async def main():
+        await batcher.add("run", _status("generating_plan"))
+        await batcher.add("run", _case("TC001", status="running", current=1))
+        await batcher.add("run", _case("TC001", status="PASS", notes="ok"))
+        await batcher.add("run", _status("running"))
+        await batcher.flush("run")
+
+    asyncio.run(main())
+
+    [(topic, frame)] = published.frames
+    assert topic == "run"
+    assert frame == {
+        "type": "batch",
+        "events": [
+            {
+                "type": "test_case_update",
+                "data": {
+                    "tc_id": "TC001",
+                    "status": "PASS",
+                    "current": 1,
+                    "notes": "ok",
+                },
+            },
+            _status("running"),
+        ],
+    }
+
+
+def test_case_updates_only_carry_changed_fields():
+    published = Published()
+    batcher = EventBatcher(published)
+
+    async def main():
+        await batcher.add("run", _case("TC001", status="PASS", notes="ok"))
+        await batcher.flush("run")
+        await batcher.add("run", _case("TC001", status="PASS", notes="rechecked"))
+        await batcher.flush("run")
+
+    asyncio.run(main())
+
+    assert published.frames[1][1] == _case("TC001", notes="rechecked")
+
+
+def test_repeated_status_is_not_sent_again():
+    published = Published()
+    batcher = EventBatcher(published)
+
+    async def main():
+        for _ in range(2):
+            await batcher.add("run", _status("running"))
+            await batcher.flush("run")
+
+    asyncio.run(main())
+
+    assert [frame for _, frame in published.frames] == [_status("running")]
+
+
+def test_final_status_resets_the_sent_state():
+    published = Published()
+    batcher = EventBatcher(published)
+
+    async def main():
+        await batcher.add("run", _case("TC001", status="PASS"))
+        await batcher.add("run", _status("error"))
+        await batcher.flush("run")
+        # A rerun of the same run sends complete cases again
+        await batcher.add("run", _case("TC001", status="PASS"))
+        await batcher.flush("run")
+
+    asyncio.run(main())
+
+    assert published.frames[-1][1] == _case("TC001", status="PASS")
+
+
+def test_timer_flushes_pending_events():
+    published = Published()
+    batcher = EventBatcher(published, flush_interval=0.01)
+
+    async def main():
+        await batcher.add("run", _status("running"))
+        await asyncio.sleep(0.05)
+        assert not batcher._flushes
+
+    asyncio.run(main())
+
+    assert [frame for _, frame in published.frames] == [_status("running")]
+
+
+def test_full_batch_is_flushed_right_away():
+    published = Published()
+    batcher = EventBatcher(published, flush_interval=60, max_events=2)
+
+    async def main():
+        await batcher.add("run", _case("TC001", status="running"))
+        await batcher.add("run", _case("TC002", status="running"))
+
+    asyncio.run(main())
+
+    assert len(published.frames) == 1
+
+
+def test_snapshot_message_holds_status_and_complete_cases():
+    frame = json.loads(
+        snapshot_message(
+            {"status": "running"},
+            [{"tc_id": "TC001", "description": "Search", "status": "PASS"}],
+        )
+    )
+
+    assert frame == {
+        "type": "batch",
+        "events": [
+            _status("running"),
+            _case("TC001", description="Search", status="PASS"),
+        ],
+    }
+    assert json.loads(snapshot_message({"status": "pending"}, [])) == _status("pending")
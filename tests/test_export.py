@@ -0,0 +1,107 @@
+"""Tests for the streaming history export in backend.export."""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from backend import crud
+from backend.export import CSV_COLUMNS, encode, iter_records
+
+
+def _history(db, runs=5, user_id=1):
+    run_ids = []
+    for number in range(runs):
+        run = crud.create_test_run(db, user_id, "https://shop.example.com/", "Shop")
+        for case in range(2):
+            crud.create_test_case(
+                db, run.id, f"TC{case + 1:03}", "Search", ["Open", "Search"], "Found"
+            )
+        crud.create_test_log(db, run.id, f"Log of run {number}")
+        run_ids.append(run.run_id)
+    return run_ids
+
+
+def test_keyset_paging_crosses_batch_boundaries(db):
+    run_ids = _history(db)
+    _history(db, runs=2, user_id=2)
+
+    records = list(iter_records(db, user_id=1, batch_size=2))
+
+    assert [r["run_id"] for r in records if r["record_type"] == "run"] == run_ids
+    assert len([r for r in records if r["record_type"] == "test_case"]) == 10
+    assert len([r for r in records if r["record_type"] == "log"]) == 5
+    # Each batch of runs is followed by its own cases and logs
+    batches = []
+    for record in records:
+        if record["record_type"] == "run":
+            if not batches or batches[-1]["children"]:
+                batches.append({"runs": [], "children": set()})
+            batches[-1]["runs"].append(record["run_id"])
+        else:
+            batches[-1]["children"].add(record["run_id"])
+    assert [batch["runs"] for batch in batches] == [
+        run_ids[:2],
+        run_ids[2:4],
+        run_ids[4:],
+    ]
+    assert all(set(batch["runs"]) == batch["children"] for batch in batches)
+
+
+def test_time_window_filters_runs(db):
+    old, new = _history(db, runs=2)
+    crud.get_test_run(db, old).created_at = datetime(2020, 1, 1)
+    db.commit()
+
+    records = list(iter_records(db, since=datetime(2021, 1, 1)))
+    assert {r["run_id"] for r in records} == {new}
+
+    records = list(iter_records(db, until=datetime(2021, 1, 1)))
+    assert {r["run_id"] for r in records} == {old}
+
+
+def test_csv_output_has_one_row_per_record(db):
+    _history(db, runs=1)
+
+    text = b"".join(encode(iter_records(db), format="csv")).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(text)))
+
+    assert text.splitlines()[0].split(",") == CSV_COLUMNS
+    assert [row["record_type"] for row in rows] == [
+        "run",
+        "test_case",
+        "test_case",
+        "log",
+    ]
+    assert json.loads(rows[1]["steps"]) == ["Open", "Search"]
+    assert rows[0]["tc_id"] == ""
+    assert rows[3]["message"] == "Log of run 0"
+
+
+def test_gzip_round_trip(db):
+    _history(db, runs=3)
+    plain = b"".join(encode(iter_records(db), chunk_size=256))
+
+    chunks = list(encode(iter_records(db), compress=True, chunk_size=256))
+
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == plain
+    assert [json.loads(line)["record_type"] for line in plain.splitlines()][:3] == [
+        "run",
+        "run",
+        "run",
+    ]
+
+
+def test_export_endpoint_streams_own_runs(client, db):
+    run_ids = _history(db, runs=2)
+    _history(db, runs=1, user_id=2)
+
+    response = client.get("/api/export", params={"gzip": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).splitlines()
+    assert {json.loads(line)["run_id"] for line in lines} == set(run_ids)
+    assert client.get("/api/export", params={"format": "xml"}).status_code == 400
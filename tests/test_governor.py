@@ -0,0 +1,56 @@
+"""Tests for admission control in backend.governor."""
+
+import asyncio
+
+from backend.governor import ResourceGovernor
+
+
+def _governor(memory_percent: float, **budgets) -> ResourceGovernor:
+    governor = ResourceGovernor(max_cpu_percent=None, sample_interval=0.2, **budgets)
+    governor.sample = lambda: {
+        "memory_percent": memory_percent,
+        "cpu_percent": 0.0,
+        "browser_rss_mb": 0.0,
+    }
+    return governor
+
+
+def _waits(governor: ResourceGovernor, count: int, hold: float):
+    """Seconds each of ``count`` concurrent executions spent queued"""
+    waits = []
+
+    async def execute():
+        async with governor.admit() as waited:
+            waits.append(waited)
+            await asyncio.sleep(hold)
+
+    async def main():
+        await asyncio.gather(*(execute() for _ in range(count)))
+
+    asyncio.run(main())
+    return sorted(waits)
+
+
+def test_admissions_are_not_staggered_with_headroom():
+    governor = _governor(memory_percent=20.0, max_memory_percent=85.0)
+
+    assert _waits(governor, 4, hold=0.5)[-1] < 0.05
+
+
+def test_admissions_are_staggered_close_to_a_budget():
+    governor = _governor(memory_percent=80.0, max_memory_percent=85.0)
+
+    waits = _waits(governor, 3, hold=0.5)
+
+    assert waits[0] < 0.05
+    assert waits[1] >= governor.sample_interval * 0.9
+    assert waits[2] >= governor.sample_interval * 1.9
+
+
+def test_released_slot_wakes_the_next_execution():
+    governor = _governor(memory_percent=20.0, max_memory_percent=85.0, max_agents=1)
+
+    waits = _waits(governor, 3, hold=0.03)
+
+    # Woken by each release rather than at the next sample interval
+    assert waits[-1] < governor.sample_interval / 2
@@ -0,0 +1,19 @@
+"""Import-time budget of the entry points, measured under ``-X importtime``."""
+
+import os
+
+import pytest
+
+from benchmarks.bench_imports import DEFAULT_BUDGETS_MS, measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", sorted(DEFAULT_BUDGETS_MS))
+def test_entry_point_import_budget(module, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", ROOT)
+    result = measure(module, repeat=3)
+
+    assert "error" not in result, result.get("error")
+    assert result["heavy_modules"] == []
+    assert result["import_ms"] <= DEFAULT_BUDGETS_MS[module]
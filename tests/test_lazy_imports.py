@@ -0,0 +1,27 @@
+"""The API process must start without importing the LLM and browser stacks."""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import sys
+from backend.autoqa_service import AutoQAService
+AutoQAService(None)
+print(sorted(m for m in ("langchain_core", "browser_use") if m in sys.modules))
+"""
+
+
+def test_service_starts_without_llm_stack(tmp_path):
+    process = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert process.stdout.strip().splitlines()[-1] == "[]"
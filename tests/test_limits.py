@@ -0,0 +1,64 @@
+"""Tests for how exhausted budgets are recorded on test cases."""
+
+import asyncio
+
+import autoqa.core
+from autoqa.core import AutoQA
+from autoqa.models import ExecutionLimits, TestCase
+from autoqa.usage import UsageTracker
+from benchmarks.fakes import FakeAgent, FakeLLM
+
+
+def _test_case() -> TestCase:
+    return TestCase("TC001", "Search", ["Open the home page"], "Results are shown")
+
+
+def test_wall_clock_limit_is_a_timeout(fake_agents):
+    fake_agents.action_latency = 1.0
+    qa = AutoQA(
+        "https://shop.example.com/",
+        "Shop",
+        llm=FakeLLM(),
+        limits=ExecutionLimits(timeout_seconds=0.05),
+    )
+
+    result = asyncio.run(qa.execute_test_case(_test_case()))
+
+    assert result.status == "TIMEOUT"
+    assert "0.05 seconds" in result.notes
+
+
+def test_token_budget_is_not_a_timeout(fake_agents, monkeypatch):
+    usage = UsageTracker(token_budget=100)
+
+    class SpendingAgent(FakeAgent):
+        async def run(self, max_steps: int = 100, **kwargs):
+            usage.record("TC001", "fake-llm", 120, 30, 0.0)
+            return await super().run(max_steps, **kwargs)
+
+    monkeypatch.setitem(vars(autoqa.core), "Agent", SpendingAgent)
+    fake_agents.action_latency = 1.0
+    qa = AutoQA("https://shop.example.com/", "Shop", llm=FakeLLM(), usage=usage)
+
+    result = asyncio.run(qa.execute_test_case(_test_case()))
+
+    assert result.status == "SKIPPED"
+    assert result.notes.startswith("Stopped: Token budget of 100 exceeded")
+
+
+def test_token_budget_must_be_positive(client):
+    for budget in (0, -100):
+        response = client.post(
+            "/api/test-runs",
+            json={
+                "url": "https://shop.example.com/",
+                "scenario": "Shop",
+                "token_budget": budget,
+            },
+        )
+        assert response.status_code == 422
+
+        response = client.post(
+            "/api/test-runs/run-missing/rerun", params={"token_budget": budget}
+        )
+        assert response.status_code == 422
@@ -0,0 +1,91 @@
+"""Tests for cancelling a run executed by this API process."""
+
+import asyncio
+
+import pytest
+
+import autoqa.core
+from backend import crud, main
+from backend.autoqa_service import AutoQAService
+from benchmarks.fakes import FakeBrowser
+
+URL = "https://shop.example.com/"
+
+
+class Manager:
+    async def safe_broadcast(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def browsers(fake_agents, monkeypatch):
+    """Every fake browser started, with agents slow enough to interrupt."""
+    fake_agents.action_latency = 0.05
+    started = []
+
+    def browser(*args, **kwargs):
+        started.append(FakeBrowser())
+        return started[-1]
+
+    monkeypatch.setitem(vars(autoqa.core), "Browser", browser)
+    return started
+
+
+async def _until_executing(db, run_id, browsers):
+    """Wait until the plan is stored and a test case's browser is open."""
+    db_test_run = crud.get_test_run(db, run_id)
+    for _ in range(200):
+        db.expire_all()
+        if crud.get_test_cases(db, db_test_run.id) and any(
+            not browser.closed for browser in browsers
+        ):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("The run never started executing test cases")
+
+
+def _assert_cancelled(db, run_id, browsers):
+    db.expire_all()
+    db_test_run = crud.get_test_run(db, run_id)
+    assert db_test_run.status == "cancelled"
+    statuses = {tc.status for tc in crud.get_test_cases(db, db_test_run.id)}
+    assert "CANCELLED" in statuses
+    assert "pending" not in statuses
+    assert browsers and all(browser.closed for browser in browsers)
+
+
+def test_cancel_run_closes_its_browsers(db, browsers):
+    run_id = crud.create_test_run(db, 1, URL, "Shop").run_id
+    service = AutoQAService(Manager())
+
+    async def scenario():
+        task = service.start_run(run_id, URL, "Shop")
+        await _until_executing(db, run_id, browsers)
+        assert service.cancel_run(run_id)
+        await asyncio.wait([task], timeout=5)
+        assert task.cancelled()
+        assert not service.cancel_run(run_id)
+
+    asyncio.run(scenario())
+
+    _assert_cancelled(db, run_id, browsers)
+    assert run_id not in service.active_runs
+
+
+def test_cancel_endpoint_stops_a_local_run(client, db, browsers):
+    run_id = crud.create_test_run(db, 1, URL, "Shop").run_id
+    service = main.get_autoqa_service()
+
+    async def start():
+        # Only schedule the run, the portal would wait for a returned task
+        service.start_run(run_id, URL, "Shop")
+        await _until_executing(db, run_id, browsers)
+
+    client.portal.call(start)
+
+    response = client.post(f"/api/test-runs/{run_id}/cancel")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    _assert_cancelled(db, run_id, browsers)
+    assert client.post(f"/api/test-runs/{run_id}/cancel").status_code == 409
@@ -0,0 +1,93 @@
+"""Tests for the queued JSON logging in backend.logs."""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exits without stopping the listener, as the API server does
+_LOGGING = """
+import logging
+from backend.logs import configure_logging, request_id_var, run_id_var
+
+configure_logging()
+log = logging.getLogger("autoqa-web")
+run_id_var.set("run-1")
+request_id_var.set("req-1")
+items = ["a"]
+log.info("Added %s", items, extra={"test_id": "TC001"})
+items.append("b")
+try:
+    raise ValueError("boom")
+except ValueError:
+    log.exception("Step failed")
+logging.getLogger("uvicorn.access").warning('"GET / HTTP/1.1" 200')
+for i in range(200):
+    log.debug("Hidden %d", i)
+    log.info("Line %d", i)
+"""
+
+_SHUTDOWN = """
+from backend import logs
+
+listener = logs.configure_logging()
+assert logs.configure_logging() is listener
+thread = listener._thread
+logs.stop_logging()
+logs.stop_logging()
+print(thread.is_alive(), logs._listener is None)
+"""
+
+
+def _run(script, **env):
+    return subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONPATH": ROOT, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_records_are_written_as_json_lines():
+    process = _run(_LOGGING, AUTOQA_LOG_LEVEL="info", AUTOQA_LOG_FORMAT="json")
+
+    entries = [json.loads(line) for line in process.stderr.splitlines()]
+
+    added, failed, access = entries[:3]
+    assert added["message"] == "Added ['a']"
+    assert added["level"] == "INFO"
+    assert added["logger"] == "autoqa-web"
+    assert (added["run_id"], added["request_id"]) == ("run-1", "req-1")
+    assert added["test_id"] == "TC001"
+    assert "ValueError: boom" in failed["exception"]
+    assert access["logger"] == "uvicorn.access"
+    # Everything queued before exit is written in order, debug records are not
+    assert [entry["message"] for entry in entries[3:]] == [
+        f"Line {i}" for i in range(200)
+    ]
+
+
+def test_sampling_keeps_warnings():
+    process = _run(_LOGGING, AUTOQA_LOG_SAMPLING="autoqa-web=50,uvicorn=50")
+
+    messages = [json.loads(line)["message"] for line in process.stderr.splitlines()]
+
+    # "Added" is the first record of its logger, so it counts towards the rate
+    assert messages == [
+        "Added ['a']",
+        "Step failed",
+        '"GET / HTTP/1.1" 200',
+        "Line 49",
+        "Line 99",
+        "Line 149",
+        "Line 199",
+    ]
+
+
+def test_listener_stops_at_shutdown():
+    process = _run(_SHUTDOWN)
+
+    assert process.stdout.split() == ["False", "True"]
@@ -0,0 +1,98 @@
+"""Tests for the metrics registry and the backend's own metrics."""
+
+import asyncio
+
+import pytest
+
+from backend import metrics
+from backend.autoqa_service import AutoQAService
+from backend.governor import ResourceGovernor
+from backend.metrics import Registry, _Metric
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("autoqa_base", "Base")
+
+
+def test_counters_and_gauges_render_with_labels():
+    registry = Registry()
+    counter = registry.counter("autoqa_cases_total", "Cases", ("status",))
+    counter.labels("PASS").inc()
+    counter.labels(status="PASS").inc(2)
+    counter.labels('say "hi"\n').inc()
+    gauge = registry.gauge("autoqa_active", "Active runs")
+    gauge.set(1.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP autoqa_cases_total Cases",
+        "# TYPE autoqa_cases_total counter",
+        'autoqa_cases_total{status="PASS"} 3',
+        'autoqa_cases_total{status="say \\"hi\\"\\n"} 1',
+        "# HELP autoqa_active Active runs",
+        "# TYPE autoqa_active gauge",
+        "autoqa_active 1.5",
+    ]
+
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = Registry()
+    values = [1, 2]
+    registry.gauge("autoqa_queued", "Queued").set_function(values.pop)
+
+    assert registry.render().splitlines()[-1] == "autoqa_queued 2"
+    assert registry.render().splitlines()[-1] == "autoqa_queued 1"
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram(
+        "autoqa_wait_seconds", "Wait", ("phase",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.5, 5.0):
+        histogram.labels("planning").observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'autoqa_wait_seconds_bucket{phase="planning",le="0.1"} 1',
+        'autoqa_wait_seconds_bucket{phase="planning",le="1"} 2',
+        'autoqa_wait_seconds_bucket{phase="planning",le="+Inf"} 3',
+        'autoqa_wait_seconds_sum{phase="planning"} 5.55',
+        'autoqa_wait_seconds_count{phase="planning"} 3',
+    ]
+
+
+class Manager:
+    async def safe_broadcast(self, *args, **kwargs):
+        pass
+
+
+def test_backlog_counts_runs_until_their_first_admission(db):
+    service = AutoQAService(Manager())
+    service.governor = ResourceGovernor(
+        max_memory_percent=None, max_cpu_percent=None, max_agents=1
+    )
+    backlog = metrics.RUNS_BACKLOG
+    before = backlog._value
+
+    async def run(test_run_id, release):
+        async with service._admission(None, test_run_id)("plan"):
+            await release.wait()
+
+    async def main():
+        release = asyncio.Event()
+        first = service._track("run-a", "https://a.example.com", run("run-a", release))
+        second = service._track("run-b", "https://b.example.com", run("run-b", release))
+        third = service._track("run-c", "https://c.example.com", asyncio.sleep(30))
+        assert backlog._value == before + 3
+
+        await asyncio.sleep(0.05)
+        # run-a holds the only slot, run-b waits for it, run-c never asked
+        assert backlog._value == before + 2
+
+        third.cancel()
+        release.set()
+        await asyncio.gather(first, second, third, return_exceptions=True)
+
+    asyncio.run(main())
+
+    assert backlog._value == before
@@ -0,0 +1,60 @@
+"""Tests for planning areas and browser admission in autoqa.core."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import autoqa.core
+from autoqa.core import AutoQA
+from autoqa.planning import DEFAULT_AREAS, areas_from_env
+from benchmarks.fakes import FakeBrowser, FakeLLM
+
+
+def test_parallel_planning_is_opt_in(monkeypatch):
+    monkeypatch.delenv("AUTOQA_PARALLEL_PLANNING", raising=False)
+    assert areas_from_env() is None
+
+    monkeypatch.setenv("AUTOQA_PARALLEL_PLANNING", "1")
+    assert areas_from_env() == DEFAULT_AREAS
+
+
+def test_every_browser_waits_for_admission(fake_agents, monkeypatch):
+    admitted = []
+    running = 0
+    # Slots held when each browser was started
+    browsers = []
+
+    def browser(*args, **kwargs):
+        browsers.append(running)
+        return FakeBrowser()
+
+    monkeypatch.setitem(vars(autoqa.core), "Browser", browser)
+
+    @asynccontextmanager
+    async def admission(label, test_case=None):
+        nonlocal running
+        admitted.append(label)
+        running += 1
+        try:
+            yield 0.0
+        finally:
+            running -= 1
+
+    qa = AutoQA(
+        "https://shop.example.com/",
+        "Shop",
+        llm=FakeLLM(),
+        planning_areas=DEFAULT_AREAS,
+        admission=admission,
+    )
+
+    async def scenario():
+        await qa.create_test_plan()
+        await qa.execute_all_tests()
+
+    asyncio.run(scenario())
+
+    assert {f"plan/{area.name}" for area in DEFAULT_AREAS} <= set(admitted)
+    assert "prefix" in admitted
+    assert {tc.id for tc in qa.results} <= set(admitted)
+    assert len(browsers) == len(admitted)
+    assert all(browsers)
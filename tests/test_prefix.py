@@ -0,0 +1,129 @@
+"""Tests for the step prefix tree and shared prefix execution."""
+
+import asyncio
+
+from autoqa.core import AutoQA
+from autoqa.models import TestCase
+from autoqa.prefix import build_prefix_tree, normalize_step
+from autoqa.sessions import SessionCache
+from benchmarks.fakes import FakeLLM
+
+URL = "https://shop.example.com/"
+LOGIN = [
+    "Open the login page",
+    "Enter 'alice@example.com' and the password 'secret'",
+    "Click the Sign in button",
+]
+
+
+def _case(tc_id, steps, description="Check the page"):
+    return TestCase(tc_id, description, steps, "The page works")
+
+
+def test_normalize_step_ignores_numbering_and_punctuation():
+    assert normalize_step("Step 2: Open  the Cart.") == "open the cart"
+    assert normalize_step("3) open the cart") == "open the cart"
+
+
+def test_build_prefix_tree_merges_shared_steps():
+    cart = _case("TC001", ["1. Open the home page", "Search for 'laptop'", "Add it"])
+    compare = _case("TC002", ["Open the home page.", "Search for 'laptop'", "Compare"])
+    footer = _case("TC003", ["Open the home page", "Open the footer links"])
+    home = _case("TC004", ["Open the home page"])
+
+    root = build_prefix_tree([cart, compare, footer, home])
+
+    (shared,) = root.children
+    assert shared.steps == ["1. Open the home page"]
+    assert shared.test_cases == [home]
+    search, footer_node = shared.children
+    assert footer_node.test_cases == [footer]
+    assert search.steps == ["Search for 'laptop'"]
+    assert (search.depth, search.end) == (1, 2)
+    assert [child.test_cases for child in search.children] == [[cart], [compare]]
+    assert [tc.id for tc in shared.all_test_cases()] == [
+        "TC004",
+        "TC001",
+        "TC002",
+        "TC003",
+    ]
+
+
+def test_build_prefix_tree_leaves_out_offset_steps():
+    profile = _case("TC001", [*LOGIN, "Open the profile page"])
+    orders = _case("TC002", [*LOGIN, "Open the orders page"])
+
+    root = build_prefix_tree([profile, orders], {"TC001": 3, "TC002": 3})
+
+    assert [child.steps for child in root.children] == [
+        ["Open the profile page"],
+        ["Open the orders page"],
+    ]
+    assert [child.depth for child in root.children] == [0, 0]
+
+
+def _execute_shared(qa, test_cases):
+    calls = {}
+
+    async def execute(test_case, snapshot=None, completed_steps=0):
+        calls[test_case.id] = (snapshot is not None, completed_steps)
+        test_case.status = "PASS"
+        return test_case
+
+    results = asyncio.run(qa.execute_shared_prefixes(test_cases, execute))
+    return results, calls
+
+
+def test_shared_prefix_runs_once(fake_agents):
+    qa = AutoQA(URL, "Shop", llm=FakeLLM())
+    test_cases = [
+        _case("TC001", ["Open the home page", "Search for 'laptop'", "Add it"]),
+        _case("TC002", ["Open the pricing page"]),
+        _case("TC003", ["Open the home page", "Search for 'laptop'", "Compare"]),
+    ]
+
+    results, calls = _execute_shared(qa, test_cases)
+
+    assert results == test_cases
+    (prefix,) = qa.tracer.spans("prefix")
+    assert prefix.attributes["completed_steps"] == 2
+    assert calls == {
+        "TC001": (True, 2),
+        "TC002": (False, 0),
+        "TC003": (True, 2),
+    }
+
+
+def test_prefix_covering_sign_in_is_cached(fake_agents, tmp_path):
+    cache = SessionCache(str(tmp_path / "sessions"))
+    qa = AutoQA(URL, "Shop", llm=FakeLLM(), session_cache=cache, session_owner="1")
+    test_cases = [
+        _case("TC001", [*LOGIN, "Open the profile page"]),
+        _case("TC002", [*LOGIN, "Open the orders page"]),
+    ]
+
+    _, calls = _execute_shared(qa, test_cases)
+
+    assert calls == {"TC001": (True, 3), "TC002": (True, 3)}
+    assert cache.load(URL, LOGIN, owner="1") is not None
+
+
+def test_prefix_ending_inside_sign_in_is_not_cached(fake_agents, tmp_path):
+    cache = SessionCache(str(tmp_path / "sessions"))
+    qa = AutoQA(URL, "Shop", llm=FakeLLM(), session_cache=cache, session_owner="1")
+    shared = ["Open the login page", "Enter 'alice@example.com' as the email"]
+    test_cases = [
+        _case(
+            "TC001",
+            [*shared, "Enter the password 'secret'", "Click Sign in", "Open profile"],
+        ),
+        _case(
+            "TC002",
+            [*shared, "Enter the password 'other'", "Click Sign in", "Open orders"],
+        ),
+    ]
+
+    _, calls = _execute_shared(qa, test_cases)
+
+    assert calls == {"TC001": (True, 2), "TC002": (True, 2)}
+    assert list((tmp_path / "sessions").glob("*.session")) == []
@@ -0,0 +1,48 @@
+"""Tests for the sampling profiler in backend.profiler."""
+
+import asyncio
+import threading
+
+from backend.profiler import SamplingProfiler
+
+
+def _samplers():
+    return [t for t in threading.enumerate() if t.name == "autoqa-profiler"]
+
+
+def _busy(seconds: float):
+    deadline = asyncio.get_running_loop().time() + seconds
+    while asyncio.get_running_loop().time() < deadline:
+        pass
+
+
+def test_sampler_thread_is_joined_when_the_last_profile_detaches():
+    profiler = SamplingProfiler(interval=0.001)
+
+    async def main():
+        for _ in range(3):
+            with profiler.attach("request") as profile:
+                _busy(0.02)
+                assert len(_samplers()) == 1
+            assert _samplers() == []
+        return profile
+
+    profile = asyncio.run(main())
+
+    assert profile.samples > 0
+    assert "_busy" in profile.folded()
+
+
+def test_overlapping_profiles_share_one_sampler():
+    profiler = SamplingProfiler(interval=0.001)
+
+    async def profiled(target):
+        with profiler.attach(target):
+            await asyncio.sleep(0.01)
+            return len(_samplers())
+
+    async def main():
+        return await asyncio.gather(profiled("a"), profiled("b"))
+
+    assert asyncio.run(main()) == [1, 1]
+    assert _samplers() == []
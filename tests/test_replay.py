@@ -0,0 +1,122 @@
+"""Tests for compiling and storing replay scripts in autoqa.replay."""
+
+import os
+from types import SimpleNamespace
+
+from cryptography.fernet import Fernet
+
+from autoqa.models import TestCase
+from autoqa.replay import ReplayStore, compile_history
+
+TEST_CASE = TestCase(
+    "TC001",
+    "Sign in and open the account page",
+    [
+        "Open the login page",
+        "Enter 'alice@example.com' and the password 'hunter22'",
+        "Click Sign in",
+    ],
+    "The account page shows 'Welcome back, Alice'",
+)
+
+
+class Action:
+    def __init__(self, name, **params):
+        self.name = name
+        self.params = params
+
+    def model_dump(self, exclude_none=False):
+        return {self.name: self.params}
+
+
+def _element(css):
+    return SimpleNamespace(css_selector=css, xpath=None)
+
+
+def _item(url, actions, elements=(), title=None):
+    return SimpleNamespace(
+        state=SimpleNamespace(url=url, title=title, interacted_element=list(elements)),
+        model_output=SimpleNamespace(
+            current_state=SimpleNamespace(next_goal="goal"), action=actions
+        ),
+    )
+
+
+def _history():
+    return SimpleNamespace(
+        history=[
+            _item(
+                "https://shop.example.com/login",
+                [Action("go_to_url", url="https://shop.example.com/login")],
+                [None],
+            ),
+            _item(
+                "https://shop.example.com/login",
+                [
+                    Action("input_text", index=1, text="alice@example.com"),
+                    Action("input_text", index=2, text="hunter22"),
+                    Action("click_element_by_index", index=3),
+                ],
+                [_element("#email"), _element("#password"), _element("#submit")],
+            ),
+            _item(
+                "https://shop.example.com/account",
+                [Action("done", text="{}", success=True)],
+                title="Account",
+            ),
+        ]
+    )
+
+
+def test_compile_history_records_actions_and_end_state():
+    script = compile_history(TEST_CASE, _history(), completed_steps=1)
+
+    assert [action.kind for action in script.actions] == [
+        "navigate",
+        "fill",
+        "fill",
+        "click",
+    ]
+    assert script.actions[1].selectors == ["#email"]
+    assert script.actions[2].value == "hunter22"
+    assert script.completed_steps == 1
+    assert script.final_url == "https://shop.example.com/account"
+    assert script.final_title == "Account"
+    assert script.expected_texts == ["Welcome back, Alice"]
+
+
+def test_compile_history_rejects_clicks_without_selectors():
+    history = SimpleNamespace(
+        history=[
+            _item(
+                "https://shop.example.com/",
+                [Action("click_element_by_index", index=3)],
+                [None],
+            )
+        ]
+    )
+
+    assert compile_history(TEST_CASE, history) is None
+
+
+def test_compile_history_rejects_unsupported_actions():
+    history = SimpleNamespace(
+        history=[_item("https://shop.example.com/", [Action("open_tab", url="x")])]
+    )
+
+    assert compile_history(TEST_CASE, history) is None
+
+
+def test_replay_store_encrypts_typed_values(tmp_path):
+    store = ReplayStore(str(tmp_path), key=Fernet.generate_key())
+    script = compile_history(TEST_CASE, _history())
+    fingerprint = ReplayStore.fingerprint("https://shop.example.com/", TEST_CASE)
+
+    store.save(fingerprint, script)
+
+    with open(os.path.join(tmp_path, f"{fingerprint}.replay"), "rb") as f:
+        assert b"hunter22" not in f.read()
+    assert store.load(fingerprint).actions[2].value == "hunter22"
+    assert (
+        ReplayStore(str(tmp_path), key=Fernet.generate_key()).load(fingerprint) is None
+    )
@@ -0,0 +1,102 @@
+"""Tests for selecting and linking the test cases of a rerun."""
+
+from backend import crud
+from backend.autoqa_service import AutoQAService
+
+
+def _finished_run(db, statuses):
+    run = crud.create_test_run(db, 1, "https://shop.example.com/", "Shop")
+    crud.create_test_plan(db, run.id, {"test_cases": []})
+    for number, status in enumerate(statuses, start=1):
+        case = crud.create_test_case(
+            db, run.id, f"TC{number:03}", f"Case {number}", ["Open"], "Works"
+        )
+        crud.update_test_case(db, case.id, "Done", status)
+    crud.update_test_run_status(db, run.run_id, "completed")
+    return run
+
+
+def _started(monkeypatch):
+    started = []
+    monkeypatch.setattr(
+        AutoQAService,
+        "start_rerun",
+        lambda self, run_id, url, **options: started.append((run_id, options)),
+    )
+    return started
+
+
+def test_rerun_copies_the_selected_cases(client, db, monkeypatch):
+    started = _started(monkeypatch)
+    run = _finished_run(db, ["PASS", "FAIL", "ERROR", "TIMEOUT"])
+
+    response = client.post(
+        f"/api/test-runs/{run.run_id}/rerun", params={"concurrency": 2}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["parent_run_id"] == run.run_id
+    assert body["attempt"] == 2
+    assert body["status"] == "in_progress"
+    assert started == [
+        (body["id"], {"token_budget": None, "concurrency": 2, "profile": False})
+    ]
+
+    rerun = crud.get_test_run(db, body["id"])
+    cases = crud.get_test_cases(db, rerun.id)
+    assert [(tc.tc_id, tc.status) for tc in cases] == [
+        ("TC002", "pending"),
+        ("TC003", "pending"),
+    ]
+    assert rerun.test_plan.plan_json == run.test_plan.plan_json
+
+
+def test_status_filter_selects_cases(client, db, monkeypatch):
+    _started(monkeypatch)
+    run = _finished_run(db, ["PASS", "FAIL", "TIMEOUT", "SKIPPED"])
+
+    response = client.post(
+        f"/api/test-runs/{run.run_id}/rerun", params={"status": "timeout, skipped"}
+    )
+
+    rerun = crud.get_test_run(db, response.json()["id"])
+    assert [tc.tc_id for tc in crud.get_test_cases(db, rerun.id)] == [
+        "TC003",
+        "TC004",
+    ]
+
+
+def test_reruns_of_reruns_link_to_the_original(client, db, monkeypatch):
+    _started(monkeypatch)
+    run = _finished_run(db, ["FAIL"])
+
+    first = client.post(f"/api/test-runs/{run.run_id}/rerun").json()
+    (case,) = crud.get_test_cases(db, crud.get_test_run(db, first["id"]).id)
+    crud.update_test_case(db, case.id, "Still broken", "FAIL")
+    crud.update_test_run_status(db, first["id"], "completed")
+    second = client.post(f"/api/test-runs/{first['id']}/rerun").json()
+    # Rerunning the original again continues the attempt count
+    third = client.post(f"/api/test-runs/{run.run_id}/rerun").json()
+
+    assert [first["attempt"], second["attempt"], third["attempt"]] == [2, 3, 4]
+    assert {
+        first["parent_run_id"],
+        second["parent_run_id"],
+        third["parent_run_id"],
+    } == {run.run_id}
+
+
+def test_rerun_rejects_bad_selections(client, db, monkeypatch):
+    started = _started(monkeypatch)
+    run = _finished_run(db, ["PASS"])
+
+    unknown = client.post(
+        f"/api/test-runs/{run.run_id}/rerun", params={"status": "pending"}
+    )
+    assert unknown.status_code == 400
+    assert client.post(f"/api/test-runs/{run.run_id}/rerun").status_code == 400
+
+    foreign = crud.create_test_run(db, 2, "https://shop.example.com/", "Shop")
+    assert client.post(f"/api/test-runs/{foreign.run_id}/rerun").status_code == 403
+    assert started == []
@@ -0,0 +1,94 @@
+"""Tests for model tier choice and escalation under autoqa.routing."""
+
+import asyncio
+
+import autoqa.core
+from autoqa.core import DEFAULT_MODEL, AutoQA
+from autoqa.models import TestCase
+from autoqa.routing import (
+    FAST_MODEL,
+    STRONG_MODEL,
+    RoutingPolicy,
+    parse_confidence,
+)
+from benchmarks.fakes import FakeAgent, FakeLLM
+
+
+def _test_case() -> TestCase:
+    return TestCase("TC001", "Search", ["Search for 'laptop'"], "Results are shown")
+
+
+def test_routing_is_opt_in(monkeypatch):
+    monkeypatch.delenv("AUTOQA_MODEL_ROUTING", raising=False)
+    assert RoutingPolicy.from_env() is None
+
+    monkeypatch.setenv("AUTOQA_MODEL_ROUTING", "1")
+    monkeypatch.setenv("AUTOQA_EXECUTION_MODELS", "model-a, model-b")
+    policy = RoutingPolicy.from_env()
+    assert policy.models("execution") == ["model-a", "model-b"]
+    assert policy.models("planning") == [STRONG_MODEL]
+
+
+def test_uncertain_outcomes_escalate():
+    policy = RoutingPolicy(min_confidence=0.6)
+
+    assert policy.should_escalate("ERROR", 0.9)
+    assert policy.should_escalate(None, None)
+    assert policy.should_escalate("PASS", 0.4)
+    assert not policy.should_escalate("FAIL", 0.9)
+    assert not policy.should_escalate("PASS", None)
+
+
+def test_parse_confidence_accepts_fractions_and_percentages():
+    assert parse_confidence('{"status": "PASS", "confidence": 0.8}') == 0.8
+    assert parse_confidence('{"confidence": "85"}') == 0.85
+    assert parse_confidence('{"status": "PASS"}') is None
+
+
+def _models_built(monkeypatch) -> list:
+    built = []
+
+    def llm(model):
+        built.append(model)
+        return FakeLLM(model)
+
+    monkeypatch.setitem(vars(autoqa.core), "ChatGoogleGenerativeAI", llm)
+    return built
+
+
+def test_routing_replaces_the_default_model(fake_agents, monkeypatch):
+    built = _models_built(monkeypatch)
+    routing = RoutingPolicy(execution=["model-a", "model-b"])
+    qa = AutoQA("https://shop.example.com/", "Shop", routing=routing)
+
+    result = asyncio.run(qa.execute_test_case(_test_case()))
+
+    assert result.model_tier == "model-a"
+    assert built == ["model-a", "model-b"]
+
+
+def test_without_routing_the_default_model_decides(fake_agents, monkeypatch):
+    built = _models_built(monkeypatch)
+    qa = AutoQA("https://shop.example.com/", "Shop")
+
+    asyncio.run(qa.execute_test_case(_test_case()))
+
+    assert built == [DEFAULT_MODEL]
+
+
+def test_low_confidence_escalates_to_the_next_tier(fake_agents, monkeypatch):
+    class UnsureFastAgent(FakeAgent):
+        def _execution_result(self):
+            result = super()._execution_result()
+            result["confidence"] = 0.3 if self.llm.model == FAST_MODEL else 0.9
+            return result
+
+    _models_built(monkeypatch)
+    monkeypatch.setitem(vars(autoqa.core), "Agent", UnsureFastAgent)
+    qa = AutoQA("https://shop.example.com/", "Shop", routing=RoutingPolicy())
+
+    result = asyncio.run(qa.execute_test_case(_test_case()))
+
+    assert result.model_tier == STRONG_MODEL
+    assert result.confidence == 0.9
+    assert f"escalated from {FAST_MODEL}" in result.notes
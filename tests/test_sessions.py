@@ -0,0 +1,61 @@
+"""Tests for sign-in detection and the session cache in autoqa.sessions."""
+
+from autoqa.browser import BrowserSnapshot
+from autoqa.models import TestCase
+from autoqa.sessions import SessionCache, login_setup_steps
+
+LOGIN = [
+    "Open the login page",
+    "Enter 'alice@example.com' and the password 'secret'",
+    "Click the Sign in button",
+]
+
+
+def test_login_setup_steps_counts_leading_sign_in_flow():
+    test_case = TestCase(
+        "TC001",
+        "Edit the profile name",
+        [*LOGIN, "Open the profile page", "Change the name to 'Bob'"],
+        "The new name is shown on the profile page",
+    )
+
+    assert login_setup_steps(test_case) == 3
+
+
+def test_login_setup_steps_keeps_authentication_tests():
+    test_case = TestCase(
+        "TC001",
+        "Log in and see the dashboard",
+        [*LOGIN, "Open the dashboard"],
+        "The dashboard greets the logged in user",
+    )
+
+    assert login_setup_steps(test_case) == 0
+
+
+def test_login_setup_steps_keeps_cases_that_only_sign_in():
+    test_case = TestCase("TC001", "Open the account", LOGIN, "The account opens")
+
+    assert login_setup_steps(test_case) == 0
+
+
+def test_login_setup_steps_without_sign_in():
+    test_case = TestCase(
+        "TC001", "Search", ["Open the home page", "Search for 'laptop'"], "Results"
+    )
+
+    assert login_setup_steps(test_case) == 0
+
+
+def test_session_cache_is_scoped_to_owner_and_sign_in_flow(tmp_path):
+    cache = SessionCache(str(tmp_path))
+    snapshot = BrowserSnapshot("https://shop.example.com/", [], {"a": {"b": "c"}})
+    cache.save("https://shop.example.com/cart", LOGIN, snapshot, owner="1")
+
+    loaded = cache.load("https://shop.example.com/", LOGIN, owner="1")
+    assert loaded is not None
+    assert loaded.local_storage == {"a": {"b": "c"}}
+
+    other_account = [LOGIN[0], "Enter 'eve@example.com' and the password 'x'", LOGIN[2]]
+    assert cache.load("https://shop.example.com/", LOGIN, owner="2") is None
+    assert cache.load("https://shop.example.com/", other_account, owner="1") is None
@@ -0,0 +1,79 @@
+"""Tests for the multiplexed /ws/subscriptions endpoint."""
+
+import asyncio
+import json
+
+import pytest
+
+from backend import crud, main
+
+
+def _broadcast(client, run_id: str, status: str):
+    message = json.dumps({"type": "status_update", "data": {"status": status}})
+    client.portal.call(main.manager.broadcast, run_id, message)
+
+
+def test_subscribe_delivers_events_of_several_runs(client, db):
+    first = crud.create_test_run(db, 1, "https://a.example.com", "A").run_id
+    second = crud.create_test_run(db, 1, "https://b.example.com", "B").run_id
+    foreign = crud.create_test_run(db, 2, "https://c.example.com", "C").run_id
+
+    with client.websocket_connect(f"/ws/subscriptions?token={client.token}") as ws:
+        ws.send_json({"action": "subscribe", "run_ids": [first, second, foreign]})
+        reply = ws.receive_json()
+        assert reply["type"] == "subscribed"
+        assert reply["data"]["runs"] == {first: "in_progress", second: "in_progress"}
+        assert reply["data"]["denied"] == [foreign]
+        snapshots = [ws.receive_json() for _ in range(2)]
+        assert {frame["run_id"] for frame in snapshots} == {first, second}
+
+        _broadcast(client, first, "executing_tests")
+        _broadcast(client, foreign, "executing_tests")
+        _broadcast(client, second, "completed")
+        assert ws.receive_json() == {
+            "run_id": first,
+            "type": "status_update",
+            "data": {"status": "executing_tests"},
+        }
+        assert ws.receive_json()["run_id"] == second
+
+        ws.send_json({"action": "unsubscribe", "run_ids": [first]})
+        assert ws.receive_json()["type"] == "unsubscribed"
+        _broadcast(client, first, "completed")
+        ws.send_json({"action": "ping"})
+        assert ws.receive_json()["type"] == "pong"
+
+    assert main.manager.subscriptions == {}
+    assert main.manager.subscribers == {}
+
+
+class BrokenSocket:
+    """Subscribes to a run, then fails with an error other than a disconnect."""
+
+    def __init__(self, run_id: str):
+        self.requests = [json.dumps({"action": "subscribe", "run_ids": [run_id]})]
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def receive_text(self) -> str:
+        if self.requests:
+            return self.requests.pop()
+        raise RuntimeError("receive failed")
+
+
+def test_socket_is_unsubscribed_after_an_error(db):
+    from backend.auth import create_access_token
+
+    run_id = crud.create_test_run(db, 1, "https://a.example.com", "A").run_id
+    websocket = BrokenSocket(run_id)
+    token = create_access_token({"sub": "1"})
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main.subscriptions_endpoint(websocket, token, db))
+
+    assert websocket not in main.manager.subscriptions
+    assert run_id not in main.manager.subscribers
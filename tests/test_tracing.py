@@ -0,0 +1,108 @@
+"""Tests for span nesting and the timing summary built from spans."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from autoqa.core import AutoQA
+from autoqa.tracing import Tracer, current_span
+from benchmarks.fakes import FakeLLM
+
+
+def test_concurrent_tasks_nest_under_their_own_spans():
+    tracer = Tracer()
+
+    async def case(test_id, delay):
+        with tracer.span("test_case", test_id=test_id):
+            await asyncio.sleep(delay)
+            with tracer.span("agent", test_id=test_id):
+                await asyncio.sleep(delay)
+
+    async def scenario():
+        with tracer.span("execution"):
+            await asyncio.gather(case("TC001", 0.02), case("TC002", 0.01))
+        return current_span()
+
+    assert asyncio.run(scenario()) is None
+
+    (execution,) = tracer.roots
+    assert execution.name == "execution"
+    assert sorted(child.attributes["test_id"] for child in execution.children) == [
+        "TC001",
+        "TC002",
+    ]
+    for test_case in execution.children:
+        assert test_case.parent is execution
+        (agent,) = test_case.children
+        assert agent.attributes["test_id"] == test_case.attributes["test_id"]
+        assert test_case.start <= agent.start <= agent.end <= test_case.end
+    assert len(tracer.spans()) == 5
+
+
+def test_span_records_error_and_restores_parent():
+    tracer = Tracer()
+
+    with tracer.span("execution") as execution:
+        with pytest.raises(ValueError):
+            with tracer.span("test_case"):
+                raise ValueError("boom")
+        assert current_span() is execution
+        sibling = tracer.start_span("test_case")
+
+    failed, _ = execution.children
+    assert failed.error == "ValueError: boom"
+    assert failed.end is not None
+    assert sibling.parent is execution
+
+
+def test_spans_of_another_tracer_are_not_parents():
+    outer, inner = Tracer(), Tracer()
+
+    with outer.span("execution"):
+        with inner.span("test_case") as span:
+            assert span.parent is None
+
+    assert inner.roots == [span]
+    assert outer.roots[0].children == []
+
+
+def test_timing_summary_is_built_from_spans():
+    tracer = Tracer()
+    tracer.record("plan", start=1000.0, end=1004.0)
+    execution = tracer.record("execution", start=1004.0, end=1010.5)
+    tracer.record(
+        "test_case",
+        start=1004.0,
+        end=1007.25,
+        parent=execution,
+        test_id="TC001",
+        predicted_seconds=3.0,
+    )
+    tracer.record(
+        "test_case", start=1007.25, end=1010.5, parent=execution, test_id="TC002"
+    )
+    qa = AutoQA("https://shop.example.com/", "Shop", llm=FakeLLM(), tracer=tracer)
+
+    timing = qa.timing
+
+    assert timing["planning"]["duration"] == 4.0
+    assert timing["execution"]["duration"] == 6.5
+    assert timing["total"] == {
+        "start": datetime.fromtimestamp(1000.0).isoformat(),
+        "end": datetime.fromtimestamp(1010.5).isoformat(),
+        "duration": 10.5,
+    }
+    assert timing["execution"]["tests"]["TC001"]["duration"] == 3.25
+    assert timing["execution"]["tests"]["TC001"]["predicted"] == 3.0
+    assert timing["execution"]["tests"]["TC002"]["predicted"] is None
+
+
+def test_timing_summary_without_spans():
+    qa = AutoQA("https://shop.example.com/", "Shop", llm=FakeLLM())
+
+    timing = qa.timing
+
+    assert timing["planning"] == {"start": None, "end": None, "duration": None}
+    assert timing["total"]["duration"] is None
+    assert timing["execution"]["tests"] == {}
@@ -0,0 +1,44 @@
+"""Tests for token budget enforcement in autoqa.usage."""
+
+import asyncio
+import time
+
+import pytest
+
+from autoqa.usage import TokenBudgetExceeded, UsageTracker
+
+
+def test_enforce_stops_agent_once_budget_is_used_up():
+    usage = UsageTracker(token_budget=100)
+
+    async def runaway_agent():
+        usage.record("TC001", "gemini-2.0-flash", 120, 30, 0.1)
+        await asyncio.sleep(10)
+
+    start = time.perf_counter()
+    with pytest.raises(TokenBudgetExceeded):
+        asyncio.run(usage.enforce(runaway_agent()))
+    assert time.perf_counter() - start < 1
+
+
+def test_enforce_returns_result_within_budget():
+    usage = UsageTracker(token_budget=1000)
+
+    async def agent():
+        usage.record("TC001", "gemini-2.0-flash", 10, 5, 0.1)
+        return "done"
+
+    assert asyncio.run(usage.enforce(agent())) == "done"
+
+
+def test_enforce_refuses_to_start_over_budget():
+    usage = UsageTracker(token_budget=10)
+    usage.record("TC001", "gemini-2.0-flash", 10, 5, 0.1)
+
+    async def agent():
+        raise AssertionError("should not run")
+
+    coroutine = agent()
+    with pytest.raises(TokenBudgetExceeded):
+        asyncio.run(usage.enforce(coroutine))
+    coroutine.close()